@@ -56,10 +56,24 @@ export const blockchainApi = {
 
   // Mining operations
   mineBlock: async (minerAddress: string): Promise<Block> => {
-    const response = await api.post("/block/mine", {
+    // Mining runs as a background job on the node; poll until it has a result
+    const job = await api.post("/mining/start", {
       miner_address: minerAddress,
     });
-    return response.data;
+    for (;;) {
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+      const response = await api.get(`/mining/result/${job.data.job_id}`);
+      if (response.status === 200) {
+        return response.data;
+      }
+      // A waiting job has no transactions to mine and would never finish: stop it rather than poll forever
+      if (response.data.status === "waiting") {
+        await api.post(`/mining/cancel/${job.data.job_id}`);
+        throw new Error(
+          "No transactions in mempool. Mining empty blocks is not allowed."
+        );
+      }
+    }
   },
 
   // Network operations
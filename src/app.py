@@ -8,42 +8,109 @@ if current_dir not in sys.path:
 
 from models.Blockchain import BlockChain
 from tools.GenerateKeys import generate_key_pair
-from models.Transaction import Transaction
+from models.Transaction import Transaction, verification_cache_stats
 from models.UTXO import UTXO
+from models.CoinSelection import select_coins
+from models.BlockStore import frame_record
+from models.Gossip import Gossip
+from models.MiningJob import BackgroundMiner, MiningJob
+from models.Metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+from models.LogConfig import LOG_FILE, configure_logging
 import models.Block as Block
 
 # 01 Importing Flask and JSONify Modules
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, Response, g, jsonify, request, make_response
 from flask_cors import CORS
+import json
+import time
 
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('blockchain.log'),
-        logging.StreamHandler()
-    ]
-)
-
 # Create logger
 logger = logging.getLogger(__name__)
 
-def create_app(port):
+# Most transactions accepted by one /transaction/add_batch request
+MAX_BATCH_SIZE = 1000
+
+# Default and largest page of /wallet/history
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 500
+
+# Seconds /mining/cancel waits for the miner processes to stop before answering
+MINING_CANCEL_TIMEOUT = 10
+
+# Seconds /block/mine waits for its job to find the block before answering with the job instead
+MINING_WAIT_TIMEOUT = 30
+
+def create_app(port, data_dir=None, log_file=LOG_FILE):
+    # Installs the queued log writer on the first call only, later apps share it; log_file=None logs to the console only
+    configure_logging(log_file=log_file)
     app = Flask(__name__)
     
+    # Request metrics are kept per app, so several nodes can run in one process
+    metrics = Registry()
+    request_duration = Histogram('http_request_duration_seconds', 'Time spent handling HTTP requests',
+                                 labels=('method', 'route'), registry=metrics)
+    requests_total = Counter('http_requests_total', 'HTTP requests handled',
+                             labels=('method', 'route', 'status'), registry=metrics)
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
     # Enable CORS for all routes
     @app.after_request
     def after_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            # Label by the route pattern, not the path, so IDs and addresses don't create new series
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            request_duration.labels(request.method, route).observe(time.perf_counter() - started)
+            requests_total.labels(request.method, route, response.status_code).inc()
         response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PUT,POST,DELETE,OPTIONS')
         response.headers.add('Access-Control-Allow-Credentials', 'true')
         return response
 
-    blockChain = BlockChain()
+    # Each node keeps its blocks and UTXO snapshots in its own data directory
+    if data_dir is None:
+        data_dir = os.path.join(current_dir, 'datas', f'node_{port}')
+    blockChain = BlockChain(data_dir=data_dir)
+    # New transactions and blocks are pushed to the peers as soon as this node has them
+    gossip = Gossip(blockChain, port)
+    # Proof of work runs on a background thread, request handlers only start, poll and cancel jobs
+    miner = BackgroundMiner(blockChain, on_block=gossip.announce_block)
+
+    # Node state gauges, read when /metrics is scraped so the hot paths don't update them
+    node_gauges = {
+        'node_chain_height': ('Blocks in the chain', lambda: len(blockChain.chain)),
+        'node_mempool_transactions': ('Transactions waiting in the mempool', lambda: len(blockChain.mempool)),
+        'node_mempool_bytes': ('Encoded size of the mempool transactions', lambda: blockChain.mempool.total_size),
+        'node_utxo_set_size': ('Unspent outputs in the UTXO set', lambda: len(blockChain.utxo_set)),
+        'node_peers': ('Known peer nodes', lambda: len(blockChain.nodes)),
+        'node_proof_of_work_hash_rate': ('Hashes per second of the last proof-of-work search',
+                                         lambda: blockChain.miner.hash_rate),
+        'node_signature_cache_size': ('Entries in the verified signature cache',
+                                      lambda: verification_cache_stats()['signatures']['size'])
+    }
+    for name, (description, read_value) in node_gauges.items():
+        Gauge(name, description, registry=metrics).set_function(read_value)
+
+    def stream_chain(chain_key, start, stop, epoch, fields):
+        """Stream a JSON object holding fields plus the blocks at positions start..stop, one block at a time"""
+        yield json.dumps(fields)[:-1].encode()
+        yield f', "{chain_key}": ['.encode()
+        for position, encoded in enumerate(blockChain.iter_encoded_blocks(start, stop, epoch), start):
+            if position > start:
+                yield b','
+            yield encoded
+        yield b']}'
+
+    def stream_chain_binary(start, stop, epoch):
+        """Stream the blocks at positions start..stop in their binary encoding, each prefixed with its length"""
+        for encoded in blockChain.iter_encoded_blocks(start, stop, epoch, binary=True):
+            yield frame_record(encoded)
 
     # Part - 00 Add transactions to the mempool (Users can trade and add their transaction into mempool)
 
@@ -66,13 +133,12 @@ def create_app(port):
             }
             return jsonify(response), 200
         except Exception as e:
-            logger.error(f"Error generating keys: {str(e)}")
+            logger.error("Error generating keys: %s", e)
             return jsonify({'error': str(e)}), 500
         
     @app.route('/transaction/prepare', methods=['POST'])
     def prepare_transaction():
         json = request.get_json()
-        logger.info(f"Received prepare_transaction request: {json}")
 
         # Get sender's address and private key
         sender_address = json.get('sender_address')
@@ -87,36 +153,23 @@ def create_app(port):
             # Create new transaction
             transaction = Transaction()
 
-            # Get available UTXOs for the sender
-            available_utxos = [
-                utxo for utxo in blockChain.utxo_set.values()
-                if utxo.owner_address == json['sender_address'] and not utxo.spent
-            ]
-
-            logger.info(f"Available UTXOs: {available_utxos}")
-            
-            # Calculate total available amount
-            total_available = sum(utxo.amount for utxo in available_utxos)
             total_needed = sum(output['amount'] for output in outputs) + fee  # Include fee in total needed
-            
-            if total_available < total_needed:
-                return f'Insufficient funds. Available: {total_available}, Needed: {total_needed} (including fee: {fee})', 400
-            
-            # Check if any UTXO is already in use in the mempool
-            for utxo in available_utxos:
-                for mempool_tx in blockChain.mempool:
-                    for input_utxo in mempool_tx.inputs:
-                        if input_utxo.tx_id == utxo.tx_id and input_utxo.output_index == utxo.output_index:
-                            return f'UTXO {utxo.tx_id}:{utxo.output_index} is already in use in a pending transaction', 400
-            
-            # Add inputs (UTXOs) to the transaction
-            remaining_amount = total_needed
-            for utxo in available_utxos:
-                if remaining_amount <= 0:
-                    break
+
+            # Outputs already spent by a pending transaction are left out rather than failing the request
+            spendable = blockChain.get_spendable_outputs(sender_address)
+            selection = select_coins(spendable, total_needed)
+            if selection is None:
+                total_available = sum(amount for _, amount in spendable)
+                return (f'Insufficient funds. Available: {total_available}, Needed: {total_needed} (including fee: {fee}), '
+                        f'not counting outputs spent by pending transactions'), 400
+
+            # The selection ran without the chain lock, so a block may have spent an output since
+            selected_utxos = blockChain.get_utxos_by_key(selection.keys)
+            if None in selected_utxos:
+                return 'The selected outputs changed while preparing the transaction, please retry', 409
+            for utxo in selected_utxos:
                 transaction.add_input(utxo)
-                remaining_amount -= utxo.amount
-            
+
             # Add outputs to the transaction
             for output in outputs:
                 transaction.add_output(UTXO(
@@ -131,11 +184,10 @@ def create_app(port):
                     owner_address="miner_fee"  # This will be replaced by the actual miner's address when the block is mined
                 ))
             
-            # Add change output if there's remaining amount
-            if remaining_amount < 0:  # If we used more than needed
-                change_amount = abs(remaining_amount)
+            # Add change output if we used more than needed (an exact match needs none)
+            if selection.change > 0:
                 transaction.add_output(UTXO(
-                    amount=change_amount,
+                    amount=selection.change,
                     owner_address=json['sender_address']  # Send change back to sender
                 ))
             
@@ -145,7 +197,10 @@ def create_app(port):
             # Update transaction metadata
             transaction.fee = fee  # Set the fee
             transaction.update_size()
-            logger.info(f"Transaction : {transaction}")
+            if transaction.size > blockChain.BLOCK_SIZE_LIMIT:
+                return (f'Transaction would need {len(transaction.inputs)} inputs and {transaction.size} bytes, '
+                        f'more than a block holds ({blockChain.BLOCK_SIZE_LIMIT} bytes)'), 400
+            logger.debug("Prepared transaction %s spending %s input(s)", transaction.tx_id, len(transaction.inputs))
 
             response = {
                 'transaction_id': transaction.tx_id,
@@ -169,46 +224,51 @@ def create_app(port):
             return jsonify(response), 200
 
         except Exception as e:
-            logger.error(f"Error preparing transaction: {str(e)}", exc_info=True)
+            logger.error("Error preparing transaction: %s", e, exc_info=True)
             return f'Error preparing transaction: {str(e)}', 400
 
+    def build_transaction(data):
+        """Create a transaction from signed request data, raising ValueError if an input UTXO is unknown"""
+        transaction = Transaction()
+        transaction.signature = bytes.fromhex(data['signature'])
+        transaction.sender_public_key_hex = data['public_key']  # Add public key to transaction
+
+        # Add inputs
+        for input_data in data['inputs']:
+            utxo = blockChain.get_utxo(input_data['tx_id'], input_data['output_index'])
+            if not utxo:
+                raise ValueError(f'Input UTXO not found: {input_data["tx_id"]}:{input_data["output_index"]}')
+            transaction.add_input(utxo)
+
+        # Add outputs
+        for output_data in data['outputs']:
+            transaction.add_output(UTXO(
+                amount=output_data['amount'],
+                owner_address=output_data['address']
+            ))
+
+        # Update transaction metadata
+        transaction.update_fee()
+        transaction.update_size()
+        return transaction
+
     @app.route('/transaction/add', methods=['POST'])
     def add_transaction():
         json = request.get_json()
-        logger.info(f"Received add_transaction request: {json}")
         required_keys = [ 'signature', 'public_key', 'inputs', 'outputs']
         if not all(key in json for key in required_keys):
             return 'Missing required fields: transaction_id, signature, inputs, and outputs', 400
 
         try:
             # Create transaction from the signed data
-            transaction = Transaction()
-            transaction.signature = bytes.fromhex(json['signature'])
-            transaction.sender_public_key_hex = json['public_key']  # Add public key to transaction
-            
-            # Add inputs
-            for input_data in json['inputs']:
-                logger.info(f"Processing input: {input_data}")
-                utxo = blockChain.get_utxo(input_data['tx_id'], input_data['output_index'])
-                if not utxo:
-                    return f'Input UTXO not found: {input_data["tx_id"]}:{input_data["output_index"]}', 400
-                logger.info(f"Found UTXO: {utxo}")
-                transaction.add_input(utxo)
-            
-            # Add outputs
-            for output_data in json['outputs']:
-                logger.info(f"Processing output: {output_data}")
-                transaction.add_output(UTXO(
-                    amount=output_data['amount'],
-                    owner_address=output_data['address']
-                ))
-            
-            # Update transaction metadata
-            transaction.update_fee()
-            transaction.update_size()
-            
+            try:
+                transaction = build_transaction(json)
+            except ValueError as e:
+                return str(e), 400
+
             # Add to mempool
             if blockChain.add_transaction(transaction):
+                gossip.announce_transactions([transaction.tx_id])
                 response = {
                     'message': 'Transaction added to mempool',
                     'transaction_id': transaction.tx_id
@@ -218,15 +278,58 @@ def create_app(port):
                 return 'Failed to add transaction to mempool', 400
                 
         except Exception as e:
-            logger.error(f"Error processing transaction: {str(e)}", exc_info=True)
+            logger.error("Error processing transaction: %s", e, exc_info=True)
             return f'Error processing transaction: {str(e)}', 400
 
+    @app.route('/transaction/add_batch', methods=['POST'])
+    def add_transaction_batch():
+        json = request.get_json()
+        if not json or not isinstance(json.get('transactions'), list):
+            return 'Missing required field: transactions', 400
+        if len(json['transactions']) > MAX_BATCH_SIZE:
+            return f'A batch holds at most {MAX_BATCH_SIZE} transactions', 400
+        logger.debug("Received add_transaction_batch request with %s transactions", len(json['transactions']))
+
+        # Build every transaction first, then admit the well-formed ones together
+        required_keys = ['signature', 'public_key', 'inputs', 'outputs']
+        results = []
+        transactions = []
+        for data in json['transactions']:
+            result = {'transaction_id': None, 'accepted': False, 'error': None}
+            results.append(result)
+            if not isinstance(data, dict) or not all(key in data for key in required_keys):
+                result['error'] = 'Missing required fields: signature, public_key, inputs, and outputs'
+                continue
+            try:
+                transaction = build_transaction(data)
+            except (ValueError, KeyError, TypeError) as e:
+                result['error'] = str(e)
+                continue
+            result['transaction_id'] = transaction.tx_id
+            transactions.append((result, transaction))
+
+        errors = blockChain.add_transactions([transaction for _, transaction in transactions])
+        for (result, _), error in zip(transactions, errors):
+            result['accepted'] = error is None
+            result['error'] = error
+
+        accepted = sum(1 for result in results if result['accepted'])
+        if accepted:
+            gossip.announce_transactions([result['transaction_id'] for result in results if result['accepted']])
+        response = {
+            'message': f'{accepted} of {len(results)} transactions added to mempool',
+            'accepted': accepted,
+            'rejected': len(results) - accepted,
+            'results': results
+        }
+        return jsonify(response), 200
+
     @app.route('/transaction/get_mempool', methods=['GET'])
     def get_mempool():
         try:
             # Convert each transaction in the mempool to a dictionary format
             mempool_transactions = []
-            for tx in blockChain.mempool:
+            for tx in blockChain.get_mempool_transactions():
                 tx_dict = {
                     'tx_id': tx.tx_id,
                     'timestamp': tx.timestamp,
@@ -259,10 +362,90 @@ def create_app(port):
             return jsonify(response), 200
 
         except Exception as e:
-            logger.error(f"Error retrieving mempool: {str(e)}", exc_info=True)
+            logger.error("Error retrieving mempool: %s", e, exc_info=True)
             return f'Error retrieving mempool: {str(e)}', 500
+
+    @app.route('/transaction/proof/<tx_id>', methods=['GET'])
+    def get_transaction_proof(tx_id):
+        # Hashing the transaction encoding up the branch must give header['merkle_root'],
+        # and the header fields must hash to header['hash'], a block the client follows through /chain/headers
+        proof = blockChain.get_transaction_proof(tx_id)
+        if proof is None:
+            return jsonify({'error': 'Transaction not found in the chain.'}), 404
+        return jsonify(proof), 200
+
+    @app.route('/transaction/id/<tx_id>', methods=['GET'])
+    def get_transaction(tx_id):
+        transaction = blockChain.get_confirmed_transaction(tx_id)
+        if transaction is None:
+            return jsonify({'error': 'Transaction not found in the chain.'}), 404
+        return jsonify(transaction), 200
+
     # Part - 01 Mining a Block (Miners can mine a block and add it to the blockchain)
 
+    def mined_block_response(job):
+        """Response for a finished mining job: the mined block, or why there is none"""
+        if job.status == MiningJob.FOUND:
+            block = job.block
+            return jsonify({
+                'message': 'Congratulations, you just mined a block!',
+                'job_id': job.job_id,
+                'index': block.index,
+                'timestamp': block.timestamp,
+                'proof': block.proof,
+                'previous_hash': block.previous_hash,
+                'mining_reward': blockChain.get_current_mining_reward(),
+                'hash_rate': blockChain.miner.hash_rate
+            }), 200
+        if job.status == MiningJob.CANCELLED:
+            return jsonify({'error': 'Mining job was cancelled.', 'job': job.to_dict()}), 409
+        if job.status == MiningJob.FAILED:
+            return jsonify({'error': f'Mining job failed: {job.error}', 'job': job.to_dict()}), 500
+        return jsonify(job.to_dict()), 202
+
+    def mining_busy_response():
+        running = miner.current
+        return jsonify({
+            'error': 'A mining job is already running.',
+            'job': running.to_dict() if running is not None else None
+        }), 409
+
+    @app.route('/mining/start', methods=['POST'])
+    def start_mining():
+        json = request.get_json()
+        if not json or 'miner_address' not in json:
+            return 'Miner address is required', 400
+
+        # The job waits for transactions if the mempool is empty, and restarts when a longer chain is adopted
+        job = miner.start(json['miner_address'])
+        if job is None:
+            return mining_busy_response()
+        return jsonify(job.to_dict()), 202
+
+    @app.route('/mining/status/<job_id>', methods=['GET'])
+    def mining_status(job_id):
+        job = miner.get(job_id)
+        if job is None:
+            return 'Unknown mining job', 404
+        return jsonify(job.to_dict()), 200
+
+    @app.route('/mining/cancel/<job_id>', methods=['POST'])
+    def cancel_mining(job_id):
+        job = miner.get(job_id)
+        if job is None:
+            return 'Unknown mining job', 404
+        if not miner.cancel(job_id):
+            return jsonify({'error': 'Mining job has already finished.', 'job': job.to_dict()}), 409
+        job.done.wait(MINING_CANCEL_TIMEOUT)
+        return jsonify(job.to_dict()), 200
+
+    @app.route('/mining/result/<job_id>', methods=['GET'])
+    def mining_result(job_id):
+        job = miner.get(job_id)
+        if job is None:
+            return 'Unknown mining job', 404
+        return mined_block_response(job)
+
     @app.route('/block/mine', methods=['POST'])
     def mine_block():
         json = request.get_json()
@@ -277,39 +460,87 @@ def create_app(port):
                 'error': 'No transactions in mempool. Mining empty blocks is not allowed.'
             }), 400
 
-        previous_block = blockChain.get_previous_block().to_dict()
-        previous_proof = previous_block['proof']
-        previous_hash = blockChain.hash(previous_block)
-
-        # Proof of Work where the proof is the nonce. The miners need to consume the computational power to find the proof
-        proof = blockChain.proof_of_work(previous_proof)
-
-        block = blockChain.create_block(proof, previous_hash, miner_address).to_dict()
-
-        response = {
-            'message': 'Congratulations, you just mined a block!',
-            'index': block['index'],
-            'timestamp': block['timestamp'],
-            'proof': block['proof'],
-            'previous_hash': block['previous_hash'],
-            'mining_reward': blockChain.get_current_mining_reward()
-        }
-        return jsonify(response), 200
+        # Kept for clients that expect the block in the response: the job hashes, this handler only waits for it.
+        # The job goes back to waiting if the mempool empties, so the wait is bounded and answers 202 with the job,
+        # which /mining/result and /mining/cancel take over from.
+        job = miner.start(miner_address)
+        if job is None:
+            return mining_busy_response()
+        job.done.wait(MINING_WAIT_TIMEOUT)
+        return mined_block_response(job)
 
     @app.route('/chain/get', methods=['GET'])
     def get_chain():
+        # Optional height range: ?from=<block index>&limit=<number of blocks>, and ?format=binary for peers
+        block_format = request.args.get('format', 'json')
+        if block_format not in ('json', 'binary'):
+            return 'format must be json or binary', 400
+        try:
+            start_index = int(request.args.get('from', 1))
+            limit = request.args.get('limit')
+            limit = int(limit) if limit is not None else None
+        except ValueError:
+            return 'from and limit must be integers', 400
+        if start_index < 1 or (limit is not None and limit < 0):
+            return 'from must be at least 1 and limit must not be negative', 400
+
+        # Length, tip and epoch from one consistent view; the stream stops if a reorganization replaces blocks
+        with blockChain.lock.read():
+            length = len(blockChain.chain)
+            tip_hash = blockChain.get_previous_block().hash
+            epoch = blockChain.chain_epoch
+        start = min(start_index - 1, length)
+        stop = length if limit is None else min(start + limit, length)
+
+        # The tip hash changes whenever the chain does, so it identifies this range of this chain
+        etag = f"{tip_hash}-{start_index}-{limit}-{block_format}"
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+            response.set_etag(etag)
+            return response
+
+        if block_format == 'binary':
+            response = Response(stream_chain_binary(start, stop, epoch), mimetype='application/octet-stream')
+            response.headers['X-Chain-Length'] = str(length)
+        else:
+            fields = {'length': length, 'from': start_index, 'count': stop - start}
+            response = Response(stream_chain('chain', start, stop, epoch, fields), mimetype='application/json')
+        response.set_etag(etag)
+        return response
+    
+    @app.route('/chain/headers', methods=['GET'])
+    def get_headers():
+        # Either ?locator=<index>:<hash>,... to start above the last shared block, or ?from=<block index>
+        try:
+            locator = request.args.get('locator')
+            if locator:
+                entries = [entry.split(':', 1) for entry in locator.split(',')]
+                fork_index = blockChain.find_fork_index([(int(index), block_hash) for index, block_hash in entries])
+            else:
+                fork_index = int(request.args.get('from', 1)) - 1
+            limit = min(int(request.args.get('limit', blockChain.MAX_HEADERS)), blockChain.MAX_HEADERS)
+        except ValueError:
+            return 'locator must be <index>:<hash> pairs, from and limit must be integers', 400
+        if fork_index < 0 or limit < 0:
+            return 'from must be at least 1 and limit must not be negative', 400
+
         response = {
-            'chain': [block.to_dict() for block in blockChain.chain],
-            'length': len(blockChain.chain)
+            'length': len(blockChain.chain),
+            'fork_index': fork_index,
+            'headers': blockChain.get_headers(fork_index, limit)
         }
         return jsonify(response), 200
-    
+
     @app.route('/chain/validate', methods=['GET'])
     def validate_blockChain():
-        is_valid = blockChain.is_chain_valid(blockChain.chain)
+        # Only the blocks added since the last validation are checked, unless ?full=true
+        full = request.args.get('full', 'false').lower() == 'true'
+        with blockChain.lock.read():
+            is_valid = blockChain.is_chain_valid(blockChain.chain, full=full)
         if is_valid:
             response = {
-                'message': 'The blockChain is valid.'
+                'message': 'The blockChain is valid.',
+                'validated_height': blockChain.validated_position + 1
             }
             return jsonify(response), 200
         response = {
@@ -328,9 +559,24 @@ def create_app(port):
             return jsonify(response), 200
             
         except Exception as e:
-            logger.error(f"Error getting wallet balance: {str(e)}", exc_info=True)
+            logger.error("Error getting wallet balance: %s", e, exc_info=True)
             return jsonify({'error': str(e)}), 500
 
+    @app.route('/wallet/history/<address>', methods=['GET'])
+    def get_wallet_history(address):
+        # Newest first; pass the returned next cursor as ?before=<block index>:<position> for the following page
+        try:
+            limit = min(int(request.args.get('limit', HISTORY_PAGE_SIZE)), MAX_HISTORY_PAGE_SIZE)
+            before = request.args.get('before')
+            if before is not None:
+                block_index, position = before.split(':', 1)
+                before = (int(block_index), int(position))
+        except ValueError:
+            return 'limit must be an integer and before a <block index>:<position> cursor', 400
+        if limit < 1:
+            return 'limit must be at least 1', 400
+        return jsonify(blockChain.get_address_history(address, limit, before)), 200
+
     # Part - 02 Connecting to other nodes (New miners can connect to the network)
     @app.route('/node/connect', methods = ['POST'])
     def connect_node():
@@ -344,20 +590,59 @@ def create_app(port):
                     'total_nodes': list(blockChain.nodes)}
         return jsonify(response), 201
 
+    @app.route('/node/cache_stats', methods = ['GET'])
+    def get_cache_stats():
+        response = {
+            'signature_verification': verification_cache_stats()
+        }
+        return jsonify(response), 200
+
+    @app.route('/metrics', methods = ['GET'])
+    def get_metrics():
+        # Prometheus text exposition format: the process-wide method timings plus this node's metrics
+        return Response(REGISTRY.render() + metrics.render(), mimetype='text/plain; version=0.0.4')
+
     @app.route('/node/sync', methods = ['GET'])
     def replace_chain():
         is_chain_replaced = blockChain.replace_chain()
         if is_chain_replaced:
-            response = {
-                'message': 'The nodes had different chains so the chain was replaced by the longest one.',
-                'new_chain': [block.to_dict() for block in blockChain.chain]
-            }
+            gossip.announce_block(blockChain.get_previous_block())
+        with blockChain.lock.read():
+            length = len(blockChain.chain)
+            epoch = blockChain.chain_epoch
+        if is_chain_replaced:
+            fields = {'message': 'The nodes had different chains so the chain was replaced by the longest one.'}
+            chunks = stream_chain('new_chain', 0, length, epoch, fields)
         else:
-            response = {
-                'message': 'All good. The chain is the largest one.',
-                'actual_chain': [block.to_dict() for block in blockChain.chain]
-            }
-        return jsonify(response), 200
+            fields = {'message': 'All good. The chain is the largest one.'}
+            chunks = stream_chain('actual_chain', 0, length, epoch, fields)
+        return Response(chunks, mimetype='application/json'), 200
+
+    # Part - 03 Gossip (Peers push the ids of new transactions and blocks, and fetch the ones they lack)
+
+    @app.route('/gossip/inventory', methods=['POST'])
+    def receive_inventory():
+        json = request.get_json(silent=True)
+        if (not json or json.get('type') not in (Gossip.TRANSACTION, Gossip.BLOCK)
+                or not isinstance(json.get('ids'), list) or not isinstance(json.get('port'), int)):
+            return 'type (tx or block), ids and port are required', 400
+        # The announcer is fetched from at the address it connected from, on the port it serves on.
+        # Only connected peers are fetched from, so a client can't point this node at another host's port.
+        origin = f"{request.remote_addr}:{json['port']}"
+        if origin not in blockChain.nodes:
+            return 'Announcements are only accepted from connected peers', 403
+        requested = gossip.receive_inventory(origin, json['type'], [str(item_id) for item_id in json['ids']])
+        return jsonify({'requested': requested}), 202
+
+    @app.route('/gossip/data', methods=['GET'])
+    def get_gossip_data():
+        kind = request.args.get('type')
+        if kind not in (Gossip.TRANSACTION, Gossip.BLOCK):
+            return 'type must be tx or block', 400
+        ids = [item_id for item_id in request.args.get('ids', '').split(',') if item_id]
+        # Length-prefixed binary records, like /chain/get?format=binary; unknown ids are left out
+        data = b''.join(frame_record(item) for item in gossip.get_items(kind, ids))
+        return Response(data, mimetype='application/octet-stream')
 
     return app
 
@@ -1,18 +1,172 @@
 # 00 Importing Data and Type Modules
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
-# 01 Importing Modules
+# 01 Importing Hashlib and JSON Modules
+import hashlib
+import json
+
+# 02 Importing Modules
 from models.Transaction import Transaction
+from models.Serialization import ENCODING_VERSION, Reader, Writer
+from models.Merkle import hash_leaf, merkle_branch, merkle_root
+
+def hash_block_dict(block_dict: dict) -> str:
+    """Canonical hash of a block in its dictionary form"""
+    return Block.from_dict(block_dict).hash
+
+def write_header(writer: Writer, index: int, timestamp: str, proof: int, previous_hash: str,
+                 merkle_root_hex: str, block_size: int) -> None:
+    """Write the header fields, which are all the block hash covers"""
+    writer.varint(ENCODING_VERSION)
+    writer.varint(index)
+    writer.text(timestamp)
+    writer.varint(proof)
+    writer.text(previous_hash)
+    writer.text(merkle_root_hex)
+    writer.varint(block_size)
+
+def hash_header(header: dict) -> str:
+    """Block hash recomputed from a header as returned by Block.header(), for clients holding only headers"""
+    writer = Writer()
+    write_header(writer, header['index'], header['timestamp'], header['proof'], header['previous_hash'],
+                 header['merkle_root'], header['block_size'])
+    return hashlib.sha256(writer.getvalue()).hexdigest()
 
 class Block:
-    def __init__(self, index: int, proof: int, previous_hash: str, transactions: List[Transaction]):
+    def __init__(self, index: int, proof: int, previous_hash: str, transactions: Optional[List[Transaction]],
+                 timestamp: Optional[str] = None, block_size: Optional[int] = None):
         self.index = index
-        self.timestamp = str(datetime.now())
+        self.timestamp = timestamp if timestamp is not None else str(datetime.now())
         self.proof = proof
         self.previous_hash = previous_hash
-        self.transactions = transactions
-        self.block_size = sum(tx.size for tx in transactions)
+        self._transactions = transactions
+        self._encoded_transactions: Optional[List[bytes]] = None  # Undecoded transactions of a block read from bytes
+        self._encoded: Optional[bytes] = None  # Binary encoding the block was read from
+        self.block_size = block_size if block_size is not None else sum(tx.size for tx in transactions)
+        # Blocks are immutable once built, so the hash and the Merkle tree's leaves are computed once and kept
+        self._hash: Optional[str] = None
+        self._merkle_root: Optional[str] = None
+        self._leaves: Optional[List[bytes]] = None
+
+    @property
+    def hash(self) -> str:
+        """SHA-256 of the header, which commits to the transactions through the Merkle root"""
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.header_bytes()).hexdigest()
+        return self._hash
+
+    @property
+    def merkle_root(self) -> str:
+        """Root of the Merkle tree over the binary encodings of the transactions"""
+        if self._merkle_root is None:
+            self._merkle_root = merkle_root(self.get_leaves()).hex()
+        return self._merkle_root
+
+    def get_leaves(self) -> List[bytes]:
+        """Leaf hashes of the Merkle tree, in transaction order"""
+        if self._leaves is None:
+            self._leaves = [hash_leaf(data) for data in self.get_encoded_transactions()]
+        return self._leaves
+
+    def get_encoded_transactions(self) -> List[bytes]:
+        if self._encoded_transactions is not None:
+            return self._encoded_transactions
+        return [tx.to_bytes() for tx in self.transactions]
+
+    def get_merkle_proof(self, position: int) -> List[dict]:
+        """Sibling hashes proving the transaction at a position is in this block, one per tree level"""
+        return [{'side': side, 'hash': sibling.hex()} for side, sibling in merkle_branch(self.get_leaves(), position)]
+
+    @property
+    def transactions(self) -> List[Transaction]:
+        """Transactions of the block; a block read from bytes decodes them on first access"""
+        if self._transactions is None:
+            self._transactions = [Transaction.from_bytes(encoded) for encoded in self._encoded_transactions]
+            self._encoded_transactions = None
+        return self._transactions
+
+    @classmethod
+    def from_dict(cls, block_dict: dict) -> 'Block':
+        """Rebuild a block received as a dictionary, keeping its original timestamp and size.
+        The Merkle root is recomputed from the transactions, so a mismatched one shows up as a different hash."""
+        return cls(
+            index=block_dict['index'],
+            proof=block_dict['proof'],
+            previous_hash=block_dict['previous_hash'],
+            transactions=[Transaction.from_dict(tx_dict) for tx_dict in block_dict['transactions']],
+            timestamp=block_dict['timestamp'],
+            block_size=block_dict['block_size']
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Block':
+        """Rebuild a block from its binary encoding, leaving its transactions encoded until they are accessed"""
+        reader = Reader(data)
+        reader.version()
+        index = reader.varint()
+        timestamp = reader.text()
+        proof = reader.varint()
+        previous_hash = reader.text()
+        root = reader.text()
+        block_size = reader.varint()
+        header_end = reader.position
+        encoded_transactions = [reader.blob() for _ in range(reader.varint())]
+        if None in encoded_transactions:
+            raise ValueError("Missing transaction in block")
+        if not reader.at_end():
+            raise ValueError("Trailing bytes after block")
+        block = cls(index, proof, previous_hash, None, timestamp=timestamp, block_size=block_size)
+        block._encoded_transactions = encoded_transactions
+        # The hash only covers the header, so the transactions must be checked against its root.
+        # Leaves are hashed from the encoded transactions, without decoding them.
+        if block.merkle_root != root:
+            raise ValueError("Merkle root does not match the block's transactions")
+        # The reader only accepts canonical encodings (transactions are checked when decoded),
+        # so data is exactly what to_bytes() would produce
+        block._encoded = bytes(data)
+        block._hash = hashlib.sha256(block._encoded[:header_end]).hexdigest()
+        return block
+
+    def header_bytes(self) -> bytes:
+        """Canonical binary encoding of the header, which the block hash is taken over"""
+        writer = Writer()
+        write_header(writer, self.index, self.timestamp, self.proof, self.previous_hash, self.merkle_root,
+                     self.block_size)
+        return writer.getvalue()
+
+    def to_bytes(self) -> bytes:
+        """Canonical binary encoding of the block: the header followed by the transactions"""
+        if self._encoded is not None:
+            return self._encoded
+        # Encode the transactions once for both the Merkle leaves and the body
+        encoded_transactions = self.get_encoded_transactions()
+        if self._leaves is None:
+            self._leaves = [hash_leaf(data) for data in encoded_transactions]
+        writer = Writer()
+        writer.buffer += self.header_bytes()
+        # Transactions are length-prefixed so a reader can skip over them without decoding
+        writer.varint(len(encoded_transactions))
+        for encoded in encoded_transactions:
+            writer.blob(encoded)
+        self._encoded = writer.getvalue()
+        return self._encoded
+
+    def header(self) -> dict:
+        """The fields peers and light clients need to follow the chain and check its hashes without the transactions"""
+        return {
+            'index': self.index,
+            'timestamp': self.timestamp,
+            'proof': self.proof,
+            'previous_hash': self.previous_hash,
+            'merkle_root': self.merkle_root,
+            'block_size': self.block_size,
+            'hash': self.hash
+        }
+
+    def to_json(self) -> bytes:
+        """Compact JSON encoding of the block, as served to clients and peers"""
+        return json.dumps(self.to_dict(), separators=(',', ':')).encode()
 
     def to_dict(self):
         """Convert block to dictionary for JSON serialization"""
@@ -21,29 +175,8 @@ class Block:
             'timestamp': self.timestamp,
             'proof': self.proof,
             'previous_hash': self.previous_hash,
-            'transactions': [
-                {
-                    'tx_id': tx.tx_id,
-                    'timestamp': tx.timestamp,
-                    'fee': tx.fee,
-                    'signature': tx.signature.hex() if tx.signature else None,
-                    'public_key': tx.sender_public_key_hex,
-                    'inputs': [
-                        {
-                            'tx_id': utxo.tx_id,
-                            'output_index': utxo.output_index,
-                            'amount': utxo.amount,
-                            'owner_address': utxo.owner_address
-                        } for utxo in tx.inputs
-                    ],
-                    'outputs': [
-                        {
-                            'amount': utxo.amount,
-                            'owner_address': utxo.owner_address
-                        } for utxo in tx.outputs
-                    ]
-                } for tx in self.transactions
-            ],
+            'merkle_root': self.merkle_root,
+            'transactions': [tx.to_dict() for tx in self.transactions],
             'block_size': self.block_size
         }
 
@@ -0,0 +1,293 @@
+# 00 Importing Data and Type Modules
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Union
+
+# 01 Importing Modules
+from models.Block import Block
+from models.TransactionIndex import block_entries
+from models.UTXO import UTXO
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct('>I')  # Length prefix of every block record in the log
+INDEX_ENTRY = struct.Struct('>Q32s')  # Offset of the record in the log and the block hash
+
+def frame_record(payload: bytes) -> bytes:
+    """Length-prefix an encoded block, as records are framed in the log and in binary /chain/get responses"""
+    return RECORD_HEADER.pack(len(payload)) + payload
+
+def split_records(data: bytes) -> List[bytes]:
+    """Split a run of length-prefixed records, raising ValueError if it is truncated"""
+    records = []
+    offset = 0
+    while offset < len(data):
+        if offset + RECORD_HEADER.size > len(data):
+            raise ValueError("Truncated record header")
+        (length,) = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        if start + length > len(data):
+            raise ValueError("Truncated record")
+        records.append(data[start:start + length])
+        offset = start + length
+    return records
+
+def decode_block_records(data: bytes) -> List[Block]:
+    """Decode a run of framed binary blocks, raising ValueError if it is malformed"""
+    return [Block.from_bytes(record) for record in split_records(data)]
+
+class BlockStore:
+    """Append-only block log with an offset index, a log of each block's transaction index entries
+    and periodic UTXO-set snapshots"""
+
+    LOG_FILE = 'blocks.log'
+    INDEX_FILE = 'blocks.idx'
+    TRANSACTIONS_FILE = 'transactions.log'
+    SNAPSHOT_FILE = 'utxo_snapshot.json'
+
+    def __init__(self, data_dir: str):
+        os.makedirs(data_dir, exist_ok=True)
+        self.data_dir = data_dir
+        self.log_path = os.path.join(data_dir, self.LOG_FILE)
+        self.index_path = os.path.join(data_dir, self.INDEX_FILE)
+        self.transactions_path = os.path.join(data_dir, self.TRANSACTIONS_FILE)
+        self.snapshot_path = os.path.join(data_dir, self.SNAPSHOT_FILE)
+        self._log = open(self.log_path, 'a+b')
+        self._index = open(self.index_path, 'a+b')
+        # One JSON line of block_entries per block, so a restart rebuilds the transaction index without reading blocks
+        self._transactions = open(self.transactions_path, 'a+b')
+        self._transaction_offsets: List[int] = []  # Offset of each block's line in the transaction log, by position
+        self._log_map: Optional[mmap.mmap] = None
+        self._index_map: Optional[mmap.mmap] = None
+        self._lock = threading.RLock()  # Concurrent readers share the maps, which are replaced when the files grow
+        self._recover()
+
+    def __len__(self) -> int:
+        return self._count
+
+    # Part - 01 Block Log Functions
+
+    @staticmethod
+    def encode_block(block: Block) -> bytes:
+        """Encode a block for the log in its canonical binary form"""
+        return block.to_bytes()
+
+    @staticmethod
+    def decode_block(payload: bytes) -> Block:
+        """Decode a block record from the log"""
+        return Block.from_bytes(payload)
+
+    def append(self, block: Block) -> None:
+        """Append a block to the log and index it"""
+        payload = self.encode_block(block)
+        with self._lock:
+            offset = self._log_size
+            self._log.write(frame_record(payload))
+            self._log.flush()
+            # The index entry is written last, so a crash never leaves it pointing at a partial record
+            self._index.write(INDEX_ENTRY.pack(offset, bytes.fromhex(block.hash)))
+            self._index.flush()
+            self._log_size += RECORD_HEADER.size + len(payload)
+            self._count += 1
+            self._append_entries(block)
+
+    def truncate(self, length: int) -> None:
+        """Drop every block from position length onwards"""
+        with self._lock:
+            if length >= self._count:
+                return
+            log_size = self._entry(length)[0]
+            self._close_maps()
+            self._log.truncate(log_size)
+            self._index.truncate(length * INDEX_ENTRY.size)
+            self._log_size = log_size
+            self._count = length
+            self._transactions.truncate(self._transaction_offsets[length])
+            del self._transaction_offsets[length:]
+
+    def read_raw(self, position: int) -> bytes:
+        """Read the encoded block at a position from the memory-mapped log"""
+        with self._lock:
+            offset = self._entry(position)[0]
+            log_map = self._map_log(offset + RECORD_HEADER.size)
+            (length,) = RECORD_HEADER.unpack_from(log_map, offset)
+            start = offset + RECORD_HEADER.size
+            log_map = self._map_log(start + length)
+            return log_map[start:start + length]
+
+    def read_block(self, position: int) -> Block:
+        """Read and decode the block at a position"""
+        return self.decode_block(self.read_raw(position))
+
+    def get_hash(self, position: int) -> str:
+        """Hash of the block at a position, read from the index without decoding the block"""
+        with self._lock:
+            return self._entry(position)[1].hex()
+
+    def read_transaction_entries(self) -> Iterator[list]:
+        """block_entries of every stored block in chain order, as JSON lists"""
+        with self._lock:
+            self._transactions.seek(0)
+            lines = self._transactions.read().splitlines()
+        for line in lines:
+            yield json.loads(line)
+
+    # Part - 02 UTXO Snapshot Functions
+
+    def save_snapshot(self, height: int, tip_hash: str, utxos: Iterable[UTXO]) -> None:
+        """Write the UTXO set as of the first height blocks, replacing the previous snapshot atomically"""
+        snapshot = {
+            'height': height,
+            'tip_hash': tip_hash,
+            'utxos': [utxo.to_dict() for utxo in utxos]
+        }
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w') as snapshot_file:
+            json.dump(snapshot, snapshot_file, separators=(',', ':'))
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+    def load_snapshot(self) -> Optional[dict]:
+        """Load the latest snapshot if it still matches the stored chain"""
+        if not os.path.exists(self.snapshot_path):
+            return None
+        with open(self.snapshot_path) as snapshot_file:
+            snapshot = json.load(snapshot_file)
+        height = snapshot['height']
+        if height < 1 or height > self._count or self.get_hash(height - 1) != snapshot['tip_hash']:
+            logger.warning("Ignoring UTXO snapshot at height %s: it no longer matches the stored chain", height)
+            return None
+        return snapshot
+
+    def close(self) -> None:
+        """Close the log and index files"""
+        self._close_maps()
+        self._log.close()
+        self._index.close()
+        self._transactions.close()
+
+    # Part - 03 Internal Functions
+
+    def _recover(self) -> None:
+        """Drop index entries and log bytes left behind by an interrupted append"""
+        self._log_size = os.path.getsize(self.log_path)
+        self._count = os.path.getsize(self.index_path) // INDEX_ENTRY.size
+        while self._count:
+            offset = self._entry(self._count - 1)[0]
+            if offset + RECORD_HEADER.size <= self._log_size:
+                self._log.seek(offset)
+                (length,) = RECORD_HEADER.unpack(self._log.read(RECORD_HEADER.size))
+                end = offset + RECORD_HEADER.size + length
+                if end <= self._log_size:
+                    break
+            self._count -= 1
+        else:
+            end = 0
+        self._close_maps()
+        self._index.truncate(self._count * INDEX_ENTRY.size)
+        self._log.truncate(end)
+        self._log_size = end
+        self._recover_transactions()
+
+    def _recover_transactions(self) -> None:
+        """Keep one complete transaction log line per stored block, writing the lines an interrupted append missed"""
+        self._transactions.seek(0)
+        offset = 0
+        for line in self._transactions.read().splitlines(keepends=True):
+            if len(self._transaction_offsets) == self._count or not line.endswith(b'\n'):
+                break
+            self._transaction_offsets.append(offset)
+            offset += len(line)
+        self._transactions.truncate(offset)
+        for position in range(len(self._transaction_offsets), self._count):
+            self._append_entries(self.read_block(position))
+
+    def _append_entries(self, block: Block) -> None:
+        self._transactions.seek(0, os.SEEK_END)
+        self._transaction_offsets.append(self._transactions.tell())
+        self._transactions.write(json.dumps(block_entries(block), separators=(',', ':')).encode() + b'\n')
+        self._transactions.flush()
+
+    def _entry(self, position: int):
+        if position < 0 or position >= self._count:
+            raise IndexError(f"Block position out of range: {position}")
+        end = (position + 1) * INDEX_ENTRY.size
+        if self._index_map is None or len(self._index_map) < end:
+            if self._index_map is not None:
+                self._index_map.close()
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+        return INDEX_ENTRY.unpack_from(self._index_map, position * INDEX_ENTRY.size)
+
+    def _map_log(self, end: int) -> mmap.mmap:
+        if self._log_map is None or len(self._log_map) < end:
+            if self._log_map is not None:
+                self._log_map.close()
+            self._log_map = mmap.mmap(self._log.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._log_map
+
+    def _close_maps(self) -> None:
+        # Maps must not outlive a truncate, reading past the new end of file would crash
+        for file_map in (self._log_map, self._index_map):
+            if file_map is not None:
+                file_map.close()
+        self._log_map = None
+        self._index_map = None
+
+class StoredChain:
+    """List-like view of the blocks in a BlockStore, decoding blocks when they are accessed"""
+
+    def __init__(self, store: BlockStore, cache_size: int = 256):
+        self.store = store
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[int, Block]' = OrderedDict()  # Recently used decoded blocks by position
+        self._lock = threading.Lock()  # Guards the cache, which readers reorder
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __getitem__(self, position: Union[int, slice]) -> Union[Block, List[Block]]:
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if position < 0 or position >= len(self):
+            raise IndexError("chain index out of range")
+        with self._lock:
+            block = self._cache.get(position)
+            if block is not None:
+                self._cache.move_to_end(position)
+                return block
+        block = self.store.read_block(position)
+        self._remember(position, block)
+        return block
+
+    def __iter__(self) -> Iterator[Block]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def append(self, block: Block) -> None:
+        """Store a new tip block"""
+        self.store.append(block)
+        self._remember(len(self.store) - 1, block)
+
+    def truncate(self, length: int) -> None:
+        """Drop every block from position length onwards"""
+        self.store.truncate(length)
+        with self._lock:
+            for position in [position for position in self._cache if position >= length]:
+                del self._cache[position]
+
+    def _remember(self, position: int, block: Block) -> None:
+        with self._lock:
+            self._cache[position] = block
+            self._cache.move_to_end(position)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -1,7 +1,16 @@
 # Importing Modules
 from models.Transaction import Transaction
-from models.Block import Block
+from models.Block import Block, hash_block_dict, hash_header
 from models.UTXO import UTXO
+from models.UTXOSet import BlockUndo, UTXOSet, outpoint_key
+from models.Mempool import Mempool
+from models.Miner import ProofOfWorkMiner, is_valid_proof
+from models.BlockStore import BlockStore, StoredChain, decode_block_records
+from models.PeerClient import PeerClient
+from models.SignatureVerifier import SignatureVerifier
+from models.Metrics import Counter, instrument
+from models.ReadWriteLock import ReadWriteLock
+from models.TransactionIndex import Location, TransactionIndex
 
 # Importing Cryptography Modules
 from cryptography.hazmat.primitives.asymmetric import ec
@@ -12,39 +21,74 @@ import hashlib
 import base58
 
 # 03 Importing Networking Modules
-import json
 from urllib.parse import urlparse
 import requests
 
 # 04 Importing Data and Type Modules
 import datetime
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
 
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('blockchain.log'),
-        logging.StreamHandler()  # This will also print to console
-    ]
-)
-
 # Create logger
 logger = logging.getLogger(__name__)
 
+# Outcomes counted across every BlockChain in the process
+TRANSACTIONS = Counter('node_transactions_total', 'Transactions offered to the mempool', labels=('result',))
+TRANSACTIONS_ACCEPTED = TRANSACTIONS.labels('accepted')
+TRANSACTIONS_REJECTED = TRANSACTIONS.labels('rejected')
+BLOCKS_CREATED = Counter('node_blocks_created_total', 'Blocks built by this node')
+BLOCKS_CONNECTED = Counter('node_blocks_connected_total', 'Blocks received from peers and connected to the chain')
+REORGS = Counter('node_reorgs_total', 'Chain reorganizations that disconnected blocks', labels=('method',))
+
 class BlockChain:
     BLOCK_SIZE_LIMIT = 1500
+    MEMPOOL_SIZE_LIMIT = 5000000
+    MINING_WORKERS = None  # Processes used by proof_of_work, None for one per CPU core
+    VERIFY_WORKERS = None  # Processes verifying batch signatures, None for one per CPU core
+    CHECKPOINTS: Dict[int, str] = {}  # Map of block index to the hash a valid chain must have there
+    SNAPSHOT_INTERVAL = 100  # Blocks between UTXO-set snapshots when a data directory is used
+    MAX_UNDO_DEPTH = 1000  # Blocks below the tip that keep undo data, deeper reorgs rebuild the UTXO set
+    MAX_HEADERS = 2000  # Headers served per /chain/headers request
+    MAX_BLOCKS_PER_REQUEST = 500  # Blocks requested per /chain/get call while syncing
+    ENCODED_CACHE_SIZE = 1024  # JSON-encoded blocks kept for /chain/get and /node/sync
+    PEER_TIMEOUT = 10  # Seconds to wait for a peer's response
     INITIAL_MINING_REWARD = 50  
     HALVING_INTERVAL = 210000 
 
-    def __init__(self):
+    def __init__(self, data_dir: Optional[str] = None):
         self.chain = []
-        self.mempool: List[Transaction] = []  # Pending transactions
-        self.utxo_set: Dict[str, UTXO] = {}  # Map of UTXO ID to UTXO
+        self.mempool = Mempool(max_size=self.MEMPOOL_SIZE_LIMIT)  # Pending transactions
+        self.utxo_set = UTXOSet()  # Unspent outputs by outpoint, indexed by address
         self.nodes = set()
+        self.peers = PeerClient(timeout=self.PEER_TIMEOUT)  # Pooled, concurrent HTTP access to the nodes
+        self.miner = ProofOfWorkMiner(workers=self.MINING_WORKERS)
+        self.verifier = SignatureVerifier(workers=self.VERIFY_WORKERS)
+        self.validated_position = 0  # Position in self.chain up to which blocks are known to be valid
+        self.validated_hash: Optional[str] = None  # Hash of the block at validated_position
+        self.store: Optional[BlockStore] = None  # On-disk block log, None to keep the chain in memory only
+        self.snapshot_height = 0  # Number of blocks covered by the latest UTXO snapshot
+        # Snapshots are written and fsynced here, in order, so holders of the chain lock never wait on the disk
+        self.snapshot_writer: Optional[ThreadPoolExecutor] = None
+        self.pending_snapshot: Optional[Future] = None
+        self.encoded_blocks: 'OrderedDict[int, bytes]' = OrderedDict()  # Recently served JSON encodings by position
+        self.block_undo: Dict[int, BlockUndo] = {}  # Undo data of the most recent blocks by position
+        self.tx_index = TransactionIndex()  # Confirmed transactions by tx_id and by address
+        # Readers share it, writers (admission, block creation, chain adoption) hold it alone
+        self.lock = ReadWriteLock()
+        self.chain_epoch = 0  # Bumped whenever blocks are removed from the chain, so streamed ranges can tell they went stale
+        self._encoding_lock = threading.Lock()  # Readers fill and reorder encoded_blocks concurrently
+
+        if data_dir is not None:
+            self.store = BlockStore(data_dir)
+            self.snapshot_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='snapshot')
+            self.chain = StoredChain(self.store)
+            if len(self.store):
+                self.load_from_store()
+                return
 
         genesis_utxo = UTXO(
             tx_id="genesis",
@@ -73,43 +117,57 @@ class BlockChain:
 
     # UTXOs
 
-    def get_utxo_id(self, tx_id: str, output_index: int) -> str:
-        """Generate a unique ID for a UTXO"""
-        return f"{tx_id}:{output_index}"
-
     def add_utxo(self, utxo: UTXO) -> None:
         """Add a UTXO to the UTXO set"""
-        utxo_id = self.get_utxo_id(utxo.tx_id, utxo.output_index)
-        self.utxo_set[utxo_id] = utxo
+        self.utxo_set.add(utxo)
 
     def spend_utxo(self, tx_id: str, output_index: int) -> bool:
-        """Mark a UTXO as spent"""
-        utxo_id = self.get_utxo_id(tx_id, output_index)
-        if utxo_id in self.utxo_set:
-            self.utxo_set[utxo_id].spent = True
-            return True
-        return False
+        """Drop a spent UTXO from the live UTXO set"""
+        return self.utxo_set.spend(tx_id, output_index) is not None
+
+    def clear_utxo_set(self) -> None:
+        """Remove every UTXO from the UTXO set and the address index"""
+        self.utxo_set.clear()
 
     def get_utxo(self, tx_id: str, output_index: int) -> Optional[UTXO]:
         """Get a UTXO from the UTXO set"""
-        utxo_id = self.get_utxo_id(tx_id, output_index)
-        return self.utxo_set.get(utxo_id)
+        with self.lock.read():
+            return self.utxo_set.get(tx_id, output_index)
+
+    def get_utxos_for_address(self, address: str) -> List[UTXO]:
+        """Get the unspent UTXOs owned by an address"""
+        with self.lock.read():
+            return self.utxo_set.for_address(address)
 
     def get_balance(self, address: str) -> float:
         """Get the balance of an address"""
-        balance = 0.0
-        for utxo in self.utxo_set.values():
-            if utxo.owner_address == address and not utxo.spent:
-                balance += utxo.amount
-        return balance
+        with self.lock.read():
+            return sum((amount for _, amount in self.utxo_set.amounts_for_address(address)), 0.0)
+
+    def get_spendable_outputs(self, address: str) -> List[Tuple[bytes, float]]:
+        """(outpoint key, amount) of the address's unspent outputs that no pending transaction spends yet"""
+        with self.lock.read():
+            outputs = self.utxo_set.amounts_for_address(address)
+            reserved = {outpoint_key(tx_id, output_index) for tx_id, output_index in self.mempool.spent_outpoints}
+        return [output for output in outputs if output[0] not in reserved]
+
+    def get_utxos_by_key(self, keys: List[bytes]) -> List[Optional[UTXO]]:
+        """Unspent outputs by outpoint key, None for any spent since the key was read"""
+        with self.lock.read():
+            return [self.utxo_set.get_by_key(key) for key in keys]
+
+    def get_mempool_transactions(self) -> List[Transaction]:
+        """Snapshot of the pending transactions, safe to walk while the mempool changes"""
+        with self.lock.read():
+            return self.mempool.copy()
 
     # Transactions
 
     # Users can trade and add their transaction into mempool.
     def verify_transaction_inputs(self, transaction: Transaction):
         for input_utxo in transaction.inputs:
-            # Check if UTXO exists in our UTXO set
-            utxo = self.get_utxo(input_utxo.tx_id, input_utxo.output_index)
+            # Check if UTXO exists in our UTXO set (callers hold the lock)
+            utxo = self.utxo_set.get(input_utxo.tx_id, input_utxo.output_index)
             if not utxo:
                 return False
             # Check if UTXO is spent
@@ -117,35 +175,83 @@ class BlockChain:
                 return False
         return True
     
-    def add_transaction(self, transaction: Transaction) -> bool:
-        if transaction.tx_id == "genesis":
-            self.mempool.append(transaction)
-            return True
-
+    def check_transaction(self, transaction: Transaction, check_signature: bool = True) -> Optional[str]:
+        """Return why a transaction can't enter the mempool, or None if it can"""
         # Check if transaction with same signature already exists in mempool
-        for existing_tx in self.mempool:
-            if existing_tx.signature == transaction.signature:
-                logger.error(f"Transaction with same signature already exists in mempool: {transaction.tx_id}")
-                return False
+        if self.mempool.has_signature(transaction.signature):
+            return "Transaction with same signature already exists in mempool"
+
+        # Check if any input is already spent by a pending transaction
+        if self.mempool.get_conflicts(transaction):
+            return "Transaction inputs are already spent by a pending transaction"
 
         if not self.verify_transaction_inputs(transaction):
-            logger.error(f"Transaction inputs verification failed for transaction: {transaction.tx_id}")
-            return False
+            return "Transaction inputs verification failed"
         if not transaction.verify_total_amount():
-            logger.error(f"Transaction total amount verification failed for transaction: {transaction.tx_id}")
-            return False
+            return "Transaction total amount verification failed"
+        if check_signature and not transaction.verify_signature():
+            return "Transaction signature verification failed"
+        return None
+
+    @instrument('BlockChain.add_transaction')
+    def add_transaction(self, transaction: Transaction) -> bool:
+        if transaction.tx_id == "genesis":
+            self.mempool.add(transaction)
+            return True
+
+        # The signature only depends on the transaction, so it is checked before taking the lock
         if not transaction.verify_signature():
-            logger.error(f"Transaction signature verification failed for transaction: {transaction.tx_id}")
+            error = "Transaction signature verification failed"
+        else:
+            with self.lock.write():
+                error = self.check_transaction(transaction, check_signature=False)
+                if error is None and not self.mempool.add(transaction):
+                    error = "Mempool is full and the transaction fee rate is too low"
+        if error is not None:
+            TRANSACTIONS_REJECTED.inc()
+            logger.error("%s for transaction: %s", error, transaction.tx_id)
             return False
-        self.mempool.append(transaction)
+        TRANSACTIONS_ACCEPTED.inc()
         return True
 
+    @instrument('BlockChain.add_transactions')
+    def add_transactions(self, transactions: List[Transaction]) -> List[Optional[str]]:
+        """Add a batch of transactions in order, verifying their signatures in parallel.
+        Returns None for each accepted transaction and the rejection reason for the others."""
+        # Cheap checks first, so only plausible transactions reach the signature workers
+        with self.lock.read():
+            errors = [self.check_transaction(tx, check_signature=False) for tx in transactions]
+        candidates = [i for i, error in enumerate(errors) if error is None]
+        verified = self.verifier.verify_many([transactions[i] for i in candidates])
+
+        with self.lock.write():
+            for i, signature_ok in zip(candidates, verified):
+                tx = transactions[i]
+                if not signature_ok:
+                    errors[i] = "Transaction signature verification failed"
+                else:
+                    # Earlier transactions of the batch may now conflict with this one
+                    errors[i] = self.check_transaction(tx, check_signature=False)
+                    if errors[i] is None and not self.mempool.add(tx):
+                        errors[i] = "Mempool is full and the transaction fee rate is too low"
+
+        for tx, error in zip(transactions, errors):
+            if error is not None:
+                logger.error("%s for transaction: %s", error, tx.tx_id)
+        rejected = sum(error is not None for error in errors)
+        TRANSACTIONS_REJECTED.inc(rejected)
+        TRANSACTIONS_ACCEPTED.inc(len(errors) - rejected)
+        return errors
+
     # Part - 01 Cryptography Functions
 
     # Encode and hash the block
     def hash(self, block):
-        encoded_block = json.dumps(block, sort_keys=True).encode()
-        return hashlib.sha256(encoded_block).hexdigest()
+        return hash_block_dict(block)
+
+    def get_block_hash(self, block) -> str:
+        """Hash of a block, using the cached value when it's a Block object"""
+        return block.hash if isinstance(block, Block) else self.hash(block)
 
     # Generate a blockchain address from a public key
     def generate_address(self, public_key: bytes) -> str:
@@ -185,51 +291,77 @@ class BlockChain:
 
     # Select transactions for a block
     def select_transactions_for_block(self):
-        # Sort mempool by fee (higher fee first)
-        sorted_mempool = sorted(self.mempool, key=lambda x: x.fee, reverse=True)
-        
         selected_transactions = []
         current_block_size = 0
-        
-        for transaction in sorted_mempool:
+
+        # Walk the mempool by fee rate (higher fee per size first), skipping transactions that don't fit
+        for transaction in self.mempool.by_fee_rate():
             if current_block_size + transaction.size <= self.BLOCK_SIZE_LIMIT:
                 selected_transactions.append(transaction)
                 current_block_size += transaction.size
-            else:
-                break
+                if current_block_size == self.BLOCK_SIZE_LIMIT:
+                    break
 
         return selected_transactions
     
     # Create a block
+    @instrument('BlockChain.create_block')
     def create_block(self, proof, previous_hash, miner_address=None):
-        # Check if this is the genesis block
-        is_genesis = previous_hash == '0'
+        with self.lock.write():
+            # Check if this is the genesis block
+            is_genesis = previous_hash == '0'
 
-        if is_genesis:
-            # Create a copy of mempool transactions to prevent reference issues
-            all_transactions = self.mempool.copy()
-        else:
-            # Create coinbase transaction (mining reward)
-            coinbase_tx = Transaction()
-            current_reward = self.get_current_mining_reward()
+            if is_genesis:
+                # Create a copy of mempool transactions to prevent reference issues
+                all_transactions = self.mempool.copy()
+            else:
+                # Create coinbase transaction (mining reward)
+                coinbase_tx = Transaction()
+                current_reward = self.get_current_mining_reward()
             
-            # Calculate total fees from selected transactions
-            selected_transactions = self.select_transactions_for_block()
-            total_fees = sum(tx.fee for tx in selected_transactions)
+                # Calculate total fees from selected transactions
+                selected_transactions = self.select_transactions_for_block()
+                total_fees = sum(tx.fee for tx in selected_transactions)
             
-            # Add mining reward and fees to coinbase transaction
-            coinbase_tx.add_output(UTXO(
-                amount=current_reward + total_fees,
-                owner_address=miner_address
-            ))
-            coinbase_tx.fee = 0
-            coinbase_tx.update_size()
-
-            # Add coinbase transaction as the first transaction
-            all_transactions = [coinbase_tx] + selected_transactions
-
-        # Process transactions and update UTXO set
-        for tx in all_transactions:
+                # Add mining reward and fees to coinbase transaction
+                coinbase_tx.add_output(UTXO(
+                    amount=current_reward + total_fees,
+                    owner_address=miner_address
+                ))
+                coinbase_tx.fee = 0
+                coinbase_tx.update_size()
+
+                # Add coinbase transaction as the first transaction
+                all_transactions = [coinbase_tx] + selected_transactions
+
+            # Process transactions and update UTXO set
+            undo = self.apply_transactions(all_transactions, is_genesis)
+
+            block = Block(
+                index=len(self.chain) + 1,
+                proof=proof,
+                previous_hash=previous_hash,
+                transactions=all_transactions
+            )
+
+            self.chain.append(block)
+            self.record_undo(len(self.chain) - 1, undo)
+            self.tx_index.add_block(block)
+            BLOCKS_CREATED.inc()
+
+            # Remove transactions from mempool regardless of whether it's genesis or not
+            for tx in all_transactions:
+                self.mempool.remove(tx.tx_id)
+
+            if self.store is not None and len(self.chain) - self.snapshot_height >= self.SNAPSHOT_INTERVAL:
+                self.save_snapshot()
+
+            return block
+
+    # Add the outputs and spend the inputs of confirmed transactions, returning what is needed to undo it
+    def apply_transactions(self, transactions: List[Transaction], is_genesis: bool = False) -> BlockUndo:
+        undo = BlockUndo()
+        for tx in transactions:
             # Add new UTXOs from outputs
             for i, output_utxo in enumerate(tx.outputs):
                 # Skip miner fee outputs as they're included in the coinbase transaction
@@ -237,66 +369,163 @@ class BlockChain:
                     continue
                 output_utxo.tx_id = tx.tx_id
                 output_utxo.output_index = i
-                self.add_utxo(output_utxo)
+                undo.record(tx.tx_id, i, self.utxo_set.add(output_utxo))
 
-            # Spend UTXOs from inputs
-            if not is_genesis and tx != coinbase_tx:
+            # Spend UTXOs from inputs (the coinbase transaction has none)
+            if not is_genesis:
                 for input_utxo in tx.inputs:
-                    self.spend_utxo(input_utxo.tx_id, input_utxo.output_index)
-
-        block = Block(
-            index=len(self.chain) + 1,
-            proof=proof,
-            previous_hash=previous_hash,
-            transactions=all_transactions
-        )
-
-        self.chain.append(block)
-
-        # Remove transactions from mempool regardless of whether it's genesis or not
-        for tx in all_transactions:
-            if tx in self.mempool:  # Only remove if it's in the mempool
-                self.mempool.remove(tx)
-
-        return block
+                    spent = self.utxo_set.spend(input_utxo.tx_id, input_utxo.output_index)
+                    if spent is not None:
+                        undo.record(input_utxo.tx_id, input_utxo.output_index, spent)
+        return undo
+
+    # Keep the undo data of a connected block, forgetting blocks deeper than MAX_UNDO_DEPTH
+    def record_undo(self, position: int, undo: BlockUndo) -> None:
+        self.block_undo[position] = undo
+        self.block_undo.pop(position - self.MAX_UNDO_DEPTH, None)
+
+    # Check that every block from position up to the tip can be disconnected
+    def can_disconnect(self, position: int) -> bool:
+        return all(p in self.block_undo for p in range(position, len(self.chain)))
+
+    # Undo the blocks from position up to the tip, newest first, and return them in chain order
+    def disconnect_blocks(self, position: int) -> List[Block]:
+        disconnected = []
+        for p in range(len(self.chain) - 1, position - 1, -1):
+            self.block_undo.pop(p).revert(self.utxo_set)
+            self.tx_index.remove_block(self.chain[p])
+            disconnected.append(self.chain[p])
+        disconnected.reverse()
+
+        self.chain_epoch += 1
+        if self.store is not None:
+            self.chain.truncate(position)
+        else:
+            del self.chain[position:]
+        self.forget_encoded_blocks(position)
+        return disconnected
+
+    # Drop pending transactions spending outputs that only the disconnected blocks created
+    def drop_orphaned_spends(self, blocks: List[Block]) -> None:
+        for block in blocks:
+            for tx in block.transactions:
+                for output_index in range(len(tx.outputs)):
+                    spender = self.mempool.get_spender(tx.tx_id, output_index)
+                    # The new branch may have confirmed the same transaction, then the output still exists
+                    if spender is not None and not self.verify_transaction_inputs(spender):
+                        self.mempool.remove(spender.tx_id)
+
+    # Return transactions of disconnected blocks to the mempool if they are still valid on the new chain
+    def restore_transactions(self, blocks: List[Block]) -> None:
+        for block in blocks:
+            if block.previous_hash == '0':
+                continue
+            for tx in block.transactions:
+                # Coinbase transactions only exist inside their block; signatures were checked when it connected
+                if tx.inputs and self.check_transaction(tx, check_signature=False) is None:
+                    self.mempool.add(tx)
 
     # Get the previous block
     def get_previous_block(self):
-        return self.chain[-1]
+        with self.lock.read():
+            return self.chain[-1]
+
+    # Get the JSON encoding of the block at a position, reusing it while it is among the recently served ones
+    def get_encoded_block(self, position: int) -> bytes:
+        with self._encoding_lock:
+            encoded = self.encoded_blocks.get(position)
+            if encoded is not None:
+                self.encoded_blocks.move_to_end(position)
+                return encoded
+        # Callers hold the read lock, so the block can't be replaced while it is encoded
+        encoded = self.chain[position].to_json()
+        with self._encoding_lock:
+            self.encoded_blocks[position] = encoded
+            self.encoded_blocks.move_to_end(position)
+            while len(self.encoded_blocks) > self.ENCODED_CACHE_SIZE:
+                self.encoded_blocks.popitem(last=False)
+        return encoded
+
+    # Drop the cached encodings of the blocks from position onwards, which are being replaced
+    def forget_encoded_blocks(self, position: int) -> None:
+        with self._encoding_lock:
+            for cached in [cached for cached in self.encoded_blocks if cached >= position]:
+                del self.encoded_blocks[cached]
+
+    # Get the binary encoding of the block at a position, straight from the log when there is one
+    def get_block_bytes(self, position: int) -> bytes:
+        if self.store is not None:
+            return self.store.read_raw(position)
+        return self.chain[position].to_bytes()
+
+    # Encodings of the blocks at positions start..stop for a streamed response, read one block at a time
+    def iter_encoded_blocks(self, start: int, stop: int, epoch: int, binary: bool = False) -> Iterator[bytes]:
+        """Raise RuntimeError if a reorganization replaced blocks since epoch, rather than mix two branches"""
+        for position in range(start, stop):
+            # The lock is never held while the consumer writes to the client
+            with self.lock.read():
+                if self.chain_epoch != epoch:
+                    raise RuntimeError(f"Chain reorganized while streaming blocks {start + 1} to {stop}")
+                encoded = self.get_block_bytes(position) if binary else self.get_encoded_block(position)
+            yield encoded
 
     # Check if a chain is valid
-    def is_chain_valid(self, chain):
-        # Convert first block to dict if it's a Block object
-        previous_block = chain[0].to_dict() if hasattr(chain[0], 'to_dict') else chain[0]
+    def is_chain_valid(self, chain, full=False):
+        # Our own chain only needs the suffix above the last validated block, unless a full walk is requested
         block_index = 1
+        if not full and chain is self.chain:
+            block_index = self.get_validated_position() + 1
+
+        # Proofs below the highest checkpoint are trusted, as long as the hash links reach that checkpoint
+        last_block = chain[-1]
+        last_index = last_block.index if isinstance(last_block, Block) else last_block['index']
+        trusted_index = max((index for index in self.CHECKPOINTS if index <= last_index), default=0)
+
+        # Blocks may be Block objects (cached hash) or dictionaries received from peers (hashed once each)
+        previous_block = chain[block_index - 1]
+        previous_hash = self.get_block_hash(previous_block)
 
         while block_index < len(chain):
-            # Convert current block to dict if it's a Block object
-            block = chain[block_index].to_dict() if hasattr(chain[block_index], 'to_dict') else chain[block_index]
-            if block['previous_hash'] != self.hash(previous_block):
+            block = chain[block_index]
+            is_block_object = isinstance(block, Block)
+            block_previous_hash = block.previous_hash if is_block_object else block['previous_hash']
+            if block_previous_hash != previous_hash:
                 return False
-            previous_proof = previous_block['proof']
-            proof = block['proof'] # will be caculated by the proof_of_work function
-            hash_operation = hashlib.sha256(str(proof**2 - previous_proof**2).encode()).hexdigest()
-            if hash_operation[:4] != '0000':
+            index = block.index if is_block_object else block['index']
+            previous_hash = self.get_block_hash(block)
+            if index in self.CHECKPOINTS and self.CHECKPOINTS[index] != previous_hash:
                 return False
+            if index > trusted_index:
+                previous_proof = previous_block.proof if isinstance(previous_block, Block) else previous_block['proof']
+                proof = block.proof if is_block_object else block['proof'] # will be caculated by the proof_of_work function
+                if not is_valid_proof(previous_proof, proof):
+                    return False
             previous_block = block
             block_index += 1
+
+        if chain is self.chain:
+            self.mark_validated()
         return True
+
+    def get_validated_position(self) -> int:
+        """Position of the highest block of our chain already validated, 0 if the marker is stale"""
+        position = self.validated_position
+        if position < len(self.chain) and self.chain[position].hash == self.validated_hash:
+            return position
+        return 0
+
+    def mark_validated(self) -> None:
+        """Record our current tip as validated"""
+        self.validated_position = len(self.chain) - 1
+        self.validated_hash = self.chain[-1].hash
     
     # Part - 03 Consensus Protocol Functions
 
-    # Proof of Work
-    def proof_of_work(self,previous_proof):
-        new_proof = 1
-        check_proof = False
-        while not check_proof:
-            hash_operation = hashlib.sha256(str(new_proof**2 - previous_proof**2).encode()).hexdigest()
-            if hash_operation[:4] == '0000':
-                check_proof = True
-            else:
-                new_proof += 1
-        return new_proof
+    # Proof of Work, searched in parallel by the miner's worker processes
+    @instrument('BlockChain.proof_of_work')
+    def proof_of_work(self, previous_proof) -> Optional[int]:
+        """Find a proof for the next block, or return None if mining was cancelled"""
+        return self.miner.mine(previous_proof)
     
     # Part - 04 Distributed P2P Network Functions
     
@@ -306,126 +535,407 @@ class BlockChain:
         self.nodes.add(parsed_url.netloc)
         return len(self.nodes)
 
-    # Sync UTXO set with a given chain and mempool
+    # Rebuild the UTXO set from the confirmed transactions of a given chain
+    @instrument('BlockChain.sync_utxo_set')
     def sync_utxo_set(self, chain: List[Block]) -> None:
-        """Sync UTXO set with a given chain and mempool"""
-        # Clear current UTXO set
-        self.utxo_set.clear()
-        
-        # First process all transactions in the chain
+        """Rebuild the UTXO set from a given chain, leaving pending transactions out of it"""
+        self.clear_utxo_set()
         for block in chain:
-            # Convert block to dict if it's a Block object
-            block_dict = block.to_dict() if hasattr(block, 'to_dict') else block
-            for tx in block_dict['transactions']:
-                # Add output UTXOs
-                for i, output in enumerate(tx['outputs']):
-                    utxo = UTXO(
-                        tx_id=tx['tx_id'],
-                        output_index=i,
-                        amount=output['amount'],
-                        owner_address=output['owner_address']
-                    )
-                    self.add_utxo(utxo)
-
-                # Mark input UTXOs as spent
-                for input_utxo in tx['inputs']:
-                    self.spend_utxo(input_utxo['tx_id'], input_utxo['output_index'])
-                
-        # Then process all transactions in the mempool
-        for tx in self.mempool:
-            # Add output UTXOs
-            for i, output_utxo in enumerate(tx.outputs):
-                output_utxo.tx_id = tx.tx_id
-                output_utxo.output_index = i
-                self.add_utxo(output_utxo)
-
-            # Mark input UTXOs as spent
-            for input_utxo in tx.inputs:
-                self.spend_utxo(input_utxo.tx_id, input_utxo.output_index)
+            self.apply_transactions(block.transactions, is_genesis=block.previous_hash == '0')
 
     # Sync mempool with a given chain
     def sync_mempool(self, chain: List[Block]) -> None:
         """Sync mempool with a given chain"""
-        # Remove transactions that are already in the chain
-        confirmed_tx_ids = {tx.tx_id for block in chain for tx in block.transactions}
-        self.mempool = [tx for tx in self.mempool if tx.tx_id not in confirmed_tx_ids]
-        
-        # Remove transactions with spent inputs
-        valid_transactions = []
+        # Remove transactions that are already in the chain: the index covers the blocks it shares with ours,
+        # so only the blocks above the fork point are read
+        fork_position = self.find_fork_position(chain)
+        confirmed_tx_ids = {tx.tx_id for block in chain[fork_position:] for tx in block.transactions}
         for tx in self.mempool:
-            if self.verify_transaction_inputs(tx):
-                valid_transactions.append(tx)
-        self.mempool = valid_transactions
+            location = self.tx_index.get(tx.tx_id)
+            confirmed = tx.tx_id in confirmed_tx_ids or (location is not None and location[0] <= fork_position)
+            # Remove confirmed transactions and transactions with spent inputs
+            if confirmed or not self.verify_transaction_inputs(tx):
+                self.mempool.remove(tx.tx_id)
 
     def sync_with_chain(self, chain: List[Block]) -> None:
         """Sync both UTXO set and mempool with a given chain"""
-        self.sync_mempool(chain)
+        # Pending transactions are checked against the UTXO set of the new chain
         self.sync_utxo_set(chain)
+        self.sync_mempool(chain)
+
+    # Block locator: hashes of our tip and of blocks at exponentially growing distances below it
+    def get_locator(self) -> List[Tuple[int, str]]:
+        locator = []
+        with self.lock.read():
+            position = len(self.chain) - 1
+            step = 1
+            while position > 0:
+                locator.append((position + 1, self.get_hash_at(position)))
+                if len(locator) >= 10:
+                    step *= 2
+                position -= step
+            locator.append((1, self.get_hash_at(0)))
+        return locator
+
+    # Find the highest block of a peer's locator that we also have
+    def find_fork_index(self, locator: List[Tuple[int, str]]) -> int:
+        """Index of the last block shared with the locator's chain, 0 if none is shared"""
+        with self.lock.read():
+            for index, block_hash in locator:
+                if 1 <= index <= len(self.chain) and self.get_hash_at(index - 1) == block_hash:
+                    return index
+        return 0
+
+    def get_hash_at(self, position: int) -> str:
+        """Hash of the block at a position, without decoding stored blocks"""
+        return self.store.get_hash(position) if self.store is not None else self.chain[position].hash
+
+    def get_headers(self, start_position: int, limit: int) -> List[dict]:
+        """Headers of up to limit blocks starting at a position"""
+        with self.lock.read():
+            stop = min(start_position + limit, len(self.chain))
+            return [self.chain[position].header() for position in range(start_position, stop)]
+
+    # Check that headers link up from our block at fork_index and carry valid proofs
+    def are_headers_valid(self, fork_index: int, headers: List[dict]) -> bool:
+        with self.lock.read():
+            if fork_index > len(self.chain):
+                return False
+            previous = self.chain[fork_index - 1].header() if fork_index else None
+        for header in headers:
+            if previous is None:
+                if header['index'] != 1:
+                    return False
+            elif (header['index'] != previous['index'] + 1 or header['previous_hash'] != previous['hash']
+                    or not is_valid_proof(previous['proof'], header['proof'])):
+                return False
+            if header['index'] in self.CHECKPOINTS and self.CHECKPOINTS[header['index']] != header['hash']:
+                return False
+            # Headers commit to the transactions through their Merkle root, so the claimed hash must be theirs
+            try:
+                if hash_header(header) != header['hash']:
+                    return False
+            except (KeyError, TypeError, ValueError):
+                return False
+            previous = header
+        return True
+
+    # Download the headers a peer has above the fork point with our locator
+    def fetch_headers(self, node: str, locator: List[Tuple[int, str]]) -> Tuple[int, int, List[dict]]:
+        """Return the fork index, the peer's chain length and its headers above the fork"""
+        params = {'locator': ','.join(f'{index}:{block_hash}' for index, block_hash in locator)}
+        data = self.peers.get_json(node, '/chain/headers', params)
+        fork_index, length, headers = data['fork_index'], data['length'], data['headers']
+        while headers and fork_index + len(headers) < length:
+            params = {'from': fork_index + len(headers) + 1}
+            batch = self.peers.get_json(node, '/chain/headers', params)['headers']
+            if not batch:
+                break
+            headers.extend(batch)
+        return fork_index, length, headers
+
+    # Download full blocks from a peer by block index
+    def fetch_blocks(self, node: str, start_index: int, count: int) -> List[Block]:
+        blocks = []
+        while len(blocks) < count:
+            params = {
+                'from': start_index + len(blocks),
+                'limit': min(self.MAX_BLOCKS_PER_REQUEST, count - len(blocks)),
+                'format': 'binary'
+            }
+            batch = decode_block_records(self.peers.get_bytes(node, '/chain/get', params))
+            if not batch:
+                break
+            blocks.extend(batch)
+        return blocks
 
     # Replace the chain with the longest chain from the network
+    @instrument('BlockChain.replace_chain')
     def replace_chain(self):
-        network = self.nodes
-        longest_chain = None
-        max_length = len(self.chain)
-        for node in network:
-            response = requests.get(f'http://{node}/get_chain')
-            if response.status_code == 200:
-                length = response.json()['length']
-                chain = response.json()['chain']
-                if length > max_length and self.is_chain_valid(chain):
-                    max_length = length
-                    longest_chain = chain
-        if longest_chain:
-            # Convert dictionary blocks to Block objects
-            block_objects = []
-            for block_dict in longest_chain:
-                # Convert transactions from dictionaries to Transaction objects
-                transactions = []
-                for tx_dict in block_dict['transactions']:
-                    tx = Transaction()
-                    tx.tx_id = tx_dict['tx_id']
-                    tx.timestamp = tx_dict['timestamp']
-                    tx.fee = tx_dict['fee']
-                    tx.update_size()
-                    tx.signature = bytes.fromhex(tx_dict['signature']) if tx_dict['signature'] else None
-                    tx.sender_public_key_hex = tx_dict['public_key']
-                    
-                    # Convert inputs
-                    for input_dict in tx_dict['inputs']:
-                        utxo = UTXO(
-                            tx_id=input_dict['tx_id'],
-                            output_index=input_dict['output_index'],
-                            amount=input_dict['amount'],
-                            owner_address=input_dict['owner_address']
-                        )
-                        tx.add_input(utxo)
-                    
-                    # Convert outputs
-                    for output_dict in tx_dict['outputs']:
-                        utxo = UTXO(
-                            amount=output_dict['amount'],
-                            owner_address=output_dict['owner_address']
-                        )
-                        tx.add_output(utxo)
-                    
-                    transactions.append(tx)
-
-                block = Block(
-                    index=block_dict['index'],
-                    proof=block_dict['proof'],
-                    previous_hash=block_dict['previous_hash'],
-                    transactions=transactions
-                )
-                block_objects.append(block)
-            
-            # First sync mempool and UTXO set with the new chain
-            self.sync_with_chain(block_objects)
-            # Then update our chain
-            self.chain = block_objects
-            return True
+        # Headers first: ask every peer at once where its chain leaves ours
+        locator = self.get_locator()
+        candidates = []
+        for node, result in self.peers.map(self.nodes, lambda node: self.fetch_headers(node, locator)):
+            if isinstance(result, Exception):
+                logger.error("Error fetching headers from %s: %s", node, result)
+                continue
+            fork_index, length, headers = result
+            if length > len(self.chain) and fork_index + len(headers) == length and self.are_headers_valid(fork_index, headers):
+                candidates.append((length, node, fork_index))
+
+        # Longest chain first, and the fastest peer among those offering the same length
+        candidates.sort(key=lambda candidate: (-candidate[0], self.peers.latency(candidate[1])))
+        for length, node, fork_index in candidates:
+            new_blocks = self.fetch_valid_blocks(node, fork_index, length)
+            if new_blocks is not None:
+                return self.adopt_blocks(fork_index, new_blocks)
         return False
 
-    # The Part - 05 Mining Functions
+    # Download only the blocks above the fork point and validate them from our fork block
+    def fetch_valid_blocks(self, node: str, fork_index: int, length: int) -> Optional[List[Block]]:
+        try:
+            new_blocks = self.fetch_blocks(node, fork_index + 1, length - fork_index)
+        except (requests.RequestException, ValueError, KeyError) as e:
+            logger.error("Error fetching blocks from %s: %s", node, e)
+            return None
+        with self.lock.read():
+            if fork_index > len(self.chain):
+                return None
+            fork_block = [self.chain[fork_index - 1]] if fork_index else []
+            chain_length = len(self.chain)
+        if fork_index + len(new_blocks) <= chain_length or not self.is_chain_valid(fork_block + new_blocks):
+            logger.error("Blocks received from %s do not extend a valid longer chain", node)
+            return None
+        if not fork_index and new_blocks[0].index != 1:
+            return None
+
+        # Transactions are decoded only now, once the headers proved this chain is worth adopting
+        try:
+            signatures_valid = self.verify_block_signatures(new_blocks)
+        except ValueError as e:
+            logger.error("Blocks received from %s contain malformed transactions: %s", node, e)
+            return None
+        if not signatures_valid:
+            logger.error("Blocks received from %s contain transactions with invalid signatures", node)
+            return None
+        return new_blocks
+
+    # Connect a single block pushed by a peer, when it extends our tip
+    def accept_block(self, block: Block) -> bool:
+        """Validate and connect a block on top of our tip, False if it doesn't extend the tip or is invalid"""
+        with self.lock.read():
+            tip = self.chain[-1]
+            position = len(self.chain)
+        if block.previous_hash != tip.hash or not self.is_chain_valid([tip, block]):
+            return False
+        try:
+            if not self.verify_block_signatures([block]):
+                logger.error("Block %s contains transactions with invalid signatures", block.index)
+                return False
+        except ValueError as e:
+            logger.error("Block %s contains malformed transactions: %s", block.index, e)
+            return False
+        return self.adopt_blocks(position, [block])
+
+    # Find one of our most recent blocks by hash
+    def get_recent_block(self, block_hash: str, depth: int) -> Optional[Block]:
+        """The block with block_hash among the depth blocks below our tip, or None"""
+        with self.lock.read():
+            for position in range(len(self.chain) - 1, max(len(self.chain) - depth, 0) - 1, -1):
+                if self.get_hash_at(position) == block_hash:
+                    return self.chain[position]
+        return None
+
+    # Prove that a confirmed transaction is in its block, for clients that only keep headers
+    def get_transaction_proof(self, tx_id: str) -> Optional[dict]:
+        """The block header, transaction encoding and Merkle branch for tx_id, None if no block on our chain has it"""
+        with self.lock.read():
+            location = self.tx_index.get(tx_id)
+            if location is None:
+                return None
+            block_index, position = location
+            block = self.chain[block_index - 1]
+            return {
+                'tx_id': tx_id,
+                'transaction': block.transactions[position].to_bytes().hex(),
+                'position': position,
+                'header': block.header(),
+                'proof': block.get_merkle_proof(position),
+                'confirmations': len(self.chain) - block_index + 1
+            }
+
+    # Look up a confirmed transaction through the transaction index
+    def get_confirmed_transaction(self, tx_id: str) -> Optional[dict]:
+        """A confirmed transaction with the block it is in, None if no block on our chain has it"""
+        with self.lock.read():
+            location = self.tx_index.get(tx_id)
+            if location is None:
+                return None
+            return self.describe_location(location)
+
+    # Page through the confirmed transactions of an address, newest first
+    def get_address_history(self, address: str, limit: int, before: Optional[Location] = None) -> dict:
+        """Up to limit transactions of an address below the before location, with the location to continue from"""
+        with self.lock.read():
+            locations = self.tx_index.get_history(address, limit, before)
+            has_more = bool(locations) and bool(self.tx_index.get_history(address, 1, locations[-1]))
+            entries = []
+            for location in locations:
+                entry = self.describe_location(location)
+                tx = self.chain[location[0] - 1].transactions[location[1]]
+                # Net change of the address's balance, negative when it paid more than it received
+                entry['amount'] = (sum(utxo.amount for utxo in tx.outputs if utxo.owner_address == address)
+                                   - sum(utxo.amount for utxo in tx.inputs if utxo.owner_address == address))
+                entries.append(entry)
+            return {
+                'address': address,
+                'total': self.tx_index.count_history(address),
+                'transactions': entries,
+                # Stays valid as new blocks arrive, unlike an offset
+                'next': f'{locations[-1][0]}:{locations[-1][1]}' if has_more else None
+            }
+
+    def describe_location(self, location: Location) -> dict:
+        block_index, position = location
+        block = self.chain[block_index - 1]
+        return {
+            'transaction': block.transactions[position].to_dict(),
+            'block_index': block_index,
+            'block_hash': self.get_hash_at(block_index - 1),
+            'position': position,
+            'confirmations': len(self.chain) - block_index + 1
+        }
+
+    # Verify the signatures of every spending transaction in blocks; ones we admitted before are cache hits
+    def verify_block_signatures(self, blocks: List[Block]) -> bool:
+        transactions = [
+            tx for block in blocks if block.previous_hash != '0'
+            for tx in block.transactions if tx.inputs
+        ]
+        return all(self.verifier.verify_many(transactions))
+
+    # Replace our blocks above fork_index with validated blocks from a peer
+    @instrument('BlockChain.adopt_blocks')
+    def adopt_blocks(self, fork_index: int, new_blocks: List[Block]) -> bool:
+        # A longer chain wins, so stop mining on top of our old tip
+        self.miner.cancel()
+
+        with self.lock.write():
+            # Our chain may have moved on while the blocks were downloaded and validated without the lock
+            fork_changed = fork_index > len(self.chain) or (
+                fork_index and self.get_hash_at(fork_index - 1) != new_blocks[0].previous_hash)
+            if fork_changed or fork_index + len(new_blocks) <= len(self.chain):
+                logger.warning("Chain changed while syncing, not adopting %s block(s) above position %s",
+                               len(new_blocks), fork_index)
+                return False
+
+            if fork_index == len(self.chain):
+                # The peer only extends our chain, so only the new blocks are applied
+                self.connect_blocks(new_blocks)
+            elif self.can_disconnect(fork_index):
+                # Roll our blocks back to the fork with their undo data, then apply the new branch
+                disconnected = self.disconnect_blocks(fork_index)
+                self.connect_blocks(new_blocks)
+                self.drop_orphaned_spends(disconnected)
+                self.restore_transactions(disconnected)
+                if self.store is not None and self.snapshot_height > fork_index:
+                    # The last snapshot was taken on the abandoned branch
+                    self.save_snapshot()
+                REORGS.labels('undo').inc()
+                logger.info("Reorganized %s block(s) above position %s", len(disconnected), fork_index)
+            else:
+                # Deeper than our undo data: sync mempool and UTXO set with the whole new chain
+                block_objects = list(self.chain[:fork_index]) + new_blocks
+                self.sync_with_chain(block_objects)
+                self.set_chain(block_objects)
+                self.block_undo.clear()
+                REORGS.labels('rebuild').inc()
+            # Our chain was validated up to the fork block before, and the new blocks above
+            self.mark_validated()
+        return True
+
+    # Append blocks that extend our tip, updating the UTXO set and mempool for them only
+    def connect_blocks(self, blocks: List[Block]) -> None:
+        for block in blocks:
+            undo = self.apply_transactions(block.transactions, is_genesis=block.previous_hash == '0')
+            self.chain.append(block)
+            self.record_undo(len(self.chain) - 1, undo)
+            self.tx_index.add_block(block)
+            BLOCKS_CONNECTED.inc()
+
+            # Drop pending transactions that were confirmed or now conflict with the block
+            for tx in block.transactions:
+                self.mempool.remove(tx.tx_id)
+                for input_utxo in tx.inputs:
+                    spender = self.mempool.get_spender(input_utxo.tx_id, input_utxo.output_index)
+                    if spender is not None:
+                        self.mempool.remove(spender.tx_id)
+
+        if self.store is not None and len(self.chain) - self.snapshot_height >= self.SNAPSHOT_INTERVAL:
+            self.save_snapshot()
+
+    # Part - 05 Storage Functions
+
+    def set_chain(self, blocks: List[Block]) -> None:
+        """Make blocks our chain, rewriting only the blocks above the fork point"""
+        fork_position = self.find_fork_position(blocks)
+        self.chain_epoch += 1
+        self.forget_encoded_blocks(fork_position)
+        for position in range(len(self.chain) - 1, fork_position - 1, -1):
+            self.tx_index.remove_block(self.chain[position])
+        for block in blocks[fork_position:]:
+            self.tx_index.add_block(block)
+        if self.store is None:
+            self.chain = blocks
+            return
+
+        self.chain.truncate(fork_position)
+        for block in blocks[fork_position:]:
+            self.chain.append(block)
+        self.save_snapshot()
+
+    def find_fork_position(self, blocks: List[Block]) -> int:
+        """Number of leading blocks that blocks shares with our chain"""
+        get_hash = self.store.get_hash if self.store is not None else lambda position: self.chain[position].hash
+
+        # Matching hashes at a position mean the whole prefix below it matches too
+        low, high = 0, min(len(blocks), len(self.chain))
+        while low < high:
+            middle = (low + high) // 2
+            if get_hash(middle) == blocks[middle].hash:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def save_snapshot(self) -> None:
+        """Snapshot the UTXO set as of our tip: copied under the caller's lock, written on the snapshot thread"""
+        height, tip_hash = len(self.chain), self.chain[-1].hash
+        self.pending_snapshot = self.snapshot_writer.submit(self.write_snapshot, height, tip_hash, self.utxo_set.copy())
+        self.snapshot_height = height
+
+    def write_snapshot(self, height: int, tip_hash: str, utxos: UTXOSet) -> None:
+        try:
+            self.store.save_snapshot(height, tip_hash, utxos)
+        except OSError as e:
+            # The previous snapshot stays in place, a restart replays more blocks
+            logger.error("Writing the UTXO snapshot at height %s failed: %s", height, e)
+
+    def close(self) -> None:
+        """Stop the worker processes, finish writing the pending snapshot and close the store"""
+        self.miner.shutdown()
+        self.verifier.shutdown()
+        if self.store is None:
+            return
+        self.snapshot_writer.shutdown(wait=True)
+        self.store.close()
+
+    def load_from_store(self) -> None:
+        """Rebuild the UTXO set from the latest snapshot plus the blocks stored after it, and the transaction index from the store"""
+        snapshot = self.store.load_snapshot()
+        start = 0
+        if snapshot is not None:
+            for utxo_dict in snapshot['utxos']:
+                self.add_utxo(UTXO.from_dict(utxo_dict))
+            start = snapshot['height']
+
+        # The store logs each block's index entries as it is appended, so no block is read to rebuild the index
+        for position, entries in enumerate(self.store.read_transaction_entries()):
+            self.tx_index.add_entries(position + 1, entries)
+
+        # Replay without filling the chain's block cache, these blocks are rarely read again
+        for position in range(start, len(self.store)):
+            block = self.store.read_block(position)
+            undo = self.apply_transactions(block.transactions, is_genesis=block.previous_hash == '0')
+            self.record_undo(position, undo)
+        self.snapshot_height = start
+        logger.info("Loaded %s blocks from %s, replayed %s after the snapshot",
+                    len(self.store), self.store.data_dir, len(self.store) - start)
+
+        # Stored blocks were validated before they were written
+        self.mark_validated()
+
+    # The Part - 06 Mining Functions
 
 
     
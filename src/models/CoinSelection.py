@@ -0,0 +1,116 @@
+# 00 Importing Data and Type Modules
+from itertools import accumulate
+from operator import itemgetter
+from typing import Hashable, List, Optional, Sequence, Tuple, Union
+
+Amount = Union[int, float]
+# (outpoint key, amount) of a spendable output
+Candidate = Tuple[Hashable, Amount]
+
+# Nodes visited by the exact-match search before it settles for the fallback
+MAX_SEARCH_TRIES = 20000
+# Most inputs of an exact match, far above what fits in a block; bounds the search's recursion
+MAX_EXACT_INPUTS = 100
+
+class Selection:
+    """Outputs chosen to fund a payment, and the change left over"""
+
+    def __init__(self, candidates: List[Candidate], target: Amount, algorithm: str):
+        self.keys = [key for key, _ in candidates]
+        self.total = sum(amount for _, amount in candidates)
+        self.change = self.total - target
+        self.algorithm = algorithm  # 'exact' (no change output needed) or 'largest_first'
+
+def select_coins(candidates: Sequence[Candidate], target: Amount,
+                 max_tries: int = MAX_SEARCH_TRIES) -> Optional[Selection]:
+    """Fund target with as few inputs as possible, avoiding the change output when an exact match is as small.
+    None if the candidates don't cover target."""
+    # Largest first: the k largest outputs hold the most any k outputs can, which the search's bounds rely on
+    ordered = sorted(candidates, key=itemgetter(1), reverse=True)
+    amounts = list(map(itemgetter(1), ordered))
+    prefix = [0, *accumulate(amounts)]  # prefix[i] is the sum of the i largest amounts
+    if target <= 0 or prefix[-1] < target:
+        return None
+
+    fallback = largest_first(ordered, amounts, prefix, target)
+    # A match without change only wins if it needs no more inputs, so it always makes the smaller transaction
+    exact = branch_and_bound(amounts, prefix, target, min(len(fallback), MAX_EXACT_INPUTS), max_tries)
+    if exact is not None:
+        return Selection([ordered[i] for i in exact], target, 'exact')
+    return Selection(fallback, target, 'largest_first')
+
+def largest_first(ordered: List[Candidate], amounts: List[Amount], prefix: List[Amount],
+                  target: Amount) -> List[Candidate]:
+    """Fewest inputs covering target, with the last one the smallest that still covers, to keep the change small"""
+    count = next(k for k in range(1, len(prefix)) if prefix[k] >= target)
+    needed = target - prefix[count - 1]
+    # The last amount at or above needed among those not yet taken
+    last = first_at_most(amounts, needed, count - 1)
+    if last == len(amounts) or amounts[last] < needed:
+        last -= 1
+    return ordered[:count - 1] + [ordered[last]]
+
+def first_at_most(amounts: List[Amount], limit: Amount, start: int) -> int:
+    """First position from start whose amount is at most limit, in amounts sorted descending"""
+    low, high = start, len(amounts)
+    while low < high:
+        middle = (low + high) // 2
+        if amounts[middle] > limit:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def first_below(amounts: List[Amount], limit: Amount, start: int) -> int:
+    """First position from start whose amount is below limit, in amounts sorted descending"""
+    low, high = start, len(amounts)
+    while low < high:
+        middle = (low + high) // 2
+        if amounts[middle] >= limit:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def branch_and_bound(amounts: List[Amount], prefix: List[Amount], target: Amount, max_inputs: int,
+                     max_tries: int) -> Optional[List[int]]:
+    """Positions of a subset summing exactly to target with at most max_inputs members, fewest first found.
+    Depth-first over amounts sorted descending, pruning branches that overshoot or can't reach target."""
+    best: Optional[List[int]] = None
+    chosen: List[int] = []
+    tries = 0
+
+    def search(start: int, total: Amount) -> bool:
+        """Extend chosen from position start, returning False once the tries run out"""
+        nonlocal best, tries
+        slots = (len(best) - 1 if best is not None else max_inputs) - len(chosen)
+        if slots <= 0:
+            return True
+        # Skip the amounts that alone would overshoot
+        i = first_at_most(amounts, target - total, start)
+        while i < len(amounts):
+            tries += 1
+            if tries > max_tries:
+                return False
+            amount = amounts[i]
+            reached = total + amount
+            # The largest amounts from here on fall short even filling every slot: so do all later ones
+            if total + prefix[min(i + slots, len(amounts))] - prefix[i] < target:
+                return True
+            if reached == target:
+                best = chosen + [i]
+                return True
+            chosen.append(i)
+            more = search(i + 1, reached)
+            chosen.pop()
+            if not more:
+                return False
+            slots = (len(best) - 1 if best is not None else max_inputs) - len(chosen)
+            if slots <= 0:
+                return True
+            # Equal amounts are interchangeable, the first of a run already covered every subset with it
+            i = first_below(amounts, amount, i + 1)
+        return True
+
+    search(0, 0)
+    return best
@@ -0,0 +1,168 @@
+# 00 Importing Modules
+from models.Block import Block
+from models.Transaction import Transaction
+from models.BlockStore import split_records
+from models.Metrics import Counter
+
+# 01 Importing Networking and Concurrency Modules
+import requests
+import threading
+from collections import OrderedDict
+
+# 02 Importing Data and Type Modules
+from typing import Hashable, List, Optional
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+GOSSIP_ITEMS = Counter('node_gossip_items_total', 'Transaction and block ids announced, requested and accepted by gossip',
+                       labels=('type', 'event'))
+
+class SeenCache:
+    """Bounded LRU set of inventory items this node already has, has requested or has announced"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Hashable, None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def add(self, key: Hashable) -> bool:
+        """Remember an item, False if it was already known"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return False
+            self._entries[key] = None
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            return True
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+class Gossip:
+    """Inventory-style relay: announce new transaction and block ids to peers, which fetch only the ones they haven't seen"""
+
+    TRANSACTION = 'tx'
+    BLOCK = 'block'
+    SEEN_CACHE_SIZE = 100000
+    MAX_ITEMS = 100  # Ids per announcement, and per data request
+    BLOCK_DEPTH = 100  # Blocks below the tip served by hash to peers that were announced them
+
+    def __init__(self, blockchain, port: int):
+        self.blockchain = blockchain
+        self.port = port  # Sent with announcements, so peers know where to fetch the items
+        self.seen = SeenCache(self.SEEN_CACHE_SIZE)
+        self._syncing = threading.Lock()  # Held while a full sync runs after an out-of-order block
+
+    # Part - 01 Announcing
+
+    def announce_transactions(self, tx_ids: List[str], origin: Optional[str] = None) -> None:
+        """Tell every peer except origin about new transactions, without waiting for them"""
+        self._announce(self.TRANSACTION, tx_ids, origin)
+
+    def announce_block(self, block: Block, origin: Optional[str] = None) -> None:
+        """Tell every peer except origin about a new block, without waiting for them"""
+        self._announce(self.BLOCK, [block.hash], origin)
+
+    def _announce(self, kind: str, ids: List[str], origin: Optional[str]) -> None:
+        for item_id in ids:
+            self.seen.add((kind, item_id))
+        peers = self.blockchain.peers
+        nodes = [node for node in peers.rank(list(self.blockchain.nodes)) if node != origin]
+        for start in range(0, len(ids), self.MAX_ITEMS):
+            payload = {'port': self.port, 'type': kind, 'ids': ids[start:start + self.MAX_ITEMS]}
+            for node in nodes:
+                peers.executor.submit(self._send, node, payload)
+        GOSSIP_ITEMS.labels(kind, 'announced').inc(len(ids))
+
+    def _send(self, node: str, payload: dict) -> None:
+        try:
+            self.blockchain.peers.post_json(node, '/gossip/inventory', payload)
+        except (requests.RequestException, ValueError) as e:
+            logger.debug("Announcing to %s failed: %s", node, e)
+
+    # Part - 02 Receiving
+
+    def receive_inventory(self, origin: str, kind: str, ids: List[str]) -> int:
+        """Fetch the announced items we haven't seen from origin in the background, returning how many"""
+        wanted = [item_id for item_id in ids[:self.MAX_ITEMS]
+                  if self.seen.add((kind, item_id)) and not self._has(kind, item_id)]
+        if wanted:
+            self.blockchain.peers.executor.submit(self._fetch, origin, kind, wanted)
+        return len(wanted)
+
+    def get_items(self, kind: str, ids: List[str]) -> List[bytes]:
+        """Binary encodings of the requested items we still have: pending transactions or recent blocks"""
+        items = [self._get(kind, item_id) for item_id in ids[:self.MAX_ITEMS]]
+        return [item.to_bytes() for item in items if item is not None]
+
+    def _get(self, kind: str, item_id: str):
+        if kind == self.TRANSACTION:
+            with self.blockchain.lock.read():
+                return self.blockchain.mempool.get(item_id)
+        return self.blockchain.get_recent_block(item_id, self.BLOCK_DEPTH)
+
+    def _has(self, kind: str, item_id: str) -> bool:
+        # Items we got by other means than gossip, e.g. blocks adopted by a sync, are not in the seen-cache
+        return self._get(kind, item_id) is not None
+
+    def _fetch(self, origin: str, kind: str, ids: List[str]) -> None:
+        GOSSIP_ITEMS.labels(kind, 'requested').inc(len(ids))
+        try:
+            data = self.blockchain.peers.get_bytes(origin, '/gossip/data', {'type': kind, 'ids': ','.join(ids)})
+            records = split_records(data)
+            if kind == self.TRANSACTION:
+                self._accept_transactions(origin, [Transaction.from_bytes(record) for record in records])
+            else:
+                for record in records:
+                    self._accept_block(origin, Block.from_bytes(record))
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Fetching %s %s from %s failed: %s", len(ids), kind, origin, e)
+            # Let another peer's announcement of the same items through
+            for item_id in ids:
+                self.seen.discard((kind, item_id))
+        except Exception:
+            logger.error("Processing %s from %s failed", kind, origin, exc_info=True)
+
+    def _accept_transactions(self, origin: str, transactions: List[Transaction]) -> None:
+        # Inputs arrive with their amounts and owners, which must match our own unspent outputs
+        transactions = [tx for tx in transactions if self._inputs_match(tx)]
+        errors = self.blockchain.add_transactions(transactions)
+        accepted = [tx.tx_id for tx, error in zip(transactions, errors) if error is None]
+        GOSSIP_ITEMS.labels(self.TRANSACTION, 'accepted').inc(len(accepted))
+        if accepted:
+            self.announce_transactions(accepted, origin)
+
+    def _inputs_match(self, transaction: Transaction) -> bool:
+        for input_utxo in transaction.inputs:
+            utxo = self.blockchain.get_utxo(input_utxo.tx_id, input_utxo.output_index)
+            if utxo is None or utxo.amount != input_utxo.amount or utxo.owner_address != input_utxo.owner_address:
+                return False
+        return bool(transaction.inputs)
+
+    def _accept_block(self, origin: str, block: Block) -> None:
+        if self.blockchain.accept_block(block):
+            GOSSIP_ITEMS.labels(self.BLOCK, 'accepted').inc()
+            self.announce_block(block, origin)
+        elif block.index > len(self.blockchain.chain):
+            # Its parent is missing: we are behind or on another branch, so sync headers-first.
+            # On its own thread, as the sync queries peers through the pool this fetch is running on.
+            threading.Thread(target=self.sync, name='gossip-sync', daemon=True).start()
+
+    def sync(self) -> None:
+        """Run one full sync with the peers, skipped if one is already running"""
+        if not self._syncing.acquire(blocking=False):
+            return
+        try:
+            if self.blockchain.replace_chain():
+                self.announce_block(self.blockchain.get_previous_block())
+        finally:
+            self._syncing.release()
@@ -0,0 +1,122 @@
+# 00 Importing Logging Modules
+import logging
+import logging.handlers
+import queue
+
+# 01 Importing System Modules
+import atexit
+import os
+import threading
+
+# 02 Importing Data and Type Modules
+from typing import Dict, Optional, Union
+
+from models.Metrics import Counter
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Next to the nodes' data directories, wherever the node is started from
+LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'datas', 'blockchain.log')
+
+# Records waiting for the writer thread; when it falls this far behind, new records are dropped instead of blocking
+QUEUE_SIZE = 10000
+
+RECORDS_DROPPED = Counter('node_log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread unformatted and never blocks the caller"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, on the logging thread; the listener's handlers format instead.
+        # Log arguments must therefore not change after the call, which holds for the ids and counts we log.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            RECORDS_DROPPED.inc()
+
+class SampleFilter(logging.Filter):
+    """Lets through the first record of each message template and then one in every `every`"""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = every
+        self._counts: Dict[str, int] = {}  # Messages are logged as templates, so this stays small
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Unlocked on purpose: a lost increment under contention only shifts which record is kept
+        count = self._counts.get(record.msg, 0)
+        self._counts[record.msg] = count + 1
+        return count % self.every == 0
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_samplers: Dict[str, SampleFilter] = {}
+_lock = threading.Lock()
+
+def _log_directly() -> None:
+    """In a forked worker process the writer thread doesn't exist, so hand records straight to its handlers"""
+    if _listener is None:
+        return
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, LazyQueueHandler):
+            root.removeHandler(handler)
+    for handler in _listener.handlers:
+        root.addHandler(handler)
+
+# Mining and signature workers are forked and rarely log, writing synchronously there is fine
+os.register_at_fork(after_in_child=_log_directly)
+
+def parse_settings(text: Optional[str]) -> Dict[str, str]:
+    """Parse "name=value,name=value" settings as used by the LOG_LEVELS and LOG_SAMPLE variables"""
+    settings = {}
+    for item in (text or '').split(','):
+        if '=' in item:
+            name, value = item.split('=', 1)
+            settings[name.strip()] = value.strip()
+    return settings
+
+def configure_logging(level: Union[int, str, None] = None, log_file: Optional[str] = LOG_FILE,
+                      levels: Optional[Dict[str, Union[int, str]]] = None,
+                      sample_rates: Optional[Dict[str, int]] = None) -> None:
+    """Route every record through a queue to one background writer thread.
+    Only the first call installs the pipeline; every call applies the given levels and sampling.
+    LOG_LEVEL, LOG_LEVELS ("models.Mempool=WARNING,...") and LOG_SAMPLE ("werkzeug=100,...") set the defaults."""
+    global _listener
+    with _lock:
+        root = logging.getLogger()
+        if _listener is None:
+            formatter = logging.Formatter(LOG_FORMAT)
+            handlers = [logging.StreamHandler()]
+            if log_file is not None:
+                handlers.append(logging.FileHandler(log_file))
+            for handler in handlers:
+                handler.setFormatter(formatter)
+
+            records = queue.Queue(QUEUE_SIZE)
+            _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+            _listener.start()
+            # Write out whatever is still queued when the process exits
+            atexit.register(_listener.stop)
+            root.addHandler(LazyQueueHandler(records))
+            root.setLevel(level or os.environ.get('LOG_LEVEL', logging.INFO))
+
+            levels = {**parse_settings(os.environ.get('LOG_LEVELS')), **(levels or {})}
+            sample_rates = {**parse_settings(os.environ.get('LOG_SAMPLE')), **(sample_rates or {})}
+        elif level is not None:
+            root.setLevel(level)
+
+        # Per-subsystem levels, by logger name (module path, e.g. models.Blockchain)
+        for name, logger_level in (levels or {}).items():
+            logging.getLogger(name).setLevel(logger_level)
+
+        # Keep one in every N records of high-volume loggers, 1 keeps everything
+        for name, every in (sample_rates or {}).items():
+            logger = logging.getLogger(name)
+            sampler = _samplers.pop(name, None)
+            if sampler is not None:
+                logger.removeFilter(sampler)
+            if int(every) > 1:
+                _samplers[name] = SampleFilter(int(every))
+                logger.addFilter(_samplers[name])
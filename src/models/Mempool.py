@@ -0,0 +1,148 @@
+# 00 Importing Modules
+from models.Transaction import Transaction
+
+# 01 Importing Data and Type Modules
+from bisect import bisect_left, insort
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class Mempool:
+    """Pending transactions indexed by tx_id, signature, spent outpoint and fee rate"""
+
+    def __init__(self, max_size: Optional[int] = None):
+        self.transactions: Dict[str, Transaction] = {}  # Map of tx_id to transaction, in arrival order
+        self.signatures: Dict[bytes, str] = {}  # Map of signature to tx_id
+        self.spent_outpoints: Dict[Tuple[str, int], str] = {}  # Map of (tx_id, output_index) to spending tx_id
+        self.max_size = max_size  # Total transaction size the pool may hold, None for unbounded
+        self.total_size = 0
+        self.evicted_count = 0
+        # (-fee_rate, arrival, tx_id) entries kept sorted, best fee rate first
+        self._priority: List[Tuple[float, int, str]] = []
+        self._priority_keys: Dict[str, Tuple[float, int, str]] = {}
+        self._arrival = count()
+
+    # Part - 01 Container Functions
+
+    def __len__(self) -> int:
+        return len(self.transactions)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        return iter(list(self.transactions.values()))
+
+    def __contains__(self, transaction: Transaction) -> bool:
+        return transaction.tx_id in self.transactions
+
+    def copy(self) -> List[Transaction]:
+        """Return the pending transactions as a list, in arrival order"""
+        return list(self.transactions.values())
+
+    # Part - 02 Index Functions
+
+    def get(self, tx_id: str) -> Optional[Transaction]:
+        """Get a pending transaction by its ID"""
+        return self.transactions.get(tx_id)
+
+    def has_signature(self, signature: bytes) -> bool:
+        """Check if a pending transaction already carries this signature"""
+        return signature is not None and signature in self.signatures
+
+    def get_spender(self, tx_id: str, output_index: int) -> Optional[Transaction]:
+        """Get the pending transaction that spends the given outpoint, if any"""
+        spender_id = self.spent_outpoints.get((tx_id, output_index))
+        return self.transactions.get(spender_id) if spender_id else None
+
+    def get_conflicts(self, transaction: Transaction) -> List[Transaction]:
+        """Get the pending transactions that spend any input of the given transaction"""
+        conflicts = {}
+        for input_utxo in transaction.inputs:
+            spender = self.get_spender(input_utxo.tx_id, input_utxo.output_index)
+            if spender is not None and spender.tx_id != transaction.tx_id:
+                conflicts[spender.tx_id] = spender
+        return list(conflicts.values())
+
+    @staticmethod
+    def fee_rate(transaction: Transaction) -> float:
+        """Fee paid per unit of transaction size"""
+        return transaction.fee / max(transaction.size, 1)
+
+    def by_fee_rate(self) -> Iterator[Transaction]:
+        """Iterate pending transactions from the highest to the lowest fee rate (don't mutate while iterating)"""
+        for _, _, tx_id in self._priority:
+            yield self.transactions[tx_id]
+
+    # Part - 03 Mutation Functions
+
+    def add(self, transaction: Transaction) -> bool:
+        """Add a transaction and index it, evicting lower fee rate transactions if the pool is full"""
+        if transaction.tx_id in self.transactions:
+            return False
+        if not self._make_room(transaction):
+            logger.error("Mempool full, transaction fee rate too low: %s", transaction.tx_id)
+            return False
+        self.transactions[transaction.tx_id] = transaction
+        self.total_size += transaction.size
+        key = (-self.fee_rate(transaction), next(self._arrival), transaction.tx_id)
+        insort(self._priority, key)
+        self._priority_keys[transaction.tx_id] = key
+        if transaction.signature is not None:
+            self.signatures[transaction.signature] = transaction.tx_id
+        for input_utxo in transaction.inputs:
+            self.spent_outpoints[(input_utxo.tx_id, input_utxo.output_index)] = transaction.tx_id
+        return True
+
+    def remove(self, tx_id: str) -> Optional[Transaction]:
+        """Remove a transaction and drop its index entries"""
+        transaction = self.transactions.pop(tx_id, None)
+        if transaction is None:
+            return None
+        self.total_size -= transaction.size
+        key = self._priority_keys.pop(tx_id)
+        del self._priority[bisect_left(self._priority, key)]
+        if self.signatures.get(transaction.signature) == tx_id:
+            del self.signatures[transaction.signature]
+        for input_utxo in transaction.inputs:
+            outpoint = (input_utxo.tx_id, input_utxo.output_index)
+            if self.spent_outpoints.get(outpoint) == tx_id:
+                del self.spent_outpoints[outpoint]
+        return transaction
+
+    def clear(self) -> None:
+        """Remove every pending transaction"""
+        self.transactions.clear()
+        self.signatures.clear()
+        self.spent_outpoints.clear()
+        self.total_size = 0
+        self._priority.clear()
+        self._priority_keys.clear()
+
+    def _make_room(self, transaction: Transaction) -> bool:
+        """Evict the lowest fee rate transactions until the new one fits"""
+        if self.max_size is None or self.total_size + transaction.size <= self.max_size:
+            return True
+        if transaction.size > self.max_size:
+            return False
+
+        # Only evict if every transaction pushed out pays a lower fee rate than the newcomer
+        new_rate = self.fee_rate(transaction)
+        freed = 0
+        victims = []
+        for neg_rate, _, tx_id in reversed(self._priority):
+            if self.total_size - freed + transaction.size <= self.max_size:
+                break
+            if -neg_rate >= new_rate:
+                return False
+            victims.append(tx_id)
+            freed += self.transactions[tx_id].size
+        if self.total_size - freed + transaction.size > self.max_size:
+            return False
+
+        for tx_id in victims:
+            self.remove(tx_id)
+            self.evicted_count += 1
+            logger.info("Evicted transaction from full mempool: %s", tx_id)
+        return True
@@ -0,0 +1,63 @@
+# 00 Importing Hashlib Modules
+import hashlib
+
+# 01 Importing Data and Type Modules
+from typing import List, Tuple
+
+# Domain separation, so a leaf can never be passed off as an inner node or the other way round
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+# Side of the sibling at each step of a branch
+LEFT = 'left'
+RIGHT = 'right'
+
+def hash_leaf(data: bytes) -> bytes:
+    """Hash of a leaf, the canonical binary encoding of a transaction"""
+    return hashlib.sha256(LEAF_PREFIX + data).digest()
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+def next_level(level: List[bytes]) -> List[bytes]:
+    # An odd node out is carried up unchanged rather than paired with itself,
+    # so two different transaction lists can't share a root
+    paired = [hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        paired.append(level[-1])
+    return paired
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Root over already hashed leaves, the hash of nothing for an empty list"""
+    if not leaves:
+        return hashlib.sha256(b'').digest()
+    level = leaves
+    while len(level) > 1:
+        level = next_level(level)
+    return level[0]
+
+def merkle_branch(leaves: List[bytes], position: int) -> List[Tuple[str, bytes]]:
+    """Sibling hashes from the leaf at a position up to the root, with the side each sits on"""
+    if position < 0 or position >= len(leaves):
+        raise IndexError(f"Leaf position out of range: {position}")
+    branch = []
+    level = leaves
+    while len(level) > 1:
+        sibling = position ^ 1
+        if sibling < len(level):
+            branch.append((LEFT if sibling < position else RIGHT, level[sibling]))
+        level = next_level(level)
+        position //= 2
+    return branch
+
+def verify_merkle_branch(data: bytes, branch: List[Tuple[str, bytes]], root: bytes) -> bool:
+    """Check that a transaction encoding is a leaf of the tree with this root"""
+    node = hash_leaf(data)
+    for side, sibling in branch:
+        if side == LEFT:
+            node = hash_node(sibling, node)
+        elif side == RIGHT:
+            node = hash_node(node, sibling)
+        else:
+            return False
+    return node == root
@@ -0,0 +1,152 @@
+# 00 Importing Hashlib and Multiprocessing Modules
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# 01 Importing Data and Type Modules
+from typing import Optional, Tuple
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# How many nonces a worker tries between checks of the stop flag
+CHECK_INTERVAL = 4096
+
+def is_valid_proof(previous_proof: int, proof: int) -> bool:
+    """Check a proof against the same rule is_chain_valid applies"""
+    hash_operation = hashlib.sha256(str(proof**2 - previous_proof**2).encode()).hexdigest()
+    return hash_operation[:4] == '0000'
+
+# Search the workers should run, set in each worker process; ranges of any other search stop at the next check
+_current_search = None
+
+def _init_worker(current_search) -> None:
+    global _current_search
+    _current_search = current_search
+
+def _search_range(search: int, previous_proof: int, start: int, end: int) -> Tuple[Optional[int], int]:
+    """Worker task: try the nonces start..end until one is a proof or the search is stopped.
+    Returns the proof (None if there was none or the search stopped) and the number of nonces tried."""
+    sha256 = hashlib.sha256
+    previous_square = previous_proof**2
+    proof = start
+    while proof < end and _current_search.value == search:
+        batch_end = min(proof + CHECK_INTERVAL, end)
+        for nonce in range(proof, batch_end):
+            # Same rule as is_valid_proof: the first four hex digits are the first two bytes
+            if sha256(str(nonce * nonce - previous_square).encode()).digest()[:2] == b'\x00\x00':
+                return nonce, nonce - start + 1
+        proof = batch_end
+    return None, proof - start
+
+class ProofOfWorkMiner:
+    """Splits the nonce search into ranges handed to a persistent pool of worker processes"""
+
+    RANGE_SIZE = 16 * CHECK_INTERVAL  # Nonces per task, enough that the round trip to a worker is negligible
+    RANGES_PER_WORKER = 2  # Ranges queued per worker, so none idles while its next range is handed out
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.last_hashes = 0
+        self.last_elapsed = 0.0
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._current_search = multiprocessing.Value('q', 0)  # Search the workers should run, 0 for none
+        self._searches = 0
+        self._cancelled = False
+
+    @property
+    def hash_rate(self) -> float:
+        """Hashes per second achieved by the last mining run"""
+        if self.last_elapsed <= 0:
+            return 0.0
+        return self.last_hashes / self.last_elapsed
+
+    def begin(self) -> None:
+        """Clear an earlier cancel() before a new search, so only a cancel() from now on stops the next mine()"""
+        with self._lock:
+            self._cancelled = False
+
+    def cancel(self) -> None:
+        """Stop the current mining run, if any, and the next one until begin(); mine() then returns None"""
+        with self._lock:
+            self._cancelled = True
+            self._current_search.value = 0
+
+    def mine(self, previous_proof: int) -> Optional[int]:
+        """Find a proof for previous_proof, or return None if cancelled.
+        Raises RuntimeError if a worker process dies, the next call starts a new pool."""
+        with self._lock:
+            if self._cancelled:
+                return None
+            self._searches += 1
+            search = self._searches
+            self._current_search.value = search
+        executor = self._get_executor()
+
+        started = time.perf_counter()
+        next_start = 1
+        pending = set()
+        proof = None
+        hashes = 0
+        try:
+            while True:
+                # Keep every worker busy until a proof is found or the search is stopped
+                searching = proof is None and self._current_search.value == search
+                while searching and len(pending) < self.workers * self.RANGES_PER_WORKER:
+                    end = next_start + self.RANGE_SIZE
+                    pending.add(executor.submit(_search_range, search, previous_proof, next_start, end))
+                    next_start = end
+                if not pending:
+                    break
+                # The ranges still running stop at their next check, they only report how many nonces they tried
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found, range_hashes = future.result()
+                    hashes += range_hashes
+                    if found is not None and proof is None:
+                        proof = found
+                        with self._lock:
+                            if self._current_search.value == search:
+                                self._current_search.value = 0
+        except BrokenProcessPool as e:
+            # A worker was killed or crashed: the pool can't run ranges any more
+            self._discard_executor()
+            raise RuntimeError("A proof-of-work worker process died") from e
+
+        with self._lock:
+            cancelled = self._cancelled
+        self.last_hashes = hashes
+        self.last_elapsed = time.perf_counter() - started
+        if cancelled:
+            logger.info("Mining cancelled after %s hashes", hashes)
+            return None
+        logger.info("Found proof %s after %s hashes (%.0f H/s)", proof, hashes, self.hash_rate)
+        return proof
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Worker processes are started by the first search and reused by the following ones
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                     initargs=(self._current_search,))
+            return self._executor
+
+    def _discard_executor(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,151 @@
+# 00 Importing Modules
+from models.Block import Block
+
+# 01 Importing Concurrency Modules
+import threading
+import time
+from uuid import uuid4
+
+# 02 Importing Data and Type Modules
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class MiningJob:
+    """One request to mine a block for a miner address, run in the background"""
+
+    WAITING = 'waiting'  # No pending transactions to mine yet
+    RUNNING = 'running'
+    FOUND = 'found'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+
+    def __init__(self, miner_address: str):
+        self.job_id = uuid4().hex
+        self.miner_address = miner_address
+        self.status = self.WAITING
+        self.block: Optional[Block] = None
+        self.error: Optional[str] = None
+        self.restarts = 0  # Times the search started over because the tip changed
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.stop_event = threading.Event()  # Set when the job is cancelled
+        self.done = threading.Event()  # Set once the job has finished, whatever the outcome
+
+    @property
+    def finished(self) -> bool:
+        return self.done.is_set()
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'miner_address': self.miner_address,
+            'status': self.status,
+            'restarts': self.restarts,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+            'block_index': self.block.index if self.block is not None else None,
+            'error': self.error
+        }
+
+class BackgroundMiner:
+    """Runs one mining job at a time on a background thread, so request handlers never hash"""
+
+    def __init__(self, blockchain, poll_interval: float = 0.5, history_size: int = 100,
+                 on_block: Optional[Callable[[Block], None]] = None):
+        self.blockchain = blockchain
+        self.on_block = on_block  # Called with every mined block, e.g. to announce it to peers
+        self.poll_interval = poll_interval  # Seconds between mempool checks while a job waits for transactions
+        self.history_size = history_size  # Finished jobs kept for status and result queries
+        self.jobs: 'OrderedDict[str, MiningJob]' = OrderedDict()
+        self.current: Optional[MiningJob] = None
+        self._lock = threading.Lock()
+
+    # Part - 01 Job Functions
+
+    def start(self, miner_address: str) -> Optional[MiningJob]:
+        """Start a mining job, or return None if one is already running"""
+        with self._lock:
+            if self.current is not None:
+                return None
+            job = MiningJob(miner_address)
+            self.current = job
+            self.jobs[job.job_id] = job
+            self._forget_old_jobs()
+        threading.Thread(target=self._run, args=(job,), name=f'mining-{job.job_id[:8]}', daemon=True).start()
+        return job
+
+    def get(self, job_id: str) -> Optional[MiningJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """Stop a running job at once, False if it is unknown or already finished"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.stop_event.set()
+            if self.current is job:
+                self.blockchain.miner.cancel()
+        return True
+
+    # Part - 02 Internal Functions
+
+    def _run(self, job: MiningJob) -> None:
+        blockchain = self.blockchain
+        try:
+            while not job.stop_event.is_set():
+                # Mining empty blocks is not allowed, so wait for transactions
+                if not blockchain.mempool:
+                    job.status = MiningJob.WAITING
+                    job.stop_event.wait(self.poll_interval)
+                    continue
+
+                job.status = MiningJob.RUNNING
+                # A cancel() from here on, e.g. by a chain adoption, is kept for the search on this tip
+                blockchain.miner.begin()
+                if job.stop_event.is_set():
+                    break
+                tip = blockchain.get_previous_block()
+                # The proof only depends on the tip, the block's transactions are picked from the mempool once it is found
+                proof = blockchain.proof_of_work(tip.proof)
+                if job.stop_event.is_set():
+                    break
+
+                with blockchain.lock.write():
+                    if proof is None or blockchain.get_previous_block().hash != tip.hash:
+                        # A longer chain was adopted while hashing, start over on the new tip
+                        job.restarts += 1
+                        continue
+                    if not blockchain.mempool:
+                        continue
+                    job.block = blockchain.create_block(proof, tip.hash, job.miner_address)
+                logger.info("Mining job %s mined block %s", job.job_id, job.block.index)
+                if self.on_block is not None:
+                    self.on_block(job.block)
+                job.finish(MiningJob.FOUND)
+                return
+            job.finish(MiningJob.CANCELLED)
+        except Exception as e:
+            logger.error("Mining job %s failed: %s", job.job_id, e, exc_info=True)
+            job.finish(MiningJob.FAILED, str(e))
+        finally:
+            with self._lock:
+                if self.current is job:
+                    self.current = None
+
+    def _forget_old_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.history_size, 0)]:
+            del self.jobs[job_id]
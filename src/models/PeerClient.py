@@ -0,0 +1,127 @@
+# 00 Importing Networking Modules
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 01 Importing Concurrency Modules
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 02 Importing Data and Type Modules
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class PeerStats:
+    """Latency and failure history of one peer"""
+
+    def __init__(self):
+        self.latency: Optional[float] = None  # Moving average of response time in seconds
+        self.failures = 0  # Consecutive failed requests
+        self.retry_at = 0.0  # Time before which the peer is skipped after failures
+
+class PeerClient:
+    """Keep-alive HTTP client that queries peer nodes concurrently, with retries and per-peer backoff"""
+
+    LATENCY_SMOOTHING = 0.3  # Weight of the newest sample in the latency moving average
+    MAX_BACKOFF = 300  # Longest time in seconds a failing peer is skipped
+
+    def __init__(self, timeout: float = 10, retries: int = 2, backoff: float = 0.5, max_workers: int = 16):
+        self.timeout = timeout
+        self.backoff = backoff
+        self.session = requests.Session()
+        # Refused connections and overloaded peers are retried, a peer that is merely slow is not
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET'])
+        )
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='peer')
+        self.stats: Dict[str, PeerStats] = {}
+        self._lock = threading.Lock()
+
+    # Part - 01 Request Functions
+
+    def get_json(self, node: str, path: str, params: Optional[dict] = None) -> Any:
+        """GET a JSON document from a peer, recording its latency or failure"""
+        return self._request('get', node, path, lambda response: response.json(), params=params)
+
+    def get_bytes(self, node: str, path: str, params: Optional[dict] = None) -> bytes:
+        """GET a raw response body from a peer, recording its latency or failure"""
+        return self._request('get', node, path, lambda response: response.content, params=params)
+
+    def post_json(self, node: str, path: str, payload: Any) -> Any:
+        """POST a JSON document to a peer and return its JSON answer, recording its latency or failure"""
+        return self._request('post', node, path, lambda response: response.json(), json=payload)
+
+    def _request(self, method: str, node: str, path: str, read: Callable[[requests.Response], Any], **kwargs) -> Any:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f'http://{node}{path}', timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            data = read(response)
+        except (requests.RequestException, ValueError):
+            self._record_failure(node)
+            raise
+        self._record_success(node, time.perf_counter() - started)
+        return data
+
+    def map(self, nodes: Iterable[str], func: Callable[[str], Any]) -> Iterator[Tuple[str, Any]]:
+        """Run func(node) for every available peer concurrently, yielding (node, result or exception) as they finish"""
+        futures = {self.executor.submit(func, node): node for node in self.rank(nodes)}
+        for future in as_completed(futures):
+            node = futures[future]
+            try:
+                yield node, future.result()
+            except Exception as e:
+                yield node, e
+
+    # Part - 02 Peer Ranking Functions
+
+    def rank(self, nodes: Iterable[str]) -> List[str]:
+        """Peers not backing off after failures, fastest first (peers never measured come first)"""
+        now = time.monotonic()
+        with self._lock:
+            available = [node for node in nodes if self._stats(node).retry_at <= now]
+            return sorted(available, key=lambda node: self._stats(node).latency or 0.0)
+
+    def latency(self, node: str) -> float:
+        """Average response time of a peer, infinite if it never answered"""
+        with self._lock:
+            latency = self._stats(node).latency
+        return latency if latency is not None else float('inf')
+
+    def _stats(self, node: str) -> PeerStats:
+        stats = self.stats.get(node)
+        if stats is None:
+            stats = self.stats[node] = PeerStats()
+        return stats
+
+    def _record_success(self, node: str, elapsed: float) -> None:
+        with self._lock:
+            stats = self._stats(node)
+            if stats.latency is None:
+                stats.latency = elapsed
+            else:
+                stats.latency += self.LATENCY_SMOOTHING * (elapsed - stats.latency)
+            stats.failures = 0
+            stats.retry_at = 0.0
+
+    def _record_failure(self, node: str) -> None:
+        with self._lock:
+            stats = self._stats(node)
+            stats.failures += 1
+            delay = min(self.backoff * 2 ** stats.failures, self.MAX_BACKOFF)
+            stats.retry_at = time.monotonic() + delay
+        logger.warning("Peer %s failed %s time(s) in a row, skipping it for %.1fs", node, stats.failures, delay)
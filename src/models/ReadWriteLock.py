@@ -0,0 +1,84 @@
+# 00 Importing Concurrency Modules
+import threading
+from contextlib import contextmanager
+
+# 01 Importing Data and Type Modules
+from typing import Iterator, Optional
+
+class ReadWriteLock:
+    """Many readers or one writer at a time, with waiting writers served before new readers.
+    Both sides are reentrant, and a thread holding the write lock may also read; upgrading a read to a write is not allowed."""
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0  # Threads currently holding the read lock
+        self._writer: Optional[int] = None  # Thread ident of the writer
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()  # Per-thread read depth
+
+    # Part - 01 Read Functions
+
+    def acquire_read(self) -> None:
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0 and self._writer != threading.get_ident():
+            with self._condition:
+                # Waiting writers go first, so a stream of readers can't starve them
+                while self._writer is not None or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+            self._local.counted = True
+        elif depth == 0:
+            # Reading inside our own write lock
+            self._local.counted = False
+        self._local.depth = depth + 1
+
+    def release_read(self) -> None:
+        self._local.depth -= 1
+        if self._local.depth == 0 and self._local.counted:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    # Part - 02 Write Functions
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, 'depth', 0):
+                raise RuntimeError("Cannot take the write lock while holding the read lock")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        with self._condition:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
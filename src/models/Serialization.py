@@ -0,0 +1,180 @@
+# 00 Importing Data and Type Modules
+import re
+import struct
+from functools import lru_cache
+from typing import Optional, Union
+
+# Encoding version written at the start of every encoded Transaction, UTXO and Block
+# 2: block headers carry the Merkle root of the transactions, and the block hash covers only the header
+ENCODING_VERSION = 2
+VERSION_SIZE = 1  # Bytes the version takes as a varint
+
+# Number tags, so amounts keep their int or float type (signed messages format them with str())
+NUMBER_INT = 0
+NUMBER_FLOAT = 1
+
+# Text tags, hex digests are stored as raw bytes at half the size
+TEXT_NONE = 0
+TEXT_UTF8 = 1
+TEXT_HEX = 2
+
+FLOAT = struct.Struct('>d')
+
+# Lowercase hex of whole bytes, the only hex that survives bytes.fromhex(...).hex() unchanged
+HEX_TEXT = re.compile(r'(?:[0-9a-f]{2})+\Z').match
+
+# Distinct text values whose encodings are memoized
+TEXT_CACHE_SIZE = 65536
+
+def encode_varint(value: int) -> bytes:
+    writer = Writer()
+    writer.varint(value)
+    return writer.getvalue()
+
+def pack_text(value: Optional[str]) -> bytes:
+    """Tagged encoding of a text field"""
+    if value is None:
+        return bytes([TEXT_NONE])
+    if HEX_TEXT(value):
+        raw = bytes.fromhex(value)
+        return bytes([TEXT_HEX]) + encode_varint(len(raw) + 1) + raw
+    raw = value.encode()
+    return bytes([TEXT_UTF8]) + encode_varint(len(raw) + 1) + raw
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def encode_text(value: Optional[str]) -> bytes:
+    """pack_text memoized; addresses, keys and IDs recur across transactions"""
+    return pack_text(value)
+
+class Writer:
+    """Builds the canonical binary encoding field by field"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+    def varint(self, value: int) -> None:
+        """Unsigned integer, 7 bits per byte"""
+        if value < 0x80:
+            self.buffer.append(value)
+            return
+        while value > 0x7f:
+            self.buffer.append((value & 0x7f) | 0x80)
+            value >>= 7
+        self.buffer.append(value)
+
+    def integer(self, value: int) -> None:
+        """Signed integer of any size, zigzag encoded"""
+        self.varint(value * 2 if value >= 0 else -value * 2 - 1)
+
+    def number(self, value: Union[int, float]) -> None:
+        if isinstance(value, int):
+            self.buffer.append(NUMBER_INT)
+            self.integer(value)
+        else:
+            self.buffer.append(NUMBER_FLOAT)
+            self.buffer += FLOAT.pack(value)
+
+    def blob(self, value: Optional[bytes]) -> None:
+        """Length-prefixed bytes, None is encoded as length 0 and b'' as length 1"""
+        if value is None:
+            self.varint(0)
+            return
+        self.varint(len(value) + 1)
+        self.buffer += value
+
+    def text(self, value: Optional[str]) -> None:
+        self.buffer += encode_text(value)
+
+class Reader:
+    """Reads fields back in the order a Writer wrote them, rejecting any encoding a Writer would not produce"""
+
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self.position = 0
+
+    def at_end(self) -> bool:
+        return self.position == len(self.data)
+
+    def byte(self) -> int:
+        try:
+            value = self.data[self.position]
+        except IndexError:
+            raise ValueError("Truncated encoding") from None
+        self.position += 1
+        return value
+
+    def varint(self) -> int:
+        byte = self.byte()
+        if byte < 0x80:
+            return byte
+        value = byte & 0x7f
+        shift = 7
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7f) << shift
+            if not byte & 0x80:
+                # A trailing zero group would make a second encoding of the same number
+                if byte == 0:
+                    raise ValueError("Non-canonical varint")
+                return value
+            shift += 7
+
+    def integer(self) -> int:
+        value = self.varint()
+        return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+    def number(self) -> Union[int, float]:
+        tag = self.byte()
+        if tag == NUMBER_INT:
+            return self.integer()
+        if tag == NUMBER_FLOAT:
+            value = FLOAT.unpack(self.take(FLOAT.size))[0]
+            if value != value:
+                raise ValueError("NaN is not a valid number")
+            return value
+        raise ValueError(f"Unknown number tag: {tag}")
+
+    def blob(self) -> Optional[bytes]:
+        length = self.varint()
+        if length == 0:
+            return None
+        return self.take(length - 1)
+
+    def text(self) -> Optional[str]:
+        tag = self.byte()
+        if tag == TEXT_NONE:
+            return None
+        raw = self.blob()
+        if raw is None:
+            raise ValueError(f"Invalid text field with tag {tag}")
+        return decode_text(tag, raw)
+
+    def take(self, length: int) -> bytes:
+        end = self.position + length
+        if end > len(self.data):
+            raise ValueError("Truncated encoding")
+        value = self.data[self.position:end]
+        self.position = end
+        return value
+
+    def version(self) -> int:
+        """Read and check the encoding version"""
+        version = self.varint()
+        if version != ENCODING_VERSION:
+            raise ValueError(f"Unsupported encoding version: {version}")
+        return version
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def decode_text(tag: int, raw: bytes) -> str:
+    """Decode a text field read by Reader.text, memoized like encode_text"""
+    if tag == TEXT_HEX and raw:
+        return raw.hex()
+    if tag == TEXT_UTF8:
+        value = raw.decode()
+        if HEX_TEXT(value):
+            raise ValueError("Non-canonical text: hex must use the hex tag")
+        return value
+    raise ValueError(f"Invalid text field with tag {tag}")
@@ -0,0 +1,69 @@
+# 00 Importing Modules
+from models.Transaction import Transaction, verified_signatures, verify_signature_uncached
+from models.Metrics import METHOD_DURATION, instrument
+
+# 01 Importing Concurrency Modules
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 02 Importing Data and Type Modules
+from typing import List, Optional, Tuple
+
+# The histogram verify_signature_uncached records into, fed here with the timings of the worker processes
+SIGNATURE_DURATION = METHOD_DURATION.labels('verify_signature')
+
+def _verify_timed(public_key_hex: str, signature: bytes, message_hash: bytes) -> Tuple[bool, float]:
+    """Verify one signature in a worker process and return how long it took, as the worker's own metrics are never read"""
+    started = time.perf_counter()
+    signature_ok = verify_signature_uncached.__wrapped__(public_key_hex, signature, message_hash)
+    return signature_ok, time.perf_counter() - started
+
+class SignatureVerifier:
+    """Verifies the signatures of many transactions at once across a pool of worker processes"""
+
+    PARALLEL_THRESHOLD = 16  # Smaller batches are verified in-process, the pool round trip isn't worth it
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @instrument('SignatureVerifier.verify_many')
+    def verify_many(self, transactions: List[Transaction]) -> List[bool]:
+        """Verify every transaction's signature, returning the results in the same order"""
+        payloads = [transaction.signature_payload() for transaction in transactions]
+        results = [payload is not None and payload in verified_signatures for payload in payloads]
+
+        # Only signatures this process hasn't verified before are checked
+        pending = [i for i, payload in enumerate(payloads) if payload is not None and not results[i]]
+        unverified = [payloads[i] for i in pending]
+        if self.workers == 1 or len(unverified) < self.PARALLEL_THRESHOLD:
+            verified = [verify_signature_uncached(*payload) for payload in unverified]
+        else:
+            chunk_size = max(1, len(unverified) // (self.workers * 4))
+            verified = []
+            for signature_ok, duration in self._get_executor().map(_verify_timed, *zip(*unverified), chunksize=chunk_size):
+                SIGNATURE_DURATION.observe(duration)
+                verified.append(signature_ok)
+
+        for i, signature_ok in zip(pending, verified):
+            results[i] = signature_ok
+            if signature_ok:
+                verified_signatures.add(payloads[i])
+        return results
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Worker processes are started on the first large batch and reused afterwards
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def shutdown(self) -> None:
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
@@ -1,5 +1,7 @@
 # 00 Importing Modules
 from models.UTXO import UTXO
+from models.Metrics import instrument
+from models.Serialization import ENCODING_VERSION, VERSION_SIZE, Reader, Writer
 
 # 01 Importing Cryptography Modules
 from cryptography.hazmat.primitives.serialization import load_der_private_key
@@ -12,23 +14,93 @@ from datetime import datetime
 from uuid import uuid4
 
 # 03 Importing Data and Type Modules
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 import logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('blockchain.log'),
-        logging.StreamHandler()  # This will also print to console
-    ]
-)
-
 # Create logger
 logger = logging.getLogger(__name__)
 
+# Sizes of the verification caches
+PUBLIC_KEY_CACHE_SIZE = 4096
+SIGNATURE_CACHE_SIZE = 65536
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def load_public_key(public_key_hex: str) -> ec.EllipticCurvePublicKey:
+    """Reconstruct a public key object from its hex encoding, keeping recently used keys parsed"""
+    return ec.EllipticCurvePublicKey.from_encoded_point(
+        ec.SECP256K1(), bytes.fromhex(public_key_hex)
+    )
+
+class SignatureCache:
+    """Bounded LRU set of (public key hex, signature, message hash) triples that already verified"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, bytes, bytes], None]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, payload: Tuple[str, bytes, bytes]) -> bool:
+        with self._lock:
+            if payload in self._entries:
+                self._entries.move_to_end(payload)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def add(self, payload: Tuple[str, bytes, bytes]) -> None:
+        """Remember a triple that verified"""
+        with self._lock:
+            self._entries[payload] = None
+            self._entries.move_to_end(payload)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'max_size': self.max_size}
+
+# Signatures verified by this process, so a transaction is not verified again when its block arrives
+verified_signatures = SignatureCache(SIGNATURE_CACHE_SIZE)
+
+def verification_cache_stats() -> dict:
+    """Hit and miss counters of the public key and verified signature caches"""
+    key_info = load_public_key.cache_info()
+    return {
+        'public_keys': {'hits': key_info.hits, 'misses': key_info.misses,
+                        'size': key_info.currsize, 'max_size': key_info.maxsize},
+        'signatures': verified_signatures.stats()
+    }
+
+@instrument('verify_signature')
+def verify_signature_uncached(public_key_hex: str, signature: bytes, message_hash: bytes) -> bool:
+    """Verify an ECDSA signature over a message hash; a plain function so worker processes can run it"""
+    try:
+        # Verify the signature
+        load_public_key(public_key_hex).verify(signature, message_hash, ec.ECDSA(hashes.SHA256()))
+        return True
+
+    except Exception as e:
+        logger.error("Signature verification failed with error: %s", e)
+        logger.error("Error type: %s", type(e))
+        return False
+
+def verify_signature_payload(public_key_hex: str, signature: bytes, message_hash: bytes) -> bool:
+    """Verify a signature, skipping the check for triples that already verified"""
+    payload = (public_key_hex, signature, message_hash)
+    if payload in verified_signatures:
+        return True
+    if not verify_signature_uncached(*payload):
+        return False
+    verified_signatures.add(payload)
+    return True
+
 class Transaction:
     def __init__(self):
         self.inputs: List[UTXO] = []
@@ -42,6 +114,119 @@ class Transaction:
         self.sender_public_key_hex = None 
         self.size = 0
     
+    @classmethod
+    def from_dict(cls, tx_dict: dict) -> 'Transaction':
+        """Rebuild a confirmed transaction from its block dictionary form"""
+        tx = cls()
+        tx.tx_id = tx_dict['tx_id']
+        tx.timestamp = tx_dict['timestamp']
+        tx.fee = tx_dict['fee']
+        tx.signature = bytes.fromhex(tx_dict['signature']) if tx_dict['signature'] else None
+        tx.sender_public_key_hex = tx_dict['public_key']
+
+        # Convert inputs, with the transaction's timestamp as the binary decoder gives them
+        for input_dict in tx_dict['inputs']:
+            tx.add_input(UTXO(
+                tx_id=input_dict['tx_id'],
+                output_index=input_dict['output_index'],
+                amount=input_dict['amount'],
+                owner_address=input_dict['owner_address'],
+                timestamp=tx.timestamp
+            ))
+
+        # Convert outputs
+        for i, output_dict in enumerate(tx_dict['outputs']):
+            tx.add_output(UTXO(
+                tx_id=tx.tx_id,
+                output_index=i,
+                amount=output_dict['amount'],
+                owner_address=output_dict['owner_address'],
+                timestamp=tx.timestamp
+            ))
+
+        tx.update_size()
+        return tx
+
+    def to_dict(self) -> dict:
+        """Block dictionary form of the transaction, as read back by from_dict"""
+        return {
+            'tx_id': self.tx_id,
+            'timestamp': self.timestamp,
+            'fee': self.fee,
+            'signature': self.signature.hex() if self.signature else None,
+            'public_key': self.sender_public_key_hex,
+            'inputs': [
+                {
+                    'tx_id': utxo.tx_id,
+                    'output_index': utxo.output_index,
+                    'amount': utxo.amount,
+                    'owner_address': utxo.owner_address
+                } for utxo in self.inputs
+            ],
+            'outputs': [
+                {
+                    'amount': utxo.amount,
+                    'owner_address': utxo.owner_address
+                } for utxo in self.outputs
+            ]
+        }
+
+    def to_bytes(self) -> bytes:
+        """Canonical binary encoding of the transaction, used for its size and inside block hashes"""
+        writer = Writer()
+        writer.varint(ENCODING_VERSION)
+        self.write(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Transaction':
+        """Rebuild a transaction from its binary encoding"""
+        reader = Reader(data)
+        reader.version()
+        tx = cls.read(reader)
+        if not reader.at_end():
+            raise ValueError("Trailing bytes after transaction")
+        return tx
+
+    def write(self, writer: Writer) -> None:
+        """Write the transaction fields, in the same order as the dictionary form"""
+        writer.text(self.tx_id)
+        writer.text(self.timestamp)
+        writer.number(self.fee)
+        writer.blob(self.signature)
+        writer.text(self.sender_public_key_hex)
+        writer.varint(len(self.inputs))
+        for utxo in self.inputs:
+            utxo.write(writer)
+        writer.varint(len(self.outputs))
+        for utxo in self.outputs:
+            utxo.write(writer, include_outpoint=False)
+
+    @classmethod
+    def read(cls, reader: Reader) -> 'Transaction':
+        """Read a transaction written by write()"""
+        # Every attribute is read below, so skip __init__ and the random tx_id and timestamp it would generate
+        tx = cls.__new__(cls)
+        start = reader.position
+        tx.tx_id = reader.text()
+        tx.timestamp = reader.text()
+        tx.fee = reader.number()
+        tx.signature = reader.blob()
+        tx.sender_public_key_hex = reader.text()
+        # Decoded UTXOs take the transaction's timestamp rather than calling datetime.now() each
+        tx.inputs = [UTXO.read(reader, timestamp=tx.timestamp) for _ in range(reader.varint())]
+        if len({(utxo.tx_id, utxo.output_index) for utxo in tx.inputs}) != len(tx.inputs):
+            raise ValueError("Transaction spends the same input twice")
+        tx.outputs = []
+        for i in range(reader.varint()):
+            output = UTXO.read(reader, include_outpoint=False, timestamp=tx.timestamp)
+            output.tx_id = tx.tx_id
+            output.output_index = i
+            tx.outputs.append(output)
+        # Same value as update_size() without encoding the transaction again
+        tx.size = VERSION_SIZE + reader.position - start
+        return tx
+
     # Part - 01 String Representation Functions
 
     def __str__(self) -> str:
@@ -68,13 +253,13 @@ class Transaction:
         """Add an input to the transaction"""
         # Check if UTXO is already spent
         if utxo.spent:
-            logger.error(f"Cannot add spent UTXO: {utxo.tx_id}:{utxo.output_index}")
+            logger.error("Cannot add spent UTXO: %s:%s", utxo.tx_id, utxo.output_index)
             return False
         
         # Check if this UTXO is already in the transaction
         for existing_input in self.inputs:
             if existing_input.tx_id == utxo.tx_id and existing_input.output_index == utxo.output_index:
-                logger.error(f"UTXO already added to transaction: {utxo.tx_id}:{utxo.output_index}")
+                logger.error("UTXO already added to transaction: %s:%s", utxo.tx_id, utxo.output_index)
                 return False
         
         self.inputs.append(utxo)
@@ -90,7 +275,8 @@ class Transaction:
         self.fee = input_sum - output_sum
 
     def update_size(self) -> None:
-        self.size = len(str(self))
+        """Size in bytes of the binary encoding, which BLOCK_SIZE_LIMIT and fee rates are measured in"""
+        self.size = len(self.to_bytes())
 
     def _create_message(self) -> str:
         """Create a consistent message format for signing and verification"""
@@ -124,7 +310,7 @@ class Transaction:
             self.signature = signature
             
         except Exception as e:
-            logger.error(f"Error during signing: {str(e)}")
+            logger.error("Error during signing: %s", e)
             raise
 
     # Part - 03 Transaction Verification Functions
@@ -139,34 +325,23 @@ class Transaction:
         output_sum = sum(output_tx.amount for output_tx in self.outputs)
         if input_sum < output_sum:
             return False
-        # Verify that the fee is correct
-        if self.fee < 0:
+        # Verify that the fee is what the inputs leave over the outputs, the coinbase pays it to the miner
+        if self.fee != input_sum - output_sum:
             return False
         return True
     
+    def signature_payload(self) -> Optional[tuple]:
+        """The (public key hex, signature, message hash) triple to verify, None if unsigned"""
+        if not self.signature or not self.sender_public_key_hex:
+            return None
+        # Create the message to verify using the same format
+        message = self._create_message()
+        message_hash = hashlib.sha256(message.encode()).digest()
+        return self.sender_public_key_hex, self.signature, message_hash
+
     def verify_signature(self) -> bool:
         """Verify the signature using the stored public key"""
-        if not self.signature or not self.sender_public_key_hex:
+        payload = self.signature_payload()
+        if payload is None:
             return False
-
-        try:
-            # Create the message to verify using the same format
-            message = self._create_message()
-            message_hash = hashlib.sha256(message.encode()).digest()
-            
-            # Convert hex string back to bytes
-            public_key_bytes = bytes.fromhex(self.sender_public_key_hex)
-            
-            # Reconstruct the public key object
-            public_key = ec.EllipticCurvePublicKey.from_encoded_point(
-                ec.SECP256K1(), public_key_bytes
-            )
-            
-            # Verify the signature
-            public_key.verify(self.signature, message_hash, ec.ECDSA(hashes.SHA256()))
-            return True
-
-        except Exception as e:
-            logger.error(f"Signature verification failed with error: {str(e)}")
-            logger.error(f"Error type: {type(e)}")
-            return False
\ No newline at end of file
+        return verify_signature_payload(*payload)
\ No newline at end of file
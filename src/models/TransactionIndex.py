@@ -0,0 +1,77 @@
+# 00 Importing Modules
+from models.Block import Block
+
+# 01 Importing Data and Type Modules
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+# Where a confirmed transaction sits: the index of its block and its position among the block's transactions
+Location = Tuple[int, int]
+
+def involved_addresses(tx) -> List[str]:
+    """Addresses a transaction spends from or pays to, each once"""
+    addresses = dict.fromkeys(utxo.owner_address for utxo in tx.inputs)
+    addresses.update(dict.fromkeys(utxo.owner_address for utxo in tx.outputs))
+    return list(addresses)
+
+def block_entries(block: Block) -> List[Tuple[str, List[str]]]:
+    """(tx_id, involved addresses) of each transaction of a block, in block order, as the store logs them"""
+    return [(tx.tx_id, involved_addresses(tx)) for tx in block.transactions]
+
+class TransactionIndex:
+    """Locations of the confirmed transactions by tx_id, and of each address's transactions in chain order"""
+
+    def __init__(self):
+        self._locations: Dict[str, Location] = {}  # Map of tx_id to its location
+        self._history: Dict[str, List[Location]] = {}  # Map of address to the locations of its transactions, oldest first
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    # Part - 01 Lookup Functions
+
+    def get(self, tx_id: str) -> Optional[Location]:
+        """Location of a confirmed transaction, or None if no block on the chain has it"""
+        return self._locations.get(tx_id)
+
+    def count_history(self, address: str) -> int:
+        return len(self._history.get(address, ()))
+
+    def get_history(self, address: str, limit: int, before: Optional[Location] = None) -> List[Location]:
+        """Up to limit locations of an address's transactions, newest first, starting below before if given"""
+        history = self._history.get(address, [])
+        end = len(history) if before is None else bisect_left(history, before)
+        return history[max(end - limit, 0):end][::-1]
+
+    # Part - 02 Mutation Functions
+
+    def add_block(self, block: Block) -> None:
+        """Index the transactions of a block connected at the tip"""
+        self.add_entries(block.index, block_entries(block))
+
+    def add_entries(self, block_index: int, entries: List[Tuple[str, List[str]]]) -> None:
+        """Index a block at the tip from its block_entries, e.g. as read back from the store"""
+        for position, (tx_id, addresses) in enumerate(entries):
+            location = (block_index, position)
+            self._locations[tx_id] = location
+            for address in addresses:
+                self._history.setdefault(address, []).append(location)
+
+    def remove_block(self, block: Block) -> None:
+        """Forget the transactions of a block disconnected from the tip; blocks must be removed newest first"""
+        for position in range(len(block.transactions) - 1, -1, -1):
+            tx = block.transactions[position]
+            location = (block.index, position)
+            if self._locations.get(tx.tx_id) == location:
+                del self._locations[tx.tx_id]
+            for address in involved_addresses(tx):
+                history = self._history.get(address)
+                # The block's entries are the newest in every history it appears in
+                if history and history[-1] == location:
+                    history.pop()
+                    if not history:
+                        del self._history[address]
+
+    def clear(self) -> None:
+        self._locations.clear()
+        self._history.clear()
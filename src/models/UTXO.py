@@ -1,8 +1,14 @@
 from datetime import datetime
 
+from models.Serialization import ENCODING_VERSION, Reader, Writer
+
 class UTXO:
-    def __init__(self,amount: float, owner_address: str, tx_id: str = None, output_index: int = None):
-        self.timestamp: str = str(datetime.now())
+    # No per-instance __dict__, the UTXO set materializes these objects on every lookup
+    __slots__ = ('timestamp', 'amount', 'owner_address', 'tx_id', 'output_index', 'spent')
+
+    def __init__(self,amount: float, owner_address: str, tx_id: str = None, output_index: int = None,
+                 timestamp: str = None):
+        self.timestamp: str = timestamp if timestamp is not None else str(datetime.now())
         self.amount: float = amount
         self.owner_address = owner_address
         self.tx_id = tx_id
@@ -18,3 +24,55 @@ class UTXO:
             'output_index': self.output_index,
             'spent': self.spent
         }
+
+    @classmethod
+    def from_dict(cls, utxo_dict: dict) -> 'UTXO':
+        """Rebuild a UTXO from its dictionary form"""
+        utxo = cls(
+            amount=utxo_dict['amount'],
+            owner_address=utxo_dict['owner_address'],
+            tx_id=utxo_dict['tx_id'],
+            output_index=utxo_dict['output_index']
+        )
+        utxo.timestamp = utxo_dict['timestamp']
+        utxo.spent = utxo_dict['spent']
+        return utxo
+
+    def to_bytes(self) -> bytes:
+        """Compact binary encoding of the UTXO and its outpoint"""
+        writer = Writer()
+        writer.varint(ENCODING_VERSION)
+        self.write(writer)
+        return writer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'UTXO':
+        """Rebuild a UTXO from its binary encoding"""
+        reader = Reader(data)
+        reader.version()
+        utxo = cls.read(reader)
+        if not reader.at_end():
+            raise ValueError("Trailing bytes after UTXO")
+        return utxo
+
+    def write(self, writer: Writer, include_outpoint: bool = True) -> None:
+        """Write the UTXO fields; outputs leave out the outpoint, which their transaction implies"""
+        if include_outpoint:
+            writer.text(self.tx_id)
+            writer.varint(0 if self.output_index is None else self.output_index + 1)
+        writer.number(self.amount)
+        writer.text(self.owner_address)
+
+    @classmethod
+    def read(cls, reader: Reader, include_outpoint: bool = True, timestamp: str = None) -> 'UTXO':
+        """Read UTXO fields in the order write() wrote them (the timestamp isn't encoded, it defaults to now)"""
+        tx_id = output_index = None
+        if include_outpoint:
+            tx_id = reader.text()
+            output_index = reader.varint() - 1
+            if output_index < 0:
+                output_index = None
+        amount = reader.number()
+        owner_address = reader.text()
+        return cls(amount=amount, owner_address=owner_address, tx_id=tx_id, output_index=output_index,
+                   timestamp=timestamp)
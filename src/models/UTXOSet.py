@@ -0,0 +1,136 @@
+# 00 Importing Modules
+from models.UTXO import UTXO
+from models.Serialization import Reader, Writer, encode_varint, pack_text
+
+# 01 Importing Data and Type Modules
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+def outpoint_key(tx_id: str, output_index: int) -> bytes:
+    """Binary key of an outpoint: the encoded tx_id (hex IDs packed to raw bytes) followed by the index"""
+    # Not memoized: every outpoint has its own tx_id, a cache would only hold on to them
+    return pack_text(tx_id) + encode_varint(output_index)
+
+class UTXOSet:
+    """Unspent outputs stored as packed byte records keyed by binary outpoints, with an address index"""
+
+    def __init__(self):
+        self._records: Dict[bytes, bytes] = {}  # Map of outpoint key to packed amount, owner and timestamp
+        # Map of address to the outpoint keys it owns and their amounts, so coin selection reads no records
+        self._addresses: Dict[str, Dict[bytes, Union[int, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, key: bytes) -> bool:
+        return key in self._records
+
+    def __iter__(self) -> Iterator[UTXO]:
+        for key, record in list(self._records.items()):
+            yield self._unpack(key, record)
+
+    # Part - 01 Lookup Functions
+
+    def get(self, tx_id: str, output_index: int) -> Optional[UTXO]:
+        """Get an unspent output, or None if it doesn't exist or was spent"""
+        key = outpoint_key(tx_id, output_index)
+        record = self._records.get(key)
+        return self._unpack(key, record) if record is not None else None
+
+    def for_address(self, address: str) -> List[UTXO]:
+        """Get the unspent outputs owned by an address"""
+        return [self._unpack(key, self._records[key]) for key in self._addresses.get(address, ())]
+
+    def amounts_for_address(self, address: str) -> List[Tuple[bytes, Union[int, float]]]:
+        """(outpoint key, amount) of every unspent output owned by an address, without decoding them"""
+        return list(self._addresses.get(address, {}).items())
+
+    def get_by_key(self, key: bytes) -> Optional[UTXO]:
+        """Get an unspent output by its outpoint key"""
+        record = self._records.get(key)
+        return self._unpack(key, record) if record is not None else None
+
+    # Part - 02 Mutation Functions
+
+    def add(self, utxo: UTXO) -> Optional[UTXO]:
+        """Add an unspent output, returning the output it replaced at the same outpoint, if any"""
+        key = outpoint_key(utxo.tx_id, utxo.output_index)
+        replaced = None
+        record = self._records.get(key)
+        if record is not None:
+            replaced = self._unpack(key, record)
+            self._remove(key)
+        writer = Writer()
+        writer.number(utxo.amount)
+        writer.text(utxo.owner_address)
+        writer.text(utxo.timestamp)
+        self._records[key] = writer.getvalue()
+        self._addresses.setdefault(utxo.owner_address, {})[key] = utxo.amount
+        return replaced
+
+    def spend(self, tx_id: str, output_index: int) -> Optional[UTXO]:
+        """Remove an unspent output, returning it marked as spent, or None if it wasn't unspent"""
+        key = outpoint_key(tx_id, output_index)
+        record = self._records.get(key)
+        if record is None:
+            return None
+        utxo = self._unpack(key, record)
+        self._remove(key)
+        utxo.spent = True
+        return utxo
+
+    def copy(self) -> 'UTXOSet':
+        """A copy that later changes to this set don't affect; the records are immutable bytes, so they are shared"""
+        copy = UTXOSet()
+        copy._records = dict(self._records)
+        copy._addresses = {address: dict(keys) for address, keys in self._addresses.items()}
+        return copy
+
+    def clear(self) -> None:
+        """Remove every unspent output"""
+        self._records.clear()
+        self._addresses.clear()
+
+    def _remove(self, key: bytes) -> None:
+        reader = Reader(self._records.pop(key))
+        reader.number()
+        owner_address = reader.text()
+        keys = self._addresses.get(owner_address)
+        if keys is None:
+            return
+        keys.pop(key, None)
+        if not keys:
+            del self._addresses[owner_address]
+
+    @staticmethod
+    def _unpack(key: bytes, record: bytes) -> UTXO:
+        outpoint = Reader(key)
+        tx_id = outpoint.text()
+        output_index = outpoint.varint()
+        reader = Reader(record)
+        amount = reader.number()
+        owner_address = reader.text()
+        # The stored timestamp, so lookups don't call datetime.now() and return equal outputs every time
+        return UTXO(amount=amount, owner_address=owner_address, tx_id=tx_id, output_index=output_index,
+                    timestamp=reader.text())
+
+class BlockUndo:
+    """Prior state of every outpoint a block touched, so the block can be disconnected again"""
+
+    def __init__(self):
+        self.changes: List[Tuple[str, int, Optional[UTXO]]] = []  # (tx_id, output_index, output before the change)
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+    def record(self, tx_id: str, output_index: int, prior: Optional[UTXO]) -> None:
+        """Remember what an outpoint held before the block changed it (None if it was created)"""
+        self.changes.append((tx_id, output_index, prior))
+
+    def revert(self, utxo_set: UTXOSet) -> None:
+        """Put every touched outpoint back as it was, newest change first"""
+        for tx_id, output_index, prior in reversed(self.changes):
+            if prior is None:
+                utxo_set.spend(tx_id, output_index)
+            else:
+                prior.spent = False
+                utxo_set.add(prior)
@@ -0,0 +1,85 @@
+# 00 Importing Modules
+from models.Blockchain import BlockChain
+from models.Block import Block
+from models.Miner import is_valid_proof
+from models.Transaction import Transaction
+from models.UTXO import UTXO
+from tools.GenerateKeys import generate_key_pair
+
+# 01 Importing Data and Type Modules
+import json
+import os
+from typing import List, Tuple
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Wallet:
+    """A generated key pair and its address"""
+
+    def __init__(self, blockchain: BlockChain):
+        private_key_bytes, public_key_bytes = generate_key_pair()
+        self.private_key_hex = private_key_bytes.hex()
+        self.public_key_hex = public_key_bytes.hex()
+        self.address = blockchain.generate_address(public_key_bytes)
+
+def find_proof(previous_proof: int) -> int:
+    """Search the proof in this process, faster than starting miner processes for one small block"""
+    proof = 1
+    while not is_valid_proof(previous_proof, proof):
+        proof += 1
+    return proof
+
+def mine(blockchain: BlockChain, miner_address: str) -> Block:
+    """Build a block with a valid proof on our tip"""
+    tip = blockchain.get_previous_block()
+    return blockchain.create_block(find_proof(tip.proof), tip.hash, miner_address)
+
+def pay(wallet: Wallet, utxo: UTXO, payments: List[Tuple[str, float]], fee: float = 0) -> Transaction:
+    """A signed transaction spending one of the wallet's outputs, with the rest as change"""
+    transaction = Transaction()
+    transaction.add_input(utxo)
+    for address, amount in payments:
+        transaction.add_output(UTXO(amount=amount, owner_address=address))
+    change = utxo.amount - sum(amount for _, amount in payments) - fee
+    if change > 0:
+        transaction.add_output(UTXO(amount=change, owner_address=wallet.address))
+    transaction.sign(wallet.private_key_hex)
+    transaction.sender_public_key_hex = wallet.public_key_hex
+    transaction.update_fee()
+    transaction.update_size()
+    return transaction
+
+def copy_chain(blockchain: BlockChain) -> BlockChain:
+    """An in-memory node that adopted every block of blockchain"""
+    copy = BlockChain()
+    assert copy.adopt_blocks(0, list(blockchain.chain))
+    return copy
+
+def utxo_state(blockchain: BlockChain) -> List[tuple]:
+    return sorted((utxo.tx_id, utxo.output_index, utxo.amount, utxo.owner_address) for utxo in blockchain.utxo_set)
+
+def submit_genesis_payment(client, amount: float = 10) -> str:
+    """Pay from the wallet owning the genesis output through a node's test client, returning the transaction id"""
+    with open(os.path.join(SRC_DIR, 'datas', 'wallet00.json')) as wallet_file:
+        wallet = json.load(wallet_file)
+    prepared = client.post('/transaction/prepare', json={
+        'sender_address': wallet['address'],
+        'sender_private_key': wallet['private_key'],
+        'outputs': [{'address': 'bob', 'amount': amount}]
+    }).get_json()
+    response = client.post('/transaction/add', json={
+        'signature': prepared['signature'], 'public_key': wallet['public_key'],
+        'inputs': prepared['inputs'], 'outputs': prepared['outputs']
+    })
+    assert response.status_code == 201
+    return response.get_json()['transaction_id']
+
+def mine_on_node(client) -> None:
+    """Mine a block on a served node, paying from the genesis wallet so the block isn't empty"""
+    submit_genesis_payment(client)
+    response = client.post('/block/mine', json={'miner_address': 'node_miner'})
+    assert response.status_code == 200
+
+def node_tip(client) -> str:
+    length = client.get('/chain/headers?from=1&limit=0').get_json()['length']
+    return client.get(f'/chain/headers?from={length}&limit=1').get_json()['headers'][0]['hash']
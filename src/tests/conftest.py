@@ -0,0 +1,18 @@
+# 00 Importing System Modules
+import sys
+import os
+
+# Tests import the node modules the way app.py does, from the src directory
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
+
+import pytest
+
+from models.Blockchain import BlockChain
+
+@pytest.fixture(autouse=True)
+def single_process_workers(monkeypatch):
+    # Test chains are small, a pool of processes per chain only slows them down
+    monkeypatch.setattr(BlockChain, 'MINING_WORKERS', 1)
+    monkeypatch.setattr(BlockChain, 'VERIFY_WORKERS', 1)
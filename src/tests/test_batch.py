@@ -0,0 +1,71 @@
+# 00 Importing Modules
+import app as node
+from models.Blockchain import BlockChain
+from models.SignatureVerifier import SignatureVerifier
+from models.UTXO import UTXO
+from chain_helpers import SRC_DIR, Wallet, pay
+
+# 01 Importing Data Modules
+import json
+import os
+
+def test_batch_answers_for_every_transaction_in_order(tmp_path):
+    client = node.create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    with open(os.path.join(SRC_DIR, 'datas', 'wallet00.json')) as wallet_file:
+        wallet = json.load(wallet_file)
+
+    def prepared(amount):
+        transaction = client.post('/transaction/prepare', json={
+            'sender_address': wallet['address'],
+            'sender_private_key': wallet['private_key'],
+            'outputs': [{'address': 'bob', 'amount': amount}]
+        }).get_json()
+        return {'signature': transaction['signature'], 'public_key': wallet['public_key'],
+                'inputs': transaction['inputs'], 'outputs': transaction['outputs']}
+
+    payment = prepared(10)
+    # Spends the same genesis output, which the payment ahead of it in the batch already claims
+    double_spend = prepared(20)
+    unknown_input = dict(payment, inputs=[{'tx_id': 'ab' * 32, 'output_index': 0}])
+    forged = dict(payment, outputs=[{'address': 'mallory', 'amount': output['amount']} for output in payment['outputs']])
+    response = client.post('/transaction/add_batch', json={
+        'transactions': [payment, double_spend, {'signature': 'aa'}, unknown_input, forged]
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['accepted'], body['rejected']) == (1, 4)
+    results = body['results']
+    assert [result['accepted'] for result in results] == [True, False, False, False, False]
+    assert results[1]['error'] == 'Transaction inputs are already spent by a pending transaction'
+    assert results[2]['error'].startswith('Missing required fields')
+    assert results[3]['error'].startswith('Input UTXO not found')
+    assert results[4]['error'] == 'Transaction signature verification failed'
+    assert results[2]['transaction_id'] is None
+
+    mempool = client.get('/transaction/get_mempool').get_json()['transactions']
+    assert [tx['tx_id'] for tx in mempool] == [results[0]['transaction_id']]
+
+def test_batch_limits(tmp_path, monkeypatch):
+    monkeypatch.setattr(node, 'MAX_BATCH_SIZE', 2)
+    client = node.create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    assert client.post('/transaction/add_batch', json={'transactions': [{}] * 3}).status_code == 400
+    assert client.post('/transaction/add_batch', json={}).status_code == 400
+
+def test_large_batches_are_verified_in_parallel():
+    blockchain = BlockChain()
+    blockchain.verifier = SignatureVerifier(workers=2)
+    wallet = Wallet(blockchain)
+    transactions = []
+    for i in range(SignatureVerifier.PARALLEL_THRESHOLD + 4):
+        utxo = UTXO(amount=10, owner_address=wallet.address, tx_id=f'{i:064x}', output_index=0)
+        blockchain.add_utxo(utxo)
+        transactions.append(pay(wallet, utxo, [('bob', 10)]))
+    transactions[3].outputs[0].owner_address = 'mallory'
+
+    try:
+        errors = blockchain.add_transactions(transactions)
+    finally:
+        blockchain.close()
+    assert errors[3] == 'Transaction signature verification failed'
+    assert errors[:3] + errors[4:] == [None] * (len(transactions) - 1)
+    assert len(blockchain.mempool) == len(transactions) - 1
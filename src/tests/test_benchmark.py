@@ -0,0 +1,34 @@
+# 00 Importing Modules
+from tools.Benchmark import compare, metric, run
+
+# 01 Importing Data Modules
+import argparse
+
+def test_regressions_are_measured_in_the_direction_that_is_worse():
+    baseline = {
+        'latency': metric(10, 'ms', 'lower'),
+        'throughput': metric(1000, 'tx/s', 'higher'),
+        'size': metric(100, 'bytes', 'lower'),
+        'unmeasured': metric(0, 'ms', 'lower')
+    }
+    current = {
+        'latency': metric(12.5, 'ms', 'lower'),  # 25% slower
+        'throughput': metric(1100, 'tx/s', 'higher'),  # 10% faster
+        'size': metric(110, 'bytes', 'lower'),  # 10% larger, within tolerance
+        'unmeasured': metric(5, 'ms', 'lower'),
+        'new': metric(1, 'ms', 'lower')
+    }
+    assert compare(current, baseline, 0.2) == ['latency']
+    assert compare(current, baseline, 0.05) == ['latency', 'size']
+    assert compare({'throughput': metric(700, 'tx/s', 'higher')}, baseline, 0.2) == ['throughput']
+
+def test_small_run_reports_every_metric_with_its_parameters():
+    args = argparse.Namespace(only=['get_balance', 'coin_selection'], seed=1, wallets=2, addresses=10, utxo_sizes=[100],
+                              balance_queries=10, wallet_utxos=200, selection_queries=2, output=None, baseline=None)
+    results = run(args)
+    assert results['parameters']['utxo_sizes'] == [100]
+    assert 'output' not in results['parameters']
+    assert results['metrics']
+    for value in results['metrics'].values():
+        assert value['value'] >= 0
+        assert value['better'] in ('lower', 'higher')
@@ -0,0 +1,76 @@
+# 00 Importing Modules
+from models.Block import Block
+from models.Blockchain import BlockChain
+from models.Transaction import Transaction
+from chain_helpers import mine
+
+# 01 Importing Hashlib and Testing Modules
+import hashlib
+import pytest
+
+def count_header_encodings(monkeypatch) -> list:
+    encodings = []
+    header_bytes = Block.header_bytes
+    monkeypatch.setattr(Block, 'header_bytes', lambda block: encodings.append(block.index) or header_bytes(block))
+    return encodings
+
+def test_block_hash_is_computed_once(monkeypatch):
+    block = mine(BlockChain(), 'miner')
+    block = Block(block.index, block.proof, block.previous_hash, block.transactions, timestamp=block.timestamp)
+    encodings = count_header_encodings(monkeypatch)
+
+    block_hash = block.hash
+    assert block.hash == block_hash
+    assert block.header()['hash'] == block_hash
+    assert encodings == [2]
+    assert block_hash == hashlib.sha256(block.header_bytes()).hexdigest()
+
+def test_decoded_block_takes_its_hash_from_the_encoding(monkeypatch):
+    block = mine(BlockChain(), 'miner')
+    data, block_hash = block.to_bytes(), block.hash
+    encodings = count_header_encodings(monkeypatch)
+    decoded = Block.from_bytes(data)
+    assert decoded.hash == block_hash
+    assert encodings == []
+
+def test_dictionary_hash_matches_the_block_hash():
+    blockchain = BlockChain()
+    block = mine(blockchain, 'miner')
+    block_dict = block.to_dict()
+    assert blockchain.hash(block_dict) == blockchain.get_block_hash(block) == block.hash
+    # The hash covers the transactions through the Merkle root
+    block_dict['transactions'][0]['outputs'][0]['amount'] += 1
+    assert blockchain.hash(block_dict) != block.hash
+
+def count_transaction_decodes(monkeypatch) -> list:
+    decodes = []
+    from_bytes = Transaction.from_bytes
+    monkeypatch.setattr(Transaction, 'from_bytes', lambda data: decodes.append(data) or from_bytes(data))
+    return decodes
+
+def test_received_blocks_decode_their_transactions_on_first_access(monkeypatch):
+    blockchain = BlockChain()
+    for _ in range(3):
+        mine(blockchain, 'miner')
+    data = [block.to_bytes() for block in blockchain.chain]
+    decodes = count_transaction_decodes(monkeypatch)
+
+    received = [Block.from_bytes(encoded) for encoded in data]
+    # Headers, hashes, proofs and re-encoding don't need the transactions
+    assert blockchain.is_chain_valid(received)
+    assert [block.header() for block in received] == [block.header() for block in blockchain.chain]
+    assert [block.to_bytes() for block in received] == data
+    assert decodes == []
+
+    transactions = received[-1].transactions
+    assert [tx.tx_id for tx in transactions] == [tx.tx_id for tx in blockchain.chain[-1].transactions]
+    assert received[-1].transactions is transactions
+    assert len(decodes) == len(transactions)
+
+def test_malformed_transaction_is_only_noticed_when_decoded():
+    block = Block(2, 1, 'ab' * 32, None, timestamp='2024-01-01 00:00:00', block_size=3)
+    block._encoded_transactions = [b'bad']
+    received = Block.from_bytes(block.to_bytes())
+    assert received.hash == block.hash
+    with pytest.raises(ValueError):
+        received.transactions
@@ -0,0 +1,75 @@
+# 00 Importing Modules
+from app import create_app
+from models.Block import Block
+from models.Blockchain import BlockChain
+from models.BlockStore import decode_block_records
+from chain_helpers import mine, mine_on_node, node_tip
+
+def count_encodings(monkeypatch) -> list:
+    """Record the index of every block encoded to JSON"""
+    encodings = []
+    to_json = Block.to_json
+
+    def counting_to_json(block):
+        encodings.append(block.index)
+        return to_json(block)
+    monkeypatch.setattr(Block, 'to_json', counting_to_json)
+    return encodings
+
+def encode_range(blockchain: BlockChain, start: int, stop: int) -> list:
+    return list(blockchain.iter_encoded_blocks(start, stop, blockchain.chain_epoch))
+
+def test_chain_get_pages_and_revalidates_with_etag(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    mine_on_node(client)
+    mine_on_node(client)
+
+    response = client.get('/chain/get?from=2&limit=1')
+    page = response.get_json()
+    assert (page['length'], page['from'], page['count']) == (3, 2, 1)
+    assert [block['index'] for block in page['chain']] == [2]
+
+    etag = response.headers['ETag']
+    assert client.get('/chain/get?from=2&limit=1', headers={'If-None-Match': etag}).status_code == 304
+    # A new tip changes every range's tag
+    mine_on_node(client)
+    assert client.get('/chain/get?from=2&limit=1', headers={'If-None-Match': etag}).status_code == 200
+    assert client.get('/chain/get?from=0').status_code == 400
+
+def test_binary_chain_get_streams_length_prefixed_blocks(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    mine_on_node(client)
+    response = client.get('/chain/get?from=2&format=binary')
+    assert response.headers['X-Chain-Length'] == '2'
+    blocks = decode_block_records(response.data)
+    assert [block.hash for block in blocks] == [node_tip(client)]
+
+def test_cold_range_encodes_only_the_requested_blocks(monkeypatch):
+    blockchain = BlockChain()
+    for _ in range(5):
+        mine(blockchain, 'miner')
+    encodings = count_encodings(monkeypatch)
+
+    first = encode_range(blockchain, 4, 6)
+    assert encodings == [5, 6]
+    assert list(blockchain.encoded_blocks) == [4, 5]
+    # Served again from the cache
+    assert encode_range(blockchain, 4, 6) == first
+    assert encodings == [5, 6]
+
+def test_encoded_cache_is_bounded_and_forgets_replaced_blocks(monkeypatch):
+    monkeypatch.setattr(BlockChain, 'ENCODED_CACHE_SIZE', 2)
+    blockchain = BlockChain()
+    for _ in range(4):
+        mine(blockchain, 'miner')
+
+    encode_range(blockchain, 0, 5)
+    # The least recently served blocks make room for the newer ones
+    assert list(blockchain.encoded_blocks) == [3, 4]
+    encode_range(blockchain, 3, 4)
+    assert list(blockchain.encoded_blocks) == [4, 3]
+
+    blockchain.disconnect_blocks(4)
+    assert list(blockchain.encoded_blocks) == [3]
+    replacement = mine(blockchain, 'other_miner')
+    assert encode_range(blockchain, 4, 5) == [replacement.to_json()]
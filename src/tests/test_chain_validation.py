@@ -0,0 +1,64 @@
+# 00 Importing Modules
+from app import create_app
+from models.Blockchain import BlockChain
+from chain_helpers import mine, mine_on_node
+import models.Blockchain
+
+def count_proof_checks(monkeypatch) -> list:
+    checks = []
+    is_valid_proof = models.Blockchain.is_valid_proof
+
+    def counting_is_valid_proof(previous_proof, proof):
+        checks.append(proof)
+        return is_valid_proof(previous_proof, proof)
+    monkeypatch.setattr(models.Blockchain, 'is_valid_proof', counting_is_valid_proof)
+    return checks
+
+def chain_of(length: int) -> BlockChain:
+    blockchain = BlockChain()
+    while len(blockchain.chain) < length:
+        mine(blockchain, 'miner')
+    return blockchain
+
+def test_only_blocks_added_since_the_last_validation_are_checked(monkeypatch):
+    blockchain = chain_of(5)
+    assert blockchain.is_chain_valid(blockchain.chain)
+    checks = count_proof_checks(monkeypatch)
+
+    mine(blockchain, 'miner')
+    assert blockchain.is_chain_valid(blockchain.chain)
+    assert checks == [blockchain.chain[-1].proof]
+    assert blockchain.is_chain_valid(blockchain.chain, full=True)
+    assert len(checks) == 1 + 5
+
+def test_replaced_tip_invalidates_the_marker(monkeypatch):
+    blockchain = chain_of(4)
+    assert blockchain.is_chain_valid(blockchain.chain)
+    blockchain.disconnect_blocks(3)
+    mine(blockchain, 'other_miner')
+    assert blockchain.get_validated_position() == 0
+
+    checks = count_proof_checks(monkeypatch)
+    assert blockchain.is_chain_valid(blockchain.chain)
+    assert len(checks) == 3
+
+def test_proofs_below_a_checkpoint_are_trusted(monkeypatch):
+    blockchain = chain_of(6)
+    peer_chain = [block.to_dict() for block in blockchain.chain]
+    monkeypatch.setattr(BlockChain, 'CHECKPOINTS', {4: blockchain.chain[3].hash})
+    checks = count_proof_checks(monkeypatch)
+    assert blockchain.is_chain_valid(peer_chain)
+    assert checks == [peer_chain[4]['proof'], peer_chain[5]['proof']]
+
+    # A chain through another block at the checkpoint is rejected however valid its proofs
+    monkeypatch.setattr(BlockChain, 'CHECKPOINTS', {4: chain_of(4).chain[3].hash})
+    assert not blockchain.is_chain_valid(peer_chain)
+    assert not blockchain.are_headers_valid(0, [block.header() for block in blockchain.chain])
+
+def test_validate_endpoint_reports_the_validated_height(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    mine_on_node(client)
+    for query in ('', '?full=true'):
+        response = client.get(f'/chain/validate{query}')
+        assert response.status_code == 200
+        assert response.get_json()['validated_height'] == 2
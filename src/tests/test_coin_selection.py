@@ -0,0 +1,52 @@
+# 00 Importing Modules
+from app import create_app
+from models.CoinSelection import select_coins
+from chain_helpers import SRC_DIR
+
+# 01 Importing Data Modules
+import json
+import os
+
+def candidates(*amounts: float) -> list:
+    return [(f'output-{i}', amount) for i, amount in enumerate(amounts)]
+
+def test_exact_match_needs_no_change_output():
+    # 25 and 7 would also take two inputs, but leave change
+    selection = select_coins(candidates(25, 7, 3, 20, 10), 30)
+    assert selection.algorithm == 'exact'
+    assert sorted(selection.keys) == ['output-3', 'output-4']
+    assert (selection.total, selection.change) == (30, 0)
+
+def test_fewest_inputs_win_over_an_exact_match():
+    # 20 + 10 is exact, but the single 50 makes the smaller transaction
+    selection = select_coins(candidates(50, 20, 10), 30)
+    assert selection.algorithm == 'largest_first'
+    assert selection.keys == ['output-0']
+    assert selection.change == 20
+
+def test_without_exact_match_the_last_input_keeps_the_change_small():
+    selection = select_coins(candidates(40, 25, 24, 9), 60)
+    assert selection.algorithm == 'largest_first'
+    # 40 and 24 rather than 40 and 25
+    assert selection.keys == ['output-0', 'output-2']
+    assert selection.change == 4
+
+def test_uncovered_or_empty_targets_select_nothing():
+    assert select_coins(candidates(5, 5), 11) is None
+    assert select_coins(candidates(5), 0) is None
+    assert select_coins([], 1) is None
+
+def test_prepared_transaction_spends_an_exact_match_without_change(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    with open(os.path.join(SRC_DIR, 'datas', 'wallet00.json')) as wallet_file:
+        wallet = json.load(wallet_file)
+    (genesis_amount,) = [output['amount'] for output in client.get('/chain/get').get_json()['chain'][0]['transactions'][0]['outputs']
+                         if output['owner_address'] == wallet['address']]
+
+    prepared = client.post('/transaction/prepare', json={
+        'sender_address': wallet['address'],
+        'sender_private_key': wallet['private_key'],
+        'outputs': [{'address': 'bob', 'amount': genesis_amount}]
+    }).get_json()
+    assert [output['address'] for output in prepared['outputs']] == ['bob']
+    assert len(prepared['inputs']) == 1
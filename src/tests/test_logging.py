@@ -0,0 +1,33 @@
+# 00 Importing Modules
+from models.LogConfig import LOG_FILE, LazyQueueHandler, RECORDS_DROPPED, SampleFilter, parse_settings
+
+# 01 Importing Logging Modules
+import logging
+import os
+import queue
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord('models.Mempool', logging.INFO, __file__, 1, message, ('tx',), None)
+
+def test_default_log_file_is_kept_out_of_the_working_tree():
+    assert os.path.dirname(LOG_FILE) == os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'datas')
+
+def test_settings_are_parsed_from_name_value_pairs():
+    assert parse_settings('models.Mempool=WARNING, werkzeug = 100,junk') == {'models.Mempool': 'WARNING', 'werkzeug': '100'}
+    assert parse_settings(None) == {}
+
+def test_sampler_keeps_the_first_record_of_each_template_then_one_in_every():
+    sampler = SampleFilter(3)
+    kept = [sampler.filter(make_record('Added %s')) for _ in range(7)]
+    assert kept == [True, False, False, True, False, False, True]
+    assert sampler.filter(make_record('Removed %s'))
+
+def test_full_queue_drops_records_without_blocking():
+    handler = LazyQueueHandler(queue.Queue(1))
+    dropped = RECORDS_DROPPED.labels().value
+    handler.emit(make_record('Added %s'))
+    handler.emit(make_record('Added %s'))
+    assert handler.queue.qsize() == 1
+    assert RECORDS_DROPPED.labels().value == dropped + 1
+    # Formatting is left to the writer thread
+    assert handler.queue.get_nowait().getMessage() == 'Added tx'
@@ -0,0 +1,106 @@
+# 00 Importing Modules
+from models.Blockchain import BlockChain
+from models.Mempool import Mempool
+from models.Transaction import Transaction
+from models.UTXO import UTXO
+from chain_helpers import Wallet, mine, pay
+
+# 01 Importing Data and Type Modules
+from typing import List, Tuple
+
+def pending(tx_id: str, spends: List[Tuple[str, int]], fee: float = 0, size: int = 100) -> Transaction:
+    """An unverified pending transaction with the given inputs, fee and encoded size"""
+    transaction = Transaction()
+    transaction.tx_id = tx_id
+    transaction.signature = f'signature-{tx_id}'.encode()
+    transaction.inputs = [UTXO(amount=1, owner_address='alice', tx_id=spent_id, output_index=index)
+                          for spent_id, index in spends]
+    transaction.fee = fee
+    transaction.size = size
+    return transaction
+
+# Part - 01 Indexes
+
+def test_pending_transactions_are_indexed_by_signature_and_spent_outpoint():
+    mempool = Mempool()
+    first = pending('a', [('funding', 0), ('funding', 1)])
+    assert mempool.add(first)
+    assert not mempool.add(first)
+
+    assert mempool.get('a') is first
+    assert mempool.has_signature(b'signature-a')
+    assert mempool.get_spender('funding', 1) is first
+    assert mempool.get_spender('funding', 2) is None
+    # Spending either output conflicts with the pending transaction, only once however many it shares
+    assert mempool.get_conflicts(pending('b', [('funding', 1), ('funding', 0)])) == [first]
+    assert mempool.get_conflicts(pending('c', [('funding', 2)])) == []
+
+    assert mempool.remove('a') is first
+    assert mempool.remove('a') is None
+    assert not mempool.has_signature(b'signature-a')
+    assert mempool.get_spender('funding', 0) is None
+    assert (len(mempool), mempool.total_size) == (0, 0)
+
+def test_double_spends_and_replayed_signatures_are_rejected():
+    blockchain = BlockChain()
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    utxo = blockchain.get_utxos_for_address(wallet.address)[0]
+    payment = pay(wallet, utxo, [('bob', 5)])
+    assert blockchain.add_transaction(payment)
+
+    double_spend = pay(wallet, utxo, [('carol', 5)])
+    assert blockchain.check_transaction(double_spend) == "Transaction inputs are already spent by a pending transaction"
+    assert not blockchain.add_transaction(double_spend)
+    replay = Transaction.from_dict(payment.to_dict())
+    replay.tx_id = 'replay'
+    assert blockchain.check_transaction(replay) == "Transaction with same signature already exists in mempool"
+    assert not blockchain.add_transaction(replay)
+
+    # Confirming the payment frees its indexes
+    mine(blockchain, 'miner')
+    assert len(blockchain.mempool) == 0
+    assert blockchain.mempool.get_spender(utxo.tx_id, utxo.output_index) is None
+    assert not blockchain.mempool.has_signature(payment.signature)
+
+# Part - 02 Fee-Rate Priority
+
+def test_transactions_are_ordered_by_fee_rate_then_arrival():
+    mempool = Mempool()
+    for transaction in (pending('low', [('f', 0)], fee=1, size=100), pending('high', [('f', 1)], fee=2, size=50),
+                        pending('dense', [('f', 2)], fee=3, size=300), pending('tie', [('f', 3)], fee=4, size=100)):
+        mempool.add(transaction)
+    # 0.04 per byte for high and tie, 0.01 for low and dense; equal rates keep their arrival order
+    assert [tx.tx_id for tx in mempool.by_fee_rate()] == ['high', 'tie', 'low', 'dense']
+    mempool.remove('tie')
+    assert [tx.tx_id for tx in mempool.by_fee_rate()] == ['high', 'low', 'dense']
+
+def test_full_pool_evicts_the_lowest_fee_rates_first():
+    mempool = Mempool(max_size=300)
+    for tx_id, fee in (('cheapest', 1), ('cheap', 2), ('dear', 5)):
+        assert mempool.add(pending(tx_id, [(tx_id, 0)], fee=fee, size=100))
+
+    # Room for 150 bytes is made by pushing out the two lowest fee rates
+    assert mempool.add(pending('newcomer', [('newcomer', 0)], fee=6, size=150))
+    assert [tx.tx_id for tx in mempool.by_fee_rate()] == ['dear', 'newcomer']
+    assert (mempool.total_size, mempool.evicted_count) == (250, 2)
+    assert mempool.get_spender('cheapest', 0) is None
+
+def test_full_pool_keeps_its_transactions_when_the_newcomer_pays_less():
+    mempool = Mempool(max_size=200)
+    assert mempool.add(pending('cheap', [('cheap', 0)], fee=1, size=100))
+    assert mempool.add(pending('dear', [('dear', 0)], fee=5, size=100))
+
+    # Evicting only the cheap transaction isn't enough, and the dear one pays a higher rate than the newcomer
+    assert not mempool.add(pending('newcomer', [('newcomer', 0)], fee=7, size=150))
+    assert not mempool.add(pending('oversized', [('oversized', 0)], fee=100, size=201))
+    assert [tx.tx_id for tx in mempool.by_fee_rate()] == ['dear', 'cheap']
+    assert mempool.evicted_count == 0
+
+def test_blocks_take_the_highest_fee_rates_that_fit(monkeypatch):
+    blockchain = BlockChain()
+    for tx_id, fee, size in (('low', 1, 100), ('high', 9, 100), ('large', 50, 400), ('mid', 4, 100)):
+        blockchain.mempool.add(pending(tx_id, [(tx_id, 0)], fee=fee, size=size))
+    monkeypatch.setattr(BlockChain, 'BLOCK_SIZE_LIMIT', 250)
+    # 'large' pays the best rate but doesn't fit, so the next best ones are taken instead
+    assert [tx.tx_id for tx in blockchain.select_transactions_for_block()] == ['high', 'mid']
@@ -0,0 +1,51 @@
+# 00 Importing Modules
+from app import create_app
+from models.Block import Block, hash_header
+from models.Merkle import hash_leaf, merkle_branch, merkle_root, verify_merkle_branch
+from chain_helpers import submit_genesis_payment
+
+# 01 Importing Testing Modules
+import pytest
+
+def test_every_leaf_proves_against_the_root():
+    for size in range(1, 10):
+        data = [f'transaction-{i}'.encode() for i in range(size)]
+        leaves = [hash_leaf(item) for item in data]
+        root = merkle_root(leaves)
+        for position, item in enumerate(data):
+            branch = merkle_branch(leaves, position)
+            assert verify_merkle_branch(item, branch, root)
+            assert not verify_merkle_branch(b'forged', branch, root)
+        if size > 1:
+            # A branch only proves the leaf it was built for
+            assert not verify_merkle_branch(data[0], merkle_branch(leaves, 1), root)
+
+    with pytest.raises(IndexError):
+        merkle_branch([hash_leaf(b'only')], 1)
+
+def test_odd_leaf_is_not_paired_with_itself():
+    leaves = [hash_leaf(item) for item in (b'a', b'b', b'c')]
+    assert merkle_root(leaves) != merkle_root(leaves + leaves[-1:])
+    # The root is a tree node, so it can't be presented as a leaf
+    assert merkle_root(leaves[:1]) == hash_leaf(b'a')
+    assert not verify_merkle_branch(merkle_root(leaves[:2]), [], merkle_root(leaves))
+
+def test_decoded_block_must_match_its_merkle_root():
+    block = Block(2, 1, '0' * 64, [], timestamp='2024-01-01 00:00:00', block_size=0)
+    block._merkle_root = hash_leaf(b'another transaction list').hex()
+    with pytest.raises(ValueError, match='Merkle root'):
+        Block.from_bytes(block.to_bytes())
+
+def test_transaction_proof_checks_out_against_the_followed_header(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    tx_id = submit_genesis_payment(client)
+    assert client.post('/block/mine', json={'miner_address': 'node_miner'}).status_code == 200
+    assert client.get('/transaction/proof/missing').status_code == 404
+
+    proof = client.get(f'/transaction/proof/{tx_id}').get_json()
+    header = proof['header']
+    branch = [(step['side'], bytes.fromhex(step['hash'])) for step in proof['proof']]
+    assert verify_merkle_branch(bytes.fromhex(proof['transaction']), branch, bytes.fromhex(header['merkle_root']))
+    assert hash_header(header) == header['hash']
+    followed = client.get(f"/chain/headers?from={header['index']}&limit=1").get_json()['headers'][0]
+    assert followed['hash'] == header['hash']
@@ -0,0 +1,68 @@
+# 00 Importing Modules
+from app import create_app
+from models.Blockchain import BlockChain
+from models.Metrics import METHOD_DURATION, Counter, Gauge, Histogram, Registry
+from models.SignatureVerifier import SignatureVerifier
+from models.UTXO import UTXO
+from chain_helpers import Wallet, mine_on_node, pay
+
+def sample_value(text: str, sample: str) -> float:
+    """The value of one sample line in a rendered registry"""
+    for line in text.splitlines():
+        if line.startswith(sample + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f"No sample {sample}")
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = Registry()
+    requests = Counter('requests_total', 'Requests served', labels=('route',), registry=registry)
+    Gauge('height', 'Chain height', registry=registry).set_function(lambda: 7)
+    latency = Histogram('latency_seconds', 'Request latency', registry=registry, buckets=(0.1, 1.0))
+    requests.labels('/chain/"get"').inc()
+    requests.labels('/chain/"get"').inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    assert registry.render().splitlines() == [
+        '# HELP requests_total Requests served',
+        '# TYPE requests_total counter',
+        'requests_total{route="/chain/\\"get\\""} 3.0',
+        '# HELP height Chain height',
+        '# TYPE height gauge',
+        'height 7',
+        '# HELP latency_seconds Request latency',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        'latency_seconds_sum 5.55',
+        'latency_seconds_count 3'
+    ]
+
+def test_signatures_verified_in_worker_processes_are_timed():
+    wallet = Wallet(BlockChain())
+    transactions = [pay(wallet, UTXO(amount=10, owner_address=wallet.address, tx_id=f'{i:064x}', output_index=0),
+                        [('bob', 10)])
+                    for i in range(SignatureVerifier.PARALLEL_THRESHOLD)]
+    timed = METHOD_DURATION.labels('verify_signature')
+    count = sum(timed.counts)
+
+    verifier = SignatureVerifier(workers=2)
+    try:
+        assert verifier.verify_many(transactions) == [True] * len(transactions)
+    finally:
+        verifier.shutdown()
+    assert sum(timed.counts) == count + len(transactions)
+
+def test_metrics_endpoint_reports_node_state(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    mine_on_node(client)
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert sample_value(text, 'node_chain_height') == 2
+    assert sample_value(text, 'node_mempool_transactions') == 0
+    assert '# TYPE node_method_duration_seconds histogram' in text
+    assert sample_value(text, 'node_method_duration_seconds_count{method="BlockChain.create_block"}') >= 1
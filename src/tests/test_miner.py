@@ -0,0 +1,101 @@
+# 00 Importing Modules
+import models.Miner as Miner
+from models.Miner import ProofOfWorkMiner, is_valid_proof
+
+# 01 Importing Concurrency Modules
+import multiprocessing
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+def never_found_range(search, previous_proof, start, end):
+    """Stand-in worker task that searches until it is stopped, without ever finding a proof"""
+    while Miner._current_search.value == search:
+        time.sleep(0.01)
+    return None, 0
+
+def mine_in_thread(miner: ProofOfWorkMiner, previous_proof: int) -> dict:
+    outcome = {}
+
+    def run():
+        try:
+            outcome['proof'] = miner.mine(previous_proof)
+        except Exception as e:
+            outcome['error'] = e
+    outcome['thread'] = threading.Thread(target=run, daemon=True)
+    outcome['thread'].start()
+    return outcome
+
+def child_pids() -> set:
+    return {process.pid for process in multiprocessing.active_children()}
+
+def wait_for_new_workers(known: set, count: int) -> list:
+    """Pids of the worker processes started since known was taken"""
+    for _ in range(500):
+        workers = sorted(child_pids() - known)
+        if len(workers) >= count:
+            return workers
+        time.sleep(0.01)
+    raise AssertionError("The worker processes didn't start")
+
+def test_workers_persist_across_searches():
+    miner = ProofOfWorkMiner(workers=2)
+    try:
+        proof = miner.mine(100)
+        assert is_valid_proof(100, proof)
+        assert miner.last_hashes > 0 and miner.hash_rate > 0
+        workers = child_pids()
+
+        assert is_valid_proof(proof, miner.mine(proof))
+        # The second search ran on the same processes
+        assert child_pids() == workers
+    finally:
+        miner.shutdown()
+
+def test_cancel_before_the_search_starts_is_kept():
+    miner = ProofOfWorkMiner(workers=1)
+    try:
+        miner.begin()
+        # e.g. a chain adoption between reading the tip and starting to hash on it
+        miner.cancel()
+        assert miner.mine(100) is None
+        assert miner.mine(100) is None
+        miner.begin()
+        assert is_valid_proof(100, miner.mine(100))
+    finally:
+        miner.shutdown()
+
+def test_cancel_stops_a_running_search(monkeypatch):
+    monkeypatch.setattr(Miner, '_search_range', never_found_range)
+    miner = ProofOfWorkMiner(workers=2)
+    try:
+        known = child_pids()
+        outcome = mine_in_thread(miner, 100)
+        wait_for_new_workers(known, 2)
+        miner.cancel()
+        outcome['thread'].join(10)
+        assert not outcome['thread'].is_alive()
+        assert outcome == {'thread': outcome['thread'], 'proof': None}
+    finally:
+        miner.shutdown()
+
+def test_dead_worker_fails_the_search_instead_of_hanging(monkeypatch):
+    monkeypatch.setattr(Miner, '_search_range', never_found_range)
+    miner = ProofOfWorkMiner(workers=2)
+    try:
+        known = child_pids()
+        outcome = mine_in_thread(miner, 100)
+        os.kill(wait_for_new_workers(known, 2)[0], signal.SIGKILL)
+        outcome['thread'].join(10)
+        assert not outcome['thread'].is_alive()
+        with pytest.raises(RuntimeError, match='worker process died'):
+            raise outcome['error']
+
+        # The next search starts a new pool
+        monkeypatch.undo()
+        assert is_valid_proof(100, miner.mine(100))
+    finally:
+        miner.shutdown()
@@ -0,0 +1,93 @@
+# 00 Importing Modules
+import app as node
+from models.Blockchain import BlockChain
+from models.MiningJob import BackgroundMiner, MiningJob
+
+# 01 Importing Concurrency Modules
+import threading
+import time
+
+from chain_helpers import Wallet, find_proof, mine, pay, submit_genesis_payment
+
+def test_mine_block_answers_with_the_job_when_the_wait_runs_out(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def held_proof_of_work(blockchain, previous_proof):
+        release.wait(10)
+        return find_proof(previous_proof)
+    monkeypatch.setattr(BlockChain, 'proof_of_work', held_proof_of_work)
+    monkeypatch.setattr(node, 'MINING_WAIT_TIMEOUT', 0.1)
+
+    client = node.create_app(5999, data_dir=str(tmp_path), log_file=None).test_client()
+    submit_genesis_payment(client)
+    response = client.post('/block/mine', json={'miner_address': 'miner'})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] == 'running'
+    assert client.get(f"/mining/result/{job['job_id']}").status_code == 202
+
+    # The job carries on after the request gave up on it
+    release.set()
+    assert client.get(f"/mining/status/{job['job_id']}").status_code == 200
+    for _ in range(100):
+        result = client.get(f"/mining/result/{job['job_id']}")
+        if result.status_code != 202:
+            break
+        time.sleep(0.05)
+    assert result.status_code == 200
+    assert result.get_json()['index'] == 2
+
+def wait_for_result(client, job_id: str):
+    for _ in range(100):
+        result = client.get(f"/mining/result/{job_id}")
+        if result.status_code != 202:
+            return result
+        time.sleep(0.05)
+    return result
+
+def test_waiting_job_mines_once_transactions_arrive_and_can_be_cancelled(tmp_path, monkeypatch):
+    monkeypatch.setattr(BlockChain, 'proof_of_work', lambda blockchain, previous_proof: find_proof(previous_proof))
+    client = node.create_app(5999, data_dir=str(tmp_path), log_file=None).test_client()
+    assert client.get('/mining/status/unknown').status_code == 404
+
+    job = client.post('/mining/start', json={'miner_address': 'miner'}).get_json()
+    assert job['status'] == 'waiting'
+    # One job at a time
+    assert client.post('/mining/start', json={'miner_address': 'other'}).status_code == 409
+    submit_genesis_payment(client)
+    result = wait_for_result(client, job['job_id'])
+    assert result.status_code == 200
+    assert result.get_json()['index'] == 2
+
+    # Nothing left to mine: the next job waits until it is cancelled
+    job = client.post('/mining/start', json={'miner_address': 'miner'}).get_json()
+    cancelled = client.post(f"/mining/cancel/{job['job_id']}")
+    assert cancelled.status_code == 200
+    assert cancelled.get_json()['status'] == 'cancelled'
+    assert client.post(f"/mining/cancel/{job['job_id']}").status_code == 409
+    assert client.get(f"/mining/result/{job['job_id']}").status_code == 409
+
+def test_job_starts_over_when_the_tip_changes_during_the_search():
+    blockchain = BlockChain()
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    mine(blockchain, wallet.address)
+    first, second = blockchain.get_utxos_for_address(wallet.address)
+    assert blockchain.add_transaction(pay(wallet, first, [('bob', 5)]))
+    searches = []
+
+    def racing_proof_of_work(previous_proof):
+        # The first search loses to a rival block, which also confirms the pending payment
+        if not searches:
+            mine(blockchain, 'rival')
+            assert blockchain.add_transaction(pay(wallet, second, [('carol', 5)]))
+        searches.append(previous_proof)
+        return find_proof(previous_proof)
+    blockchain.proof_of_work = racing_proof_of_work
+
+    job = BackgroundMiner(blockchain, poll_interval=0.01).start('miner')
+    assert job.done.wait(10)
+    assert job.status == MiningJob.FOUND
+    assert job.restarts == 1
+    assert job.block.index == 5
+    assert blockchain.get_balance('carol') == 5
@@ -0,0 +1,268 @@
+# 00 Importing Modules
+from app import create_app
+from models.Blockchain import BlockChain
+from models.BlockStore import split_records
+from models.PeerClient import PeerClient
+from models.Transaction import Transaction
+from chain_helpers import Wallet, mine, mine_on_node, node_tip, pay, submit_genesis_payment
+
+# 01 Importing Networking and Concurrency Modules
+import pytest
+import requests
+import socket
+import threading
+import time
+from flask import Flask
+from werkzeug.serving import make_server
+
+@pytest.fixture
+def serve():
+    """Start local HTTP servers for Flask apps, returning their host:port, and stop them after the test"""
+    servers = []
+
+    def start(app: Flask) -> str:
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'127.0.0.1:{server.server_port}'
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def flaky_peer(failures: int, status: int = 503, delay: float = 0) -> Flask:
+    """A stand-in peer answering status to its first requests, then {'ok': true} after delay seconds"""
+    app = Flask(__name__)
+    app.hits = 0
+
+    @app.route('/status')
+    def status_route():
+        app.hits += 1
+        if app.hits <= failures:
+            return 'overloaded', status
+        time.sleep(delay)
+        return {'ok': True}
+    return app
+
+def closed_port() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return f'127.0.0.1:{sock.getsockname()[1]}'
+
+# Part - 01 Peer Client
+
+def test_overloaded_peer_is_retried(serve):
+    app = flaky_peer(failures=1)
+    node = serve(app)
+    peers = PeerClient(timeout=1, retries=2, backoff=0.01)
+    assert peers.get_json(node, '/status') == {'ok': True}
+    assert app.hits == 2
+    assert peers.stats[node].failures == 0
+    assert peers.rank([node]) == [node]
+
+def test_slow_peer_times_out_without_retry(serve):
+    app = flaky_peer(failures=0, delay=0.5)
+    node = serve(app)
+    peers = PeerClient(timeout=0.1, retries=2, backoff=0.01)
+    # The read budget of the retry policy is 0, so the timeout ends the request at once
+    with pytest.raises(requests.ConnectionError, match='Read timed out'):
+        peers.get_json(node, '/status')
+    assert app.hits == 1
+    assert peers.stats[node].failures == 1
+    assert peers.latency(node) == float('inf')
+
+def test_failing_peer_backs_off_exponentially_then_recovers(serve):
+    app = flaky_peer(failures=2, status=500)
+    node = serve(app)
+    peers = PeerClient(timeout=1, retries=2, backoff=0.05)
+    for failures in (1, 2):
+        started = time.monotonic()
+        with pytest.raises(requests.HTTPError):
+            peers.get_json(node, '/status')
+        stats = peers.stats[node]
+        assert stats.failures == failures
+        assert stats.retry_at - started == pytest.approx(0.05 * 2 ** failures, abs=0.05)
+        # Skipped until the backoff runs out
+        assert peers.rank([node]) == []
+
+    time.sleep(peers.stats[node].retry_at - time.monotonic())
+    assert peers.rank([node]) == [node]
+    assert peers.get_json(node, '/status') == {'ok': True}
+    assert peers.stats[node].failures == 0
+    assert peers.latency(node) < 1
+
+def test_map_reports_unreachable_peers_and_skips_them_afterwards(serve):
+    healthy = serve(flaky_peer(failures=0))
+    unreachable = closed_port()
+    peers = PeerClient(timeout=1, retries=1, backoff=0.01)
+    results = dict(peers.map([healthy, unreachable], lambda node: peers.get_json(node, '/status')))
+    assert results[healthy] == {'ok': True}
+    assert isinstance(results[unreachable], requests.ConnectionError)
+
+    peers.stats[unreachable].retry_at = time.monotonic() + 60
+    assert [node for node, _ in peers.map([healthy, unreachable], lambda node: None)] == [healthy]
+
+# Part - 02 Headers-First Sync
+
+def synced_follower(leader: str) -> BlockChain:
+    follower = BlockChain()
+    follower.add_node(f'http://{leader}')
+    # Every node starts with its own genesis block, so the first sync replaces the whole chain
+    assert follower.replace_chain()
+    return follower
+
+def record_block_fetches(follower: BlockChain, monkeypatch) -> list:
+    fetches = []
+    fetch_blocks = follower.fetch_blocks
+
+    def recording_fetch_blocks(node, start_index, count):
+        fetches.append((start_index, count))
+        return fetch_blocks(node, start_index, count)
+    monkeypatch.setattr(follower, 'fetch_blocks', recording_fetch_blocks)
+    return fetches
+
+def test_follower_one_block_behind_downloads_only_that_block(tmp_path, serve, monkeypatch):
+    app = create_app(0, data_dir=str(tmp_path), log_file=None)
+    client = app.test_client()
+    leader = serve(app)
+    mine_on_node(client)
+    follower = synced_follower(leader)
+    assert follower.chain[-1].hash == node_tip(client)
+
+    mine_on_node(client)
+    fetches = record_block_fetches(follower, monkeypatch)
+    assert follower.replace_chain()
+    assert fetches == [(3, 1)]
+    assert len(follower.chain) == 3
+    assert follower.chain[-1].hash == node_tip(client)
+    assert follower.get_balance('bob') == 20
+
+    # Nothing to do once caught up
+    assert not follower.replace_chain()
+    assert fetches == [(3, 1)]
+
+def test_unreachable_peer_does_not_stop_the_sync(tmp_path, serve):
+    app = create_app(0, data_dir=str(tmp_path), log_file=None)
+    client = app.test_client()
+    leader = serve(app)
+    mine_on_node(client)
+
+    follower = BlockChain()
+    follower.add_node(f'http://{closed_port()}')
+    follower.add_node(f'http://{leader}')
+    assert follower.replace_chain()
+    assert follower.chain[-1].hash == node_tip(client)
+
+def test_locator_is_dense_near_the_tip_then_doubles_back_to_genesis():
+    blockchain = BlockChain()
+    for _ in range(29):
+        mine(blockchain, 'miner')
+    locator = blockchain.get_locator()
+    assert [index for index, _ in locator] == [30, 29, 28, 27, 26, 25, 24, 23, 22, 21, 19, 15, 7, 1]
+    assert all(block_hash == blockchain.chain[index - 1].hash for index, block_hash in locator)
+
+def test_headers_are_served_from_the_last_block_shared_with_a_locator(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    mine_on_node(client)
+    mine_on_node(client)
+    headers = client.get('/chain/headers?from=1').get_json()['headers']
+    assert [header['index'] for header in headers] == [1, 2, 3]
+
+    # A follower that went its own way after block 2
+    locator = f"4:{'ab' * 32},3:{'cd' * 32},2:{headers[1]['hash']},1:{headers[0]['hash']}"
+    response = client.get('/chain/headers', query_string={'locator': locator}).get_json()
+    assert (response['fork_index'], response['length']) == (2, 3)
+    assert response['headers'] == headers[2:]
+
+    # Nothing shared, not even the genesis block: everything is sent
+    response = client.get('/chain/headers', query_string={'locator': f"1:{'ab' * 32}"}).get_json()
+    assert response['fork_index'] == 0
+    assert response['headers'] == headers
+    assert client.get('/chain/headers?locator=oops').status_code == 400
+
+def test_headers_whose_hash_does_not_match_their_fields_are_rejected():
+    blockchain = BlockChain()
+    mine(blockchain, 'miner')
+    headers = [block.header() for block in blockchain.chain]
+    assert blockchain.are_headers_valid(0, headers)
+    forged = dict(headers[1], merkle_root='ab' * 32)
+    assert not blockchain.are_headers_valid(0, [headers[0], forged])
+    assert not blockchain.are_headers_valid(1, [dict(headers[1], index=3)])
+
+# Part - 03 Reorganization with Pending Transactions
+
+def test_reorg_to_a_peer_chain_drops_pending_spends_of_orphaned_outputs(tmp_path, serve):
+    app = create_app(0, data_dir=str(tmp_path), log_file=None)
+    client = app.test_client()
+    leader = serve(app)
+    mine_on_node(client)
+    follower = synced_follower(leader)
+
+    # The follower mines its own block and spends its reward, while the leader's chain grows longer
+    wallet = Wallet(follower)
+    mine(follower, wallet.address)
+    orphaned_spend = pay(wallet, follower.get_utxos_for_address(wallet.address)[0], [('carol', 20)])
+    assert follower.add_transaction(orphaned_spend)
+    mine_on_node(client)
+    mine_on_node(client)
+
+    assert follower.replace_chain()
+    assert len(follower.chain) == 4
+    assert follower.chain[-1].hash == node_tip(client)
+    assert follower.mempool.get(orphaned_spend.tx_id) is None
+    assert follower.get_balance(wallet.address) == 0
+    assert follower.get_balance('bob') == 30
+
+    # The dropped spend can't reach the next block either
+    mine(follower, 'follower_miner')
+    assert follower.get_balance('carol') == 0
+    assert follower.get_balance('follower_miner') == follower.INITIAL_MINING_REWARD
+
+# Part - 04 Gossip
+
+def wait_for(condition, timeout: float = 10) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+def test_announced_transactions_are_fetched_only_from_connected_peers(tmp_path, serve, monkeypatch):
+    leader_app = create_app(0, data_dir=str(tmp_path / 'leader'), log_file=None)
+    leader = serve(leader_app)
+    follower = create_app(0, data_dir=str(tmp_path / 'follower'), log_file=None).test_client()
+    assert follower.post('/node/connect', json={'nodes': [f'http://{leader}']}).status_code == 201
+    assert follower.get('/node/sync').status_code == 200
+    tx_id = submit_genesis_payment(leader_app.test_client())
+
+    fetches = []
+    get_bytes = PeerClient.get_bytes
+    monkeypatch.setattr(PeerClient, 'get_bytes', lambda peers, node, *args: fetches.append(node) or get_bytes(peers, node, *args))
+
+    # A port the node isn't connected to is refused, whatever the announcement claims
+    stranger = closed_port()
+    response = follower.post('/gossip/inventory', json={'port': int(stranger.split(':')[1]), 'type': 'tx', 'ids': [tx_id]})
+    assert response.status_code == 403
+    assert fetches == []
+
+    response = follower.post('/gossip/inventory', json={'port': int(leader.split(':')[1]), 'type': 'tx', 'ids': [tx_id]})
+    assert response.status_code == 202
+    assert response.get_json() == {'requested': 1}
+    assert wait_for(lambda: tx_id in [tx['tx_id'] for tx in follower.get('/transaction/get_mempool').get_json()['transactions']])
+    assert fetches == [leader]
+
+def test_items_are_requested_once_however_often_they_are_announced(tmp_path, serve):
+    leader_app = create_app(0, data_dir=str(tmp_path / 'leader'), log_file=None)
+    leader = serve(leader_app)
+    follower = create_app(0, data_dir=str(tmp_path / 'follower'), log_file=None).test_client()
+    follower.post('/node/connect', json={'nodes': [f'http://{leader}']})
+    follower.get('/node/sync')
+    tx_id = submit_genesis_payment(leader_app.test_client())
+    announcement = {'port': int(leader.split(':')[1]), 'type': 'tx', 'ids': [tx_id, tx_id]}
+
+    assert follower.post('/gossip/inventory', json=announcement).get_json() == {'requested': 1}
+    assert follower.post('/gossip/inventory', json=announcement).get_json() == {'requested': 0}
+    assert follower.post('/gossip/inventory', json=dict(announcement, type='utxo')).status_code == 400
+    # The leader serves what it still has and leaves unknown ids out
+    data = leader_app.test_client().get('/gossip/data', query_string={'type': 'tx', 'ids': f'{tx_id},unknown'}).data
+    assert [Transaction.from_bytes(record).tx_id for record in split_records(data)] == [tx_id]
@@ -0,0 +1,76 @@
+# 00 Importing Modules
+from models.ReadWriteLock import ReadWriteLock
+from tools import StressTest
+
+# 01 Importing Concurrency and Testing Modules
+import argparse
+import threading
+import time
+import pytest
+
+def in_thread(function) -> threading.Thread:
+    thread = threading.Thread(target=function, daemon=True)
+    thread.start()
+    return thread
+
+def test_readers_share_the_lock():
+    lock = ReadWriteLock()
+    both_reading = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.read():
+            both_reading.wait()
+    threads = [in_thread(reader) for _ in range(2)]
+    for thread in threads:
+        thread.join(5)
+    assert not both_reading.broken
+
+def test_writer_excludes_readers_and_goes_before_new_ones():
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_read()
+
+    def writer_step():
+        with lock.write():
+            events.append('write')
+
+    def reader_step():
+        with lock.read():
+            events.append('read')
+    writer = in_thread(writer_step)
+    while not lock._waiting_writers:
+        time.sleep(0.001)
+
+    # A reader arriving while the writer waits queues behind it, even though only readers hold the lock
+    reader = in_thread(reader_step)
+    time.sleep(0.05)
+    assert events == []
+    lock.release_read()
+    writer.join(5)
+    reader.join(5)
+    assert events == ['write', 'read']
+
+def test_both_sides_are_reentrant_but_reads_do_not_upgrade():
+    lock = ReadWriteLock()
+    with lock.write():
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            with pytest.raises(RuntimeError):
+                lock.acquire_write()
+    # Fully released: another thread can write
+    acquired = threading.Event()
+
+    def writer_step():
+        with lock.write():
+            acquired.set()
+    in_thread(writer_step)
+    assert acquired.wait(5)
+
+def test_readers_never_see_torn_chain_state():
+    args = argparse.Namespace(seconds=1, readers=2, admitters=2, transactions=200, wallets=5, seed=1, memory=True)
+    results = StressTest.run(args)
+    assert results['violations'] == []
+    assert results['height'] > 2
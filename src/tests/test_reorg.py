@@ -0,0 +1,99 @@
+from chain_helpers import Wallet, copy_chain, mine, pay, utxo_state
+
+from models.Blockchain import BlockChain
+
+def fork_with_pending_spend():
+    """Node a mines a block paying a wallet, which then spends that reward; node b has a longer branch without it"""
+    a = BlockChain()
+    mine(a, 'shared_miner')
+    b = copy_chain(a)
+
+    wallet = Wallet(a)
+    mine(a, wallet.address)
+    reward = a.get_utxos_for_address(wallet.address)[0]
+    spend = pay(wallet, reward, [('bob', 50)])
+    assert a.add_transaction(spend)
+
+    for _ in range(2):
+        mine(b, 'other_miner')
+    return a, b, spend
+
+def test_undo_reorg_drops_pending_spends_of_disconnected_outputs():
+    a, b, spend = fork_with_pending_spend()
+    assert a.adopt_blocks(2, list(b.chain)[2:])
+
+    assert a.mempool.get(spend.tx_id) is None
+    assert utxo_state(a) == utxo_state(b)
+    mine(a, 'next_miner')
+    assert a.get_balance('bob') == 0
+
+def test_undo_reorg_keeps_pending_spends_of_shared_outputs():
+    a = BlockChain()
+    wallet = Wallet(a)
+    mine(a, wallet.address)
+    b = copy_chain(a)
+    mine(a, 'miner_a')
+    spend = pay(wallet, a.get_utxos_for_address(wallet.address)[0], [('bob', 20)])
+    assert a.add_transaction(spend)
+    for _ in range(2):
+        mine(b, 'miner_b')
+
+    assert a.adopt_blocks(2, list(b.chain)[2:])
+    assert a.mempool.get(spend.tx_id) is not None
+    mine(a, 'next_miner')
+    assert a.get_balance('bob') == 20
+
+def test_rebuild_reorg_keeps_the_utxo_set_confirmed_only():
+    a, b, spend = fork_with_pending_spend()
+    # Without undo data the fork is adopted by rebuilding the UTXO set from the whole chain
+    a.block_undo.clear()
+    assert a.adopt_blocks(2, list(b.chain)[2:])
+
+    assert a.mempool.get(spend.tx_id) is None
+    assert a.get_balance('bob') == 0
+    assert utxo_state(a) == utxo_state(b)
+
+def test_rebuild_reorg_keeps_valid_pending_transactions_out_of_the_utxo_set():
+    a = BlockChain()
+    wallet = Wallet(a)
+    mine(a, wallet.address)
+    b = copy_chain(a)
+    mine(a, 'miner_a')
+    spend = pay(wallet, a.get_utxos_for_address(wallet.address)[0], [('bob', 20)])
+    assert a.add_transaction(spend)
+    for _ in range(2):
+        mine(b, 'miner_b')
+
+    a.block_undo.clear()
+    assert a.adopt_blocks(2, list(b.chain)[2:])
+    assert a.mempool.get(spend.tx_id) is not None
+    assert a.get_balance('bob') == 0
+    assert utxo_state(a) == utxo_state(b)
+
+    # The block mining it can be disconnected again with its undo data
+    before = utxo_state(a)
+    mine(a, 'next_miner')
+    assert a.get_balance('bob') == 20
+    a.disconnect_blocks(len(a.chain) - 1)
+    assert utxo_state(a) == before
+
+def test_undo_reorg_returns_transactions_of_disconnected_blocks_to_the_mempool():
+    a = BlockChain()
+    wallet = Wallet(a)
+    mine(a, wallet.address)
+    b = copy_chain(a)
+    payment = pay(wallet, a.get_utxos_for_address(wallet.address)[0], [('bob', 20)])
+    assert a.add_transaction(payment)
+    mine(a, 'miner_a')
+    assert a.get_balance('bob') == 20
+    for _ in range(2):
+        mine(b, 'miner_b')
+
+    assert a.adopt_blocks(2, list(b.chain)[2:])
+    # Still valid on the new branch, so it waits for the next block instead of being lost
+    assert [tx.tx_id for tx in a.mempool] == [payment.tx_id]
+    assert a.get_balance('bob') == 0
+    assert a.tx_index.get(payment.tx_id) is None
+    mine(a, 'next_miner')
+    assert a.get_balance('bob') == 20
+    assert a.tx_index.get(payment.tx_id) == (5, 1)
@@ -0,0 +1,84 @@
+# 00 Importing Modules
+from models.Block import Block
+from models.Blockchain import BlockChain
+from models.Serialization import ENCODING_VERSION, FLOAT, NUMBER_FLOAT, Reader, Writer, encode_varint
+from models.Transaction import Transaction
+from models.UTXO import UTXO
+from chain_helpers import Wallet, mine, pay
+
+# 01 Importing Testing Modules
+import pytest
+
+def test_fields_round_trip_with_their_types():
+    writer = Writer()
+    values = [0, 127, 128, 2 ** 70]
+    for value in values:
+        writer.varint(value)
+    for value in (-1, 0, -2 ** 65):
+        writer.integer(value)
+    for value in (5, 5.0, -0.25):
+        writer.number(value)
+    for value in (None, b'', b'\x00\xff'):
+        writer.blob(value)
+    for value in (None, '', 'ab' * 32, 'AB', 'abc', 'miner_fee'):
+        writer.text(value)
+
+    reader = Reader(writer.getvalue())
+    assert [reader.varint() for _ in values] == values
+    assert [reader.integer() for _ in range(3)] == [-1, 0, -2 ** 65]
+    numbers = [reader.number() for _ in range(3)]
+    assert numbers == [5, 5.0, -0.25]
+    assert [type(number) for number in numbers] == [int, float, float]
+    assert [reader.blob() for _ in range(3)] == [None, b'', b'\x00\xff']
+    assert [reader.text() for _ in range(6)] == [None, '', 'ab' * 32, 'AB', 'abc', 'miner_fee']
+    assert reader.at_end()
+
+def test_hex_text_is_stored_at_half_the_size():
+    writer = Writer()
+    writer.text('ab' * 32)
+    assert len(writer.getvalue()) == 2 + 32
+
+def test_non_canonical_encodings_are_rejected():
+    with pytest.raises(ValueError, match='Non-canonical varint'):
+        Reader(b'\x80\x00').varint()
+    with pytest.raises(ValueError, match='Truncated'):
+        Reader(b'\x80').varint()
+    with pytest.raises(ValueError, match='hex must use the hex tag'):
+        Reader(b'\x01\x03ab').text()
+    with pytest.raises(ValueError, match='NaN'):
+        Reader(bytes([NUMBER_FLOAT]) + FLOAT.pack(float('nan'))).number()
+
+def signed_payment() -> Transaction:
+    blockchain = BlockChain()
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    return pay(wallet, blockchain.get_utxos_for_address(wallet.address)[0], [('bob', 5), ('carol', 0.5)], fee=1)
+
+def test_transactions_and_blocks_round_trip():
+    transaction = signed_payment()
+    decoded = Transaction.from_bytes(transaction.to_bytes())
+    assert decoded.to_dict() == transaction.to_dict()
+    assert decoded.size == transaction.size == len(transaction.to_bytes())
+    assert decoded.verify_signature()
+
+    block = Block(2, 17, 'cd' * 32, [transaction], timestamp='2024-01-01 00:00:00')
+    data = block.to_bytes()
+    decoded_block = Block.from_bytes(data)
+    assert decoded_block.hash == block.hash
+    assert decoded_block.to_bytes() == data
+    assert decoded_block.to_dict() == block.to_dict()
+
+    utxo = UTXO(amount=2.5, owner_address='bob', tx_id='ef' * 32, output_index=3)
+    decoded_utxo = UTXO.from_bytes(utxo.to_bytes())
+    assert (decoded_utxo.amount, decoded_utxo.owner_address, decoded_utxo.tx_id, decoded_utxo.output_index) == \
+        (2.5, 'bob', 'ef' * 32, 3)
+
+def test_other_versions_and_trailing_bytes_are_rejected():
+    transaction = signed_payment()
+    data = transaction.to_bytes()
+    assert data.startswith(encode_varint(ENCODING_VERSION))
+    for decode in (Transaction.from_bytes, Block.from_bytes, UTXO.from_bytes):
+        with pytest.raises(ValueError, match='Unsupported encoding version: 1'):
+            decode(encode_varint(1) + data[1:])
+    with pytest.raises(ValueError, match='Trailing bytes'):
+        Transaction.from_bytes(data + b'\x00')
@@ -0,0 +1,55 @@
+# 00 Importing Modules
+from app import create_app
+from models.Blockchain import BlockChain
+from models.Transaction import SignatureCache, load_public_key, verify_signature_uncached
+from models.UTXO import UTXO
+from chain_helpers import Wallet, pay
+import models.Transaction
+
+def count_verifications(monkeypatch) -> list:
+    verifications = []
+
+    def counting_verify(public_key_hex, signature, message_hash):
+        verifications.append(signature)
+        return verify_signature_uncached(public_key_hex, signature, message_hash)
+    monkeypatch.setattr(models.Transaction, 'verify_signature_uncached', counting_verify)
+    return verifications
+
+def payments(count: int) -> list:
+    wallet = Wallet(BlockChain())
+    return [pay(wallet, UTXO(amount=10, owner_address=wallet.address, tx_id=f'{i:064x}', output_index=0), [('bob', 10)])
+            for i in range(count)]
+
+def test_signature_cache_evicts_the_least_recently_used_triple():
+    cache = SignatureCache(2)
+    cache.add(('key', b'a', b'hash'))
+    cache.add(('key', b'b', b'hash'))
+    assert ('key', b'a', b'hash') in cache
+    cache.add(('key', b'c', b'hash'))
+    assert ('key', b'b', b'hash') not in cache
+    assert ('key', b'a', b'hash') in cache
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 2, 'max_size': 2}
+
+def test_only_valid_signatures_are_remembered(monkeypatch):
+    payment, forged = payments(2)
+    forged.outputs[0].owner_address = 'mallory'
+    verifications = count_verifications(monkeypatch)
+
+    assert payment.verify_signature() and payment.verify_signature()
+    assert verifications == [payment.signature]
+    assert not forged.verify_signature() and not forged.verify_signature()
+    assert verifications == [payment.signature, forged.signature, forged.signature]
+
+def test_public_keys_are_parsed_once_per_wallet():
+    first, second = payments(2)
+    first.verify_signature()
+    hits = load_public_key.cache_info().hits
+    second.verify_signature()
+    assert load_public_key.cache_info().hits == hits + 1
+
+def test_cache_stats_endpoint(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    stats = client.get('/node/cache_stats').get_json()['signature_verification']
+    assert set(stats) == {'public_keys', 'signatures'}
+    assert set(stats['signatures']) == {'hits', 'misses', 'size', 'max_size'}
+    assert stats['public_keys']['max_size'] == models.Transaction.PUBLIC_KEY_CACHE_SIZE
@@ -0,0 +1,173 @@
+# 00 Importing Modules
+from models.Block import Block
+from models.Blockchain import BlockChain
+from models.BlockStore import BlockStore
+from chain_helpers import Wallet, mine, pay, utxo_state
+
+# 01 Importing Data Modules
+import json
+import os
+import threading
+
+def stored_chain_with_payments(data_dir: str) -> BlockChain:
+    """A store-backed chain of 6 blocks, each after the first confirming a payment"""
+    blockchain = BlockChain(data_dir=data_dir)
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    for _ in range(5):
+        utxo = blockchain.get_utxos_for_address(wallet.address)[0]
+        assert blockchain.add_transaction(pay(wallet, utxo, [('bob', 1)]))
+        mine(blockchain, wallet.address)
+    return blockchain
+
+def count_block_reads(monkeypatch) -> list:
+    positions = []
+    read_block = BlockStore.read_block
+
+    def counting_read_block(store, position):
+        positions.append(position)
+        return read_block(store, position)
+    monkeypatch.setattr(BlockStore, 'read_block', counting_read_block)
+    return positions
+
+def test_restart_replays_only_the_blocks_after_the_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(BlockChain, 'SNAPSHOT_INTERVAL', 4)
+    blockchain = stored_chain_with_payments(str(tmp_path))
+    assert blockchain.snapshot_height == 4
+    expected_utxos = utxo_state(blockchain)
+    expected_history = blockchain.tx_index.get_history('bob', 10)
+    expected_location = blockchain.tx_index.get(blockchain.chain[2].transactions[1].tx_id)
+    length = len(blockchain.chain)
+    blockchain.close()
+
+    reads = count_block_reads(monkeypatch)
+    restarted = BlockChain(data_dir=str(tmp_path))
+    # The tip is read once more to mark it validated
+    assert sorted(set(reads)) == list(range(4, length))
+    assert utxo_state(restarted) == expected_utxos
+    assert restarted.tx_index.get_history('bob', 10) == expected_history
+    assert restarted.tx_index.get(restarted.chain[2].transactions[1].tx_id) == expected_location == (3, 1)
+    assert len(restarted.tx_index) == len(blockchain.tx_index)
+
+    # Tuples again after the JSON round trip, so blocks can still be disconnected from the index
+    restarted.tx_index.remove_block(restarted.chain[-1])
+    restarted.tx_index.remove_block(restarted.chain[-2])
+    assert restarted.tx_index.count_history('bob') == 3
+    restarted.close()
+
+def test_stored_blocks_are_encoded_to_json_once(tmp_path, monkeypatch):
+    blockchain = stored_chain_with_payments(str(tmp_path))
+    encodings = []
+    to_json = Block.to_json
+
+    def counting_to_json(block):
+        encodings.append(block.index)
+        return to_json(block)
+    monkeypatch.setattr(Block, 'to_json', counting_to_json)
+
+    tip_position = len(blockchain.chain) - 1
+    first = blockchain.get_encoded_block(tip_position)
+    assert blockchain.get_encoded_block(tip_position) is first
+    assert encodings == [tip_position + 1]
+
+    # A disconnected block's encoding goes with it
+    blockchain.disconnect_blocks(tip_position)
+    replacement = mine(blockchain, 'other_miner')
+    assert blockchain.get_encoded_block(tip_position) == to_json(replacement) != first
+    blockchain.close()
+
+def test_restarted_node_encodes_only_the_blocks_it_serves(tmp_path, monkeypatch):
+    monkeypatch.setattr(BlockChain, 'ENCODED_CACHE_SIZE', 2)
+    stored_chain_with_payments(str(tmp_path)).close()
+    restarted = BlockChain(data_dir=str(tmp_path))
+    assert len(restarted.encoded_blocks) == 0
+
+    encodings = []
+    to_json = Block.to_json
+    monkeypatch.setattr(Block, 'to_json', lambda block: encodings.append(block.index) or to_json(block))
+    with restarted.lock.read():
+        served = list(restarted.iter_encoded_blocks(1, 4, restarted.chain_epoch))
+    assert encodings == [2, 3, 4]
+    assert served[-1] == to_json(restarted.chain[3])
+    # The JSON of the log isn't kept, only the most recently served blocks
+    assert list(restarted.encoded_blocks) == [2, 3]
+    restarted.close()
+
+def index_state(blockchain: BlockChain) -> tuple:
+    return dict(blockchain.tx_index._locations), dict(blockchain.tx_index._history)
+
+def test_transaction_index_is_logged_per_block_not_snapshotted(tmp_path, monkeypatch):
+    monkeypatch.setattr(BlockChain, 'SNAPSHOT_INTERVAL', 4)
+    blockchain = stored_chain_with_payments(str(tmp_path))
+    blockchain.pending_snapshot.result()
+    with open(blockchain.store.snapshot_path) as snapshot_file:
+        assert set(json.load(snapshot_file)) == {'height', 'tip_hash', 'utxos'}
+
+    # A reorg truncates the log with the blocks it replaces
+    blockchain.disconnect_blocks(5)
+    mine(blockchain, 'other_miner')
+    expected = index_state(blockchain)
+    blockchain.close()
+
+    restarted = BlockChain(data_dir=str(tmp_path))
+    assert index_state(restarted) == expected
+    assert restarted.tx_index.count_history('bob') == 3
+    restarted.close()
+
+def test_interrupted_transaction_log_append_is_recovered(tmp_path):
+    blockchain = stored_chain_with_payments(str(tmp_path))
+    expected = index_state(blockchain)
+    path = blockchain.store.transactions_path
+    blockchain.close()
+
+    # The last line was cut short by a crash after its block was written
+    size = os.path.getsize(path)
+    with open(path, 'r+b') as transactions_file:
+        transactions_file.truncate(size - 10)
+
+    restarted = BlockChain(data_dir=str(tmp_path))
+    assert index_state(restarted) == expected
+    with open(path, 'rb') as transactions_file:
+        assert len(transactions_file.read().splitlines()) == len(restarted.chain)
+    restarted.close()
+
+def test_snapshot_is_written_off_the_chain_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(BlockChain, 'SNAPSHOT_INTERVAL', 3)
+    writing = threading.Event()
+    release = threading.Event()
+    save_snapshot = BlockStore.save_snapshot
+
+    def held_save_snapshot(store, height, tip_hash, utxos):
+        writing.set()
+        release.wait(10)
+        save_snapshot(store, height, tip_hash, utxos)
+    monkeypatch.setattr(BlockStore, 'save_snapshot', held_save_snapshot)
+
+    blockchain = BlockChain(data_dir=str(tmp_path))
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    mine(blockchain, wallet.address)
+    assert writing.wait(10)
+    # The chain keeps taking blocks and payments while the snapshot of height 3 is on its way to disk
+    snapshot_state = utxo_state(blockchain)
+    assert blockchain.add_transaction(pay(wallet, blockchain.get_utxos_for_address(wallet.address)[0], [('bob', 5)]))
+    mine(blockchain, wallet.address)
+    assert len(blockchain.chain) == 4
+    release.set()
+    expected = utxo_state(blockchain)
+    blockchain.close()
+
+    with open(os.path.join(str(tmp_path), BlockStore.SNAPSHOT_FILE)) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    # Copied at the snapshot's height, unaffected by the block mined during the write
+    assert snapshot['height'] == 3
+    assert sorted((utxo['tx_id'], utxo['output_index'], utxo['amount'], utxo['owner_address'])
+                  for utxo in snapshot['utxos']) == snapshot_state
+
+    # A restart loads the snapshot and replays only the block mined after it
+    reads = count_block_reads(monkeypatch)
+    restarted = BlockChain(data_dir=str(tmp_path))
+    assert sorted(set(reads)) == [3]
+    assert utxo_state(restarted) == expected
+    assert restarted.get_balance('bob') == 5
+    restarted.close()
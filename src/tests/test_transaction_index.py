@@ -0,0 +1,34 @@
+# 00 Importing Modules
+from app import create_app
+from chain_helpers import mine_on_node, submit_genesis_payment
+
+def test_confirmed_transaction_is_found_by_id(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    tx_id = submit_genesis_payment(client)
+    assert client.get(f'/transaction/id/{tx_id}').status_code == 404
+    client.post('/block/mine', json={'miner_address': 'node_miner'})
+    mine_on_node(client)
+
+    entry = client.get(f'/transaction/id/{tx_id}').get_json()
+    assert entry['transaction']['tx_id'] == tx_id
+    assert (entry['block_index'], entry['position'], entry['confirmations']) == (2, 1, 2)
+    assert entry['block_hash'] == client.get('/chain/headers?from=2&limit=1').get_json()['headers'][0]['hash']
+
+def test_transaction_lookup_does_not_shadow_the_other_transaction_routes(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    for path in ('/transaction/add', '/transaction/prepare', '/transaction/add_batch'):
+        assert client.get(path).status_code == 405
+    assert client.get('/transaction/get_mempool').get_json()['transactions'] == []
+
+def test_address_history_pages_newest_first(tmp_path):
+    client = create_app(0, data_dir=str(tmp_path), log_file=None).test_client()
+    for _ in range(3):
+        mine_on_node(client)
+
+    first = client.get('/wallet/history/bob?limit=2').get_json()
+    assert [entry['block_index'] for entry in first['transactions']] == [4, 3]
+    assert [entry['amount'] for entry in first['transactions']] == [10, 10]
+    rest = client.get(f"/wallet/history/bob?limit=2&before={first['next']}").get_json()
+    assert [entry['block_index'] for entry in rest['transactions']] == [2]
+    assert rest['next'] is None
+    assert client.get('/wallet/history/bob?before=oops').status_code == 400
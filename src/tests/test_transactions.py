@@ -0,0 +1,41 @@
+# 00 Importing Modules
+from models.Blockchain import BlockChain
+from models.Gossip import Gossip
+from models.Transaction import Transaction
+from chain_helpers import Wallet, mine, pay
+
+def funded_chain():
+    blockchain = BlockChain()
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    return blockchain, wallet, blockchain.get_utxos_for_address(wallet.address)[0]
+
+def coinbase_amount(blockchain: BlockChain) -> float:
+    return blockchain.chain[-1].transactions[0].outputs[0].amount
+
+def test_fee_is_paid_to_the_miner():
+    blockchain, wallet, utxo = funded_chain()
+    assert blockchain.add_transaction(pay(wallet, utxo, [('bob', 20)], fee=5))
+    mine(blockchain, 'miner')
+    assert coinbase_amount(blockchain) == blockchain.INITIAL_MINING_REWARD + 5
+
+def test_forged_fee_is_rejected():
+    blockchain, wallet, utxo = funded_chain()
+    forged = pay(wallet, utxo, [('bob', 20)])
+    # The fee isn't signed, so anyone relaying the transaction can change it
+    forged.fee = 10 ** 9
+    assert not blockchain.add_transaction(forged)
+    assert blockchain.add_transactions([forged]) == ["Transaction total amount verification failed"]
+    assert len(blockchain.mempool) == 0
+
+def test_forged_fee_is_rejected_from_gossip():
+    blockchain, wallet, utxo = funded_chain()
+    forged = pay(wallet, utxo, [('bob', 20)])
+    forged.fee = 10 ** 9
+    # As decoded from a peer's /gossip/data response
+    gossip = Gossip(blockchain, port=0)
+    gossip._accept_transactions('peer:5000', [Transaction.from_bytes(forged.to_bytes())])
+    assert len(blockchain.mempool) == 0
+
+    mine(blockchain, 'miner')
+    assert coinbase_amount(blockchain) == blockchain.INITIAL_MINING_REWARD
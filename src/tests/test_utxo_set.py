@@ -0,0 +1,77 @@
+# 00 Importing Modules
+from models.Blockchain import BlockChain
+from models.Transaction import Transaction
+from models.UTXO import UTXO
+from models.UTXOSet import BlockUndo, UTXOSet
+from chain_helpers import Wallet, mine, pay
+import models.UTXO
+
+class FrozenClock:
+    """Stands in for datetime in models.UTXO and fails the test if an output asks it for the time"""
+
+    @staticmethod
+    def now():
+        raise AssertionError("datetime.now() called")
+
+def test_lookups_return_the_stored_output_without_reading_the_clock(monkeypatch):
+    utxo_set = UTXOSet()
+    utxo_set.add(UTXO(amount=5, owner_address='alice', tx_id='ab' * 32, output_index=1, timestamp='2024-01-01 00:00:00'))
+    monkeypatch.setattr(models.UTXO, 'datetime', FrozenClock)
+
+    first = utxo_set.get('ab' * 32, 1)
+    assert first.to_dict() == {'timestamp': '2024-01-01 00:00:00', 'amount': 5, 'owner_address': 'alice',
+                               'tx_id': 'ab' * 32, 'output_index': 1, 'spent': False}
+    assert [utxo.to_dict() for utxo in utxo_set.for_address('alice')] == [first.to_dict()]
+    assert [utxo.to_dict() for utxo in utxo_set] == [first.to_dict()]
+
+    spent = utxo_set.spend('ab' * 32, 1)
+    assert spent.spent and spent.timestamp == first.timestamp
+    assert len(utxo_set) == 0
+    assert utxo_set.amounts_for_address('alice') == []
+
+def test_block_undo_restores_replaced_and_spent_outputs():
+    utxo_set = UTXOSet()
+    original = UTXO(amount=5, owner_address='alice', tx_id='ab' * 32, output_index=0)
+    utxo_set.add(original)
+    undo = BlockUndo()
+    undo.record('ab' * 32, 0, utxo_set.spend('ab' * 32, 0))
+    utxo_set.add(UTXO(amount=3, owner_address='bob', tx_id='cd' * 32, output_index=0))
+    undo.record('cd' * 32, 0, None)
+
+    undo.revert(utxo_set)
+    assert [utxo.to_dict() for utxo in utxo_set] == [original.to_dict()]
+    assert utxo_set.amounts_for_address('bob') == []
+
+def test_decoded_blocks_give_outputs_the_transaction_timestamp():
+    blockchain = BlockChain()
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    transaction = pay(wallet, blockchain.get_utxos_for_address(wallet.address)[0], [('bob', 5)])
+    for decoded in (Transaction.from_dict(transaction.to_dict()), Transaction.from_bytes(transaction.to_bytes())):
+        assert {utxo.timestamp for utxo in decoded.inputs + decoded.outputs} == {transaction.timestamp}
+
+def test_address_index_follows_payments_and_pending_spends():
+    blockchain = BlockChain()
+    wallet = Wallet(blockchain)
+    mine(blockchain, wallet.address)
+    reward = blockchain.get_balance(wallet.address)
+    utxo = blockchain.get_utxos_for_address(wallet.address)[0]
+
+    payment = pay(wallet, utxo, [('bob', 5)])
+    assert blockchain.add_transaction(payment)
+    # Pending: the balance is unchanged, but the output is no longer offered for spending
+    assert blockchain.get_balance(wallet.address) == reward
+    assert blockchain.get_spendable_outputs(wallet.address) == []
+
+    mine(blockchain, 'miner')
+    assert blockchain.get_balance('bob') == 5
+    assert blockchain.get_balance(wallet.address) == reward - 5
+    assert [(change.tx_id, change.amount) for change in blockchain.get_utxos_for_address(wallet.address)] == \
+        [(payment.tx_id, reward - 5)]
+    assert [amount for _, amount in blockchain.get_spendable_outputs(wallet.address)] == [reward - 5]
+    assert blockchain.get_balance('nobody') == 0
+
+    # Disconnecting the block gives the index its spent output back
+    blockchain.disconnect_blocks(2)
+    assert blockchain.get_balance('bob') == 0
+    assert [output.tx_id for output in blockchain.get_utxos_for_address(wallet.address)] == [utxo.tx_id]
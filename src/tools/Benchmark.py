@@ -0,0 +1,373 @@
+# 00 Importing System Modules
+import sys
+import os
+import argparse
+import json
+import platform
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+# 01 Importing Modules
+from models.Blockchain import BlockChain
+from models.CoinSelection import select_coins
+from models.Transaction import Transaction
+from models.UTXO import UTXO
+from models.LogConfig import configure_logging
+from tools.GenerateKeys import generate_key_pair
+
+# 02 Importing Data and Type Modules
+from typing import Callable, Dict, List
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+# Metric name -> {'value', 'unit', 'better'}, where better is 'higher' or 'lower'
+Metrics = Dict[str, dict]
+
+def metric(value: float, unit: str, better: str) -> dict:
+    return {'value': round(value, 6), 'unit': unit, 'better': better}
+
+def timed(func: Callable[[], object]) -> float:
+    """Seconds taken by one call of func"""
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+# Part - 01 Synthetic Data Functions
+
+class Wallet:
+    """A generated key pair and its address"""
+
+    def __init__(self, blockchain: BlockChain):
+        private_key_bytes, public_key_bytes = generate_key_pair()
+        self.private_key_hex = private_key_bytes.hex()
+        self.public_key_hex = public_key_bytes.hex()
+        self.address = blockchain.generate_address(public_key_bytes)
+
+def make_wallets(blockchain: BlockChain, count: int) -> List[Wallet]:
+    return [Wallet(blockchain) for _ in range(count)]
+
+def fund_wallets(blockchain: BlockChain, wallets: List[Wallet], outputs_per_wallet: int,
+                 rng: random.Random) -> List[UTXO]:
+    """Add synthetic unspent outputs owned by the wallets straight into the UTXO set"""
+    funding = []
+    for wallet in wallets:
+        tx_id = '%064x' % rng.getrandbits(256)
+        for i in range(outputs_per_wallet):
+            utxo = UTXO(amount=rng.randint(10, 1000), owner_address=wallet.address, tx_id=tx_id, output_index=i)
+            blockchain.add_utxo(utxo)
+            funding.append(utxo)
+    return funding
+
+def sign_transactions(funding: List[UTXO], wallets: List[Wallet], rng: random.Random) -> List[Transaction]:
+    """One signed transaction per funding output, paying a random wallet and a random fee"""
+    owners = {wallet.address: wallet for wallet in wallets}
+    transactions = []
+    for utxo in funding:
+        fee = rng.randint(0, 5)
+        transaction = Transaction()
+        transaction.add_input(utxo)
+        transaction.add_output(UTXO(amount=utxo.amount - fee, owner_address=rng.choice(wallets).address))
+        transaction.sign(owners[utxo.owner_address].private_key_hex)
+        transaction.update_fee()
+        transaction.update_size()
+        transaction.sender_public_key_hex = owners[utxo.owner_address].public_key_hex
+        transactions.append(transaction)
+    return transactions
+
+def funded_chain(args, rng: random.Random, count: int):
+    """An in-memory chain with count signed, not yet admitted transactions"""
+    blockchain = BlockChain()
+    wallets = make_wallets(blockchain, args.wallets)
+    funding = fund_wallets(blockchain, wallets, -(-count // args.wallets), rng)[:count]
+    return blockchain, sign_transactions(funding, wallets, rng)
+
+def build_chain(blockchain: BlockChain, length: int) -> None:
+    """Mine coinbase-only blocks on top of a chain until it has length blocks"""
+    while len(blockchain.chain) < length:
+        previous_block = blockchain.get_previous_block()
+        proof = blockchain.proof_of_work(previous_block.proof)
+        blockchain.create_block(proof, previous_block.hash, 'benchmark_miner')
+
+# Part - 02 Benchmark Functions
+
+def bench_add_transaction(args, rng: random.Random) -> Metrics:
+    """Mempool admission, one transaction at a time and in parallel-verified batches"""
+    blockchain, transactions = funded_chain(args, rng, args.transactions)
+    elapsed = timed(lambda: [blockchain.add_transaction(tx) for tx in transactions])
+    results = {'add_transaction.throughput': metric(len(transactions) / elapsed, 'tx/s', 'higher')}
+
+    blockchain, transactions = funded_chain(args, rng, args.transactions)
+    elapsed = timed(lambda: blockchain.add_transactions(transactions))
+    results['add_transactions.throughput'] = metric(len(transactions) / elapsed, 'tx/s', 'higher')
+    return results
+
+def bench_block_assembly(args, rng: random.Random) -> Metrics:
+    """Latency of picking a block's transactions and of building the block from a full mempool"""
+    blockchain, transactions = funded_chain(args, rng, args.transactions)
+    blockchain.add_transactions(transactions)
+
+    select_times = []
+    create_times = []
+    for _ in range(args.blocks):
+        if not blockchain.mempool:
+            break
+        select_times.append(timed(blockchain.select_transactions_for_block))
+        # create_block doesn't check the proof, proof-of-work speed is measured by bench_chain
+        previous_hash = blockchain.get_previous_block().hash
+        create_times.append(timed(lambda: blockchain.create_block(1, previous_hash, 'benchmark_miner')))
+    return {
+        'select_transactions_for_block.latency': metric(sum(select_times) / len(select_times) * 1000, 'ms', 'lower'),
+        'create_block.latency': metric(sum(create_times) / len(create_times) * 1000, 'ms', 'lower')
+    }
+
+def bench_get_balance(args, rng: random.Random) -> Metrics:
+    """get_balance latency as the UTXO set grows, with outputs spread over a fixed set of addresses"""
+    results = {}
+    blockchain = BlockChain()
+    addresses = [f'benchmark_address_{i}' for i in range(args.addresses)]
+    stored = 0
+    for size in args.utxo_sizes:
+        while stored < size:
+            blockchain.add_utxo(UTXO(amount=rng.randint(1, 100), owner_address=addresses[stored % len(addresses)],
+                                     tx_id='%064x' % rng.getrandbits(256), output_index=0))
+            stored += 1
+        queries = [rng.choice(addresses) for _ in range(args.balance_queries)]
+        elapsed = timed(lambda: [blockchain.get_balance(address) for address in queries])
+        results[f'get_balance.latency.utxos_{size}'] = metric(elapsed / len(queries) * 1000, 'ms', 'lower')
+    return results
+
+def bench_coin_selection(args, rng: random.Random) -> Metrics:
+    """Input selection for payments from one address owning many outputs, as /transaction/prepare runs it"""
+    blockchain = BlockChain()
+    address = 'benchmark_wallet'
+    for _ in range(args.wallet_utxos):
+        blockchain.add_utxo(UTXO(amount=rng.randint(1, 1000), owner_address=address,
+                                 tx_id='%064x' % rng.getrandbits(256), output_index=0))
+    targets = [rng.randint(1, 5000) for _ in range(args.selection_queries)]
+    inputs = []
+
+    def select(target):
+        selection = select_coins(blockchain.get_spendable_outputs(address), target)
+        inputs.append(len(blockchain.get_utxos_by_key(selection.keys)))
+
+    elapsed = timed(lambda: [select(target) for target in targets])
+    return {
+        'coin_selection.latency': metric(elapsed / len(targets) * 1000, 'ms', 'lower'),
+        'coin_selection.inputs': metric(sum(inputs) / len(inputs), 'inputs', 'lower')
+    }
+
+def bench_chain(args, rng: random.Random) -> Metrics:
+    """Proof-of-work hash rate while mining a long chain, then full validation and a peer sync of that chain"""
+    data_dir = tempfile.mkdtemp(prefix='benchmark_chain_')
+    blockchain = BlockChain(data_dir=data_dir)
+    hashes = 0
+    mining_seconds = 0.0
+    while len(blockchain.chain) < args.chain_length:
+        build_chain(blockchain, len(blockchain.chain) + 1)
+        hashes += blockchain.miner.last_hashes
+        mining_seconds += blockchain.miner.last_elapsed
+    results = {'proof_of_work.hash_rate': metric(hashes / mining_seconds, 'H/s', 'higher')}
+
+    elapsed = timed(lambda: blockchain.is_chain_valid(blockchain.chain, full=True))
+    results['is_chain_valid.full'] = metric(elapsed * 1000, 'ms', 'lower')
+    blockchain.close()
+
+    # Serve the chain from a real node and sync a fresh node from it, from headers to blocks
+    from werkzeug.serving import make_server
+    from app import create_app
+    server = make_server('127.0.0.1', args.port, create_app(args.port, data_dir=data_dir, log_file=None), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        follower = BlockChain()
+        follower.add_node(f'http://127.0.0.1:{args.port}')
+        elapsed = timed(follower.replace_chain)
+        if len(follower.chain) != args.chain_length:
+            raise RuntimeError(f"replace_chain synced {len(follower.chain)} of {args.chain_length} blocks")
+        results['replace_chain.full_sync'] = metric(elapsed * 1000, 'ms', 'lower')
+    finally:
+        server.shutdown()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return results
+
+def wait_until(condition: Callable[[], bool], timeout: float, what: str) -> float:
+    """Poll condition until it holds and return the seconds it took, raising RuntimeError after timeout"""
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > timeout:
+            raise RuntimeError(f"Timed out waiting for {what}")
+        time.sleep(0.01)
+    return time.perf_counter() - started
+
+def bench_gossip(args, rng: random.Random) -> Metrics:
+    """Time for a transaction and a block submitted to one node to reach every node of a ring of local nodes"""
+    from werkzeug.serving import make_server
+    from app import create_app
+    ports = [args.port + 1 + i for i in range(args.gossip_nodes)]
+    data_dirs = []
+    servers = []
+    clients = []
+    try:
+        for port in ports:
+            data_dirs.append(tempfile.mkdtemp(prefix='benchmark_gossip_'))
+            app = create_app(port, data_dir=data_dirs[-1], log_file=None)
+            servers.append(make_server('127.0.0.1', port, app, threaded=True))
+            threading.Thread(target=servers[-1].serve_forever, daemon=True).start()
+            clients.append(app.test_client())
+        # A ring: every node only knows its two neighbours, so items have to be relayed to reach the far side
+        for i, client in enumerate(clients):
+            neighbours = {ports[(i - 1) % len(ports)], ports[(i + 1) % len(ports)]}
+            client.post('/node/connect', json={'nodes': [f'http://127.0.0.1:{port}' for port in neighbours]})
+
+        with open(os.path.join(current_dir, 'datas', 'wallet00.json')) as wallet_file:
+            genesis_wallet = json.load(wallet_file)  # Owns the genesis output
+
+        def tip(client):
+            length = client.get('/chain/headers?from=1&limit=0').get_json()['length']
+            return client.get(f'/chain/headers?from={length}&limit=1').get_json()['headers'][0]['hash']
+
+        def submit_transaction():
+            prepared = clients[0].post('/transaction/prepare', json={
+                'sender_address': genesis_wallet['address'],
+                'sender_private_key': genesis_wallet['private_key'],
+                'outputs': [{'address': f'benchmark_address_{rng.randrange(1000)}', 'amount': rng.randint(1, 100)}],
+                'fee': rng.randint(0, 5)
+            }).get_json()
+            response = clients[0].post('/transaction/add', json={
+                'signature': prepared['signature'], 'public_key': genesis_wallet['public_key'],
+                'inputs': prepared['inputs'], 'outputs': prepared['outputs']
+            })
+            if response.status_code != 201:
+                raise RuntimeError(f"Transaction rejected: {response.data!r}")
+            # The node rebuilds the transaction from the signed fields, with its own id
+            return response.get_json()['transaction_id']
+
+        def mine_block():
+            response = clients[0].post('/block/mine', json={'miner_address': 'benchmark_miner'})
+            if response.status_code != 200:
+                raise RuntimeError(f"Mining failed: {response.data!r}")
+            return tip(clients[0])
+
+        def everywhere(tx_id):
+            return lambda: all(any(tx['tx_id'] == tx_id for tx in client.get('/transaction/get_mempool').get_json()['transactions'])
+                               for client in clients)
+
+        def synced(block_hash):
+            return lambda: all(tip(client) == block_hash for client in clients)
+
+        # Every node starts with its own genesis block, so the first block makes the others sync to node 0's chain
+        submit_transaction()
+        wait_until(synced(mine_block()), args.gossip_timeout, 'the first block to reach every node')
+
+        transaction_times = []
+        block_times = []
+        for _ in range(args.gossip_rounds):
+            transaction_times.append(wait_until(everywhere(submit_transaction()), args.gossip_timeout,
+                                                'a transaction to reach every node'))
+            block_times.append(wait_until(synced(mine_block()), args.gossip_timeout, 'a block to reach every node'))
+        return {
+            'gossip.transaction_propagation': metric(sum(transaction_times) / len(transaction_times) * 1000, 'ms', 'lower'),
+            'gossip.block_propagation': metric(sum(block_times) / len(block_times) * 1000, 'ms', 'lower')
+        }
+    finally:
+        for server in servers:
+            server.shutdown()
+        for data_dir in data_dirs:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+BENCHMARKS = {
+    'add_transaction': bench_add_transaction,
+    'block_assembly': bench_block_assembly,
+    'get_balance': bench_get_balance,
+    'coin_selection': bench_coin_selection,
+    'chain': bench_chain,
+    'gossip': bench_gossip
+}
+
+# Part - 03 Baseline Functions
+
+def compare(metrics: Metrics, baseline: Metrics, tolerance: float) -> List[str]:
+    """Describe every metric that got worse than the baseline by more than tolerance (a fraction)"""
+    regressions = []
+    for name, current in sorted(metrics.items()):
+        previous = baseline.get(name)
+        if previous is None or not previous['value']:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        worse = -change if current['better'] == 'higher' else change
+        status = 'REGRESSION' if worse > tolerance else 'ok'
+        print(f"{status:>10}  {name}: {previous['value']} -> {current['value']} {current['unit']} ({change:+.1%})")
+        if worse > tolerance:
+            regressions.append(name)
+    return regressions
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    metrics = {}
+    for name in args.only or BENCHMARKS:
+        started = time.perf_counter()
+        metrics.update(BENCHMARKS[name](args, rng))
+        logger.warning("Benchmark %s finished in %.1fs", name, time.perf_counter() - started)
+    return {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'metrics': metrics
+    }
+
+# Run from the src directory:
+#   python tools/Benchmark.py --output bench.json
+#   python tools/Benchmark.py --baseline bench.json   (exits with status 1 on a regression)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the node hot paths')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='benchmarks to run (default: all)')
+    parser.add_argument('--seed', type=int, default=1, help='seed for amounts, fees and address choices')
+    parser.add_argument('--wallets', type=int, default=20, help='generated key pairs')
+    parser.add_argument('--transactions', type=int, default=2000, help='signed transactions per admission run')
+    parser.add_argument('--blocks', type=int, default=20, help='blocks assembled from the full mempool')
+    parser.add_argument('--addresses', type=int, default=1000, help='addresses owning the get_balance outputs')
+    parser.add_argument('--utxo-sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='UTXO-set sizes get_balance is measured at')
+    parser.add_argument('--balance-queries', type=int, default=1000, help='get_balance calls per size')
+    parser.add_argument('--wallet-utxos', type=int, default=100000, help='outputs owned by the coin selection wallet')
+    parser.add_argument('--selection-queries', type=int, default=20, help='payments selected for')
+    parser.add_argument('--chain-length', type=int, default=100, help='blocks mined, validated and synced')
+    parser.add_argument('--port', type=int, default=5399, help='port of the node serving the chain to sync')
+    parser.add_argument('--gossip-nodes', type=int, default=10, help='nodes in the gossip ring, on the ports after --port')
+    parser.add_argument('--gossip-rounds', type=int, default=5, help='transactions and blocks timed across the ring')
+    parser.add_argument('--gossip-timeout', type=float, default=30, help='seconds to wait for an item to reach every node')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='slowdown fraction reported as a regression')
+    args = parser.parse_args()
+
+    # Only the benchmark progress and warnings, not the node's per-transaction logging
+    configure_logging(level=logging.WARNING, log_file=None, levels={'werkzeug': logging.WARNING})
+
+    results = run(args)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(report)
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['metrics']
+        regressions = compare(results['metrics'], baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
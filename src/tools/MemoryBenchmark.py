@@ -0,0 +1,71 @@
+# 00 Importing System Modules
+import sys
+import os
+import argparse
+import hashlib
+import tracemalloc
+from datetime import datetime
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+# 01 Importing Modules
+from models.UTXO import UTXO
+from models.UTXOSet import UTXOSet
+
+# 02 Importing Data and Type Modules
+from typing import Callable, Dict, Set, Tuple
+
+class DictUTXO:
+    """The UTXO layout before the compact set: a __dict__ per object, a timestamp string and a spent flag"""
+
+    def __init__(self, amount: float, owner_address: str, tx_id: str, output_index: int):
+        self.timestamp = str(datetime.now())
+        self.amount = amount
+        self.owner_address = owner_address
+        self.tx_id = tx_id
+        self.output_index = output_index
+        self.spent = False
+
+def fill_dict_set(count: int, addresses: int) -> Tuple[Dict[str, DictUTXO], Dict[str, Set[str]]]:
+    """Store outputs the old way: "txid:index" ids mapping to full objects, plus the address index of ids"""
+    utxo_set = {}
+    address_index = {}
+    for i in range(count):
+        tx_id = hashlib.sha256(str(i).encode()).hexdigest()
+        utxo_id = f"{tx_id}:{i % 3}"
+        owner_address = f"address-{i % addresses}"
+        utxo_set[utxo_id] = DictUTXO(1.5 + i, owner_address, tx_id, i % 3)
+        address_index.setdefault(owner_address, set()).add(utxo_id)
+    return utxo_set, address_index
+
+def fill_compact_set(count: int, addresses: int) -> UTXOSet:
+    """Store outputs in the compact UTXOSet"""
+    utxo_set = UTXOSet()
+    for i in range(count):
+        tx_id = hashlib.sha256(str(i).encode()).hexdigest()
+        utxo_set.add(UTXO(1.5 + i, f"address-{i % addresses}", tx_id, i % 3))
+    return utxo_set
+
+def bytes_per_utxo(fill: Callable[[int, int], object], count: int, addresses: int) -> float:
+    """Memory still allocated after filling a set, divided by the number of outputs"""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    utxo_set = fill(count, addresses)
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del utxo_set
+    return allocated / count
+
+# Run from the src directory: python tools/MemoryBenchmark.py --count 100000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure memory used per unspent output')
+    parser.add_argument('--count', type=int, default=100000, help='number of outputs to store')
+    parser.add_argument('--addresses', type=int, default=1000, help='number of distinct owner addresses')
+    args = parser.parse_args()
+
+    before = bytes_per_utxo(fill_dict_set, args.count, args.addresses)
+    after = bytes_per_utxo(fill_compact_set, args.count, args.addresses)
+    print(f"dict of UTXO objects: {before:.0f} bytes per UTXO")
+    print(f"compact UTXOSet:      {after:.0f} bytes per UTXO ({before / after:.1f}x smaller)")
@@ -0,0 +1,191 @@
+# 00 Importing System Modules
+import sys
+import os
+import argparse
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+# Add the src directory to Python path
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+# 01 Importing Modules
+from models.Blockchain import BlockChain
+from models.BlockStore import decode_block_records, frame_record
+from models.LogConfig import configure_logging
+from models.Transaction import Transaction
+from tools.Benchmark import fund_wallets, make_wallets, sign_transactions
+
+# 02 Importing Data and Type Modules
+from typing import Callable, Dict, List
+
+import logging
+
+# Create logger
+logger = logging.getLogger(__name__)
+
+class StressRun:
+    """Writer and reader threads sharing one BlockChain, counting operations and invariant violations"""
+
+    def __init__(self, blockchain: BlockChain, supply: float):
+        self.blockchain = blockchain
+        self.supply = supply  # Value of the UTXO set at height 1; every later block adds one mining reward
+        self.stop = threading.Event()
+        self.operations: Dict[str, int] = {}
+        self.violations: List[str] = []
+        self._lock = threading.Lock()
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.operations[name] = self.operations.get(name, 0) + 1
+
+    def fail(self, message: str) -> None:
+        with self._lock:
+            self.violations.append(message)
+        self.stop.set()
+
+    def loop(self, name: str, step: Callable[[], None]) -> None:
+        """Call step until the run stops, recording any exception as a violation"""
+        try:
+            while not self.stop.is_set():
+                step()
+                self.count(name)
+        except Exception as e:
+            self.fail(f"{name}: {type(e).__name__}: {e}")
+
+    # Part - 01 Writers
+
+    def admit(self, transactions: List[Transaction]) -> Callable[[], None]:
+        remaining = iter(transactions)
+
+        def step():
+            # Every admission needs a fresh transaction, re-admitting would only hit the duplicate check
+            transaction = next(remaining, None)
+            if transaction is None:
+                self.stop.wait(0.01)
+                return
+            self.blockchain.add_transaction(transaction)
+        return step
+
+    def mine(self) -> None:
+        # create_block doesn't check the proof, so blocks are built as fast as the lock allows
+        if not self.blockchain.mempool:
+            self.stop.wait(0.001)
+            return
+        self.blockchain.create_block(1, self.blockchain.get_previous_block().hash, 'stress_miner')
+
+    # Part - 02 Readers
+
+    def check_state(self) -> None:
+        """UTXO set, chain and mempool must agree with each other within one read lock"""
+        blockchain = self.blockchain
+        with blockchain.lock.read():
+            height = len(blockchain.chain)
+            tip = blockchain.get_previous_block()
+            total = sum(utxo.amount for utxo in blockchain.utxo_set)
+            pending = blockchain.mempool.copy()
+            missing = [tx.tx_id for tx in pending for utxo in tx.inputs
+                       if blockchain.utxo_set.get(utxo.tx_id, utxo.output_index) is None]
+        expected = self.supply + blockchain.INITIAL_MINING_REWARD * (height - 1)
+        if tip.index != height:
+            self.fail(f"tip index {tip.index} at chain length {height}")
+        if total != expected:
+            self.fail(f"UTXO set holds {total} at height {height}, expected {expected}")
+        if missing:
+            self.fail(f"mempool transaction {missing[0]} spends an output missing from the UTXO set")
+
+    def read_balances(self, addresses: List[str], rng: random.Random) -> Callable[[], None]:
+        def step():
+            self.blockchain.get_balance(rng.choice(addresses))
+        return step
+
+    def read_mempool(self) -> None:
+        for tx in self.blockchain.get_mempool_transactions():
+            tx.to_bytes()
+
+    def read_chain(self) -> None:
+        """Stream the whole chain the way /chain/get does, then check that the blocks link up"""
+        blockchain = self.blockchain
+        with blockchain.lock.read():
+            length = len(blockchain.chain)
+            epoch = blockchain.chain_epoch
+        try:
+            data = b''.join(frame_record(encoded)
+                            for encoded in blockchain.iter_encoded_blocks(0, length, epoch, binary=True))
+        except RuntimeError:
+            # Stopped by a reorganization instead of mixing branches
+            self.count('read_chain.stale')
+            return
+        blocks = decode_block_records(data)
+        for previous, block in zip(blocks, blocks[1:]):
+            if block.previous_hash != previous.hash:
+                self.fail(f"streamed block {block.index} does not link to block {previous.index}")
+                return
+
+def run(args) -> dict:
+    rng = random.Random(args.seed)
+    data_dir = None if args.memory else tempfile.mkdtemp(prefix='stress_chain_')
+    blockchain = BlockChain(data_dir=data_dir)
+    try:
+        wallets = make_wallets(blockchain, args.wallets)
+        funding = fund_wallets(blockchain, wallets, -(-args.transactions // args.wallets), rng)[:args.transactions]
+        transactions = sign_transactions(funding, wallets, rng)
+        stress = StressRun(blockchain, sum(utxo.amount for utxo in blockchain.utxo_set))
+
+        addresses = [wallet.address for wallet in wallets]
+        workers = [('add_transaction', stress.admit(transactions[i::args.admitters])) for i in range(args.admitters)]
+        workers.append(('create_block', stress.mine))
+        for i in range(args.readers):
+            workers.append(('check_state', stress.check_state))
+            workers.append(('get_balance', stress.read_balances(addresses, random.Random(args.seed + i))))
+            workers.append(('get_mempool', stress.read_mempool))
+            workers.append(('read_chain', stress.read_chain))
+
+        threads = [threading.Thread(target=stress.loop, args=worker, daemon=True) for worker in workers]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        stress.stop.wait(args.seconds)
+        stress.stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        stress.check_state()
+        return {
+            'seconds': round(elapsed, 3),
+            'threads': len(threads),
+            'height': len(blockchain.chain),
+            'operations_per_second': {name: round(count / elapsed, 1) for name, count in sorted(stress.operations.items())},
+            'violations': stress.violations
+        }
+    finally:
+        if data_dir is not None:
+            blockchain.close()
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+# Run from the src directory: python tools/StressTest.py --seconds 10 --readers 8
+# Exits with status 1 if any reader saw torn state or any thread raised
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Hammer one BlockChain with concurrent writers and readers')
+    parser.add_argument('--seconds', type=float, default=10, help='how long to run')
+    parser.add_argument('--readers', type=int, default=4, help='threads per kind of reader')
+    parser.add_argument('--admitters', type=int, default=2, help='threads adding transactions')
+    parser.add_argument('--transactions', type=int, default=5000, help='signed transactions to admit')
+    parser.add_argument('--wallets', type=int, default=20, help='generated key pairs')
+    parser.add_argument('--seed', type=int, default=1, help='seed for amounts, fees and address choices')
+    parser.add_argument('--memory', action='store_true', help='keep the chain in memory instead of a temporary store')
+    args = parser.parse_args()
+
+    configure_logging(level=logging.WARNING, log_file=None)
+    # Rejections of transactions whose funding output was spent by another admitter are expected here
+    logging.getLogger('models.Blockchain').setLevel(logging.CRITICAL)
+
+    results = run(args)
+    print(json.dumps(results, indent=2))
+    if results['violations']:
+        sys.exit(1)